@@ -21,28 +21,39 @@
 #       Clean-up, typing, docstrings, added get_obj
 # Version 0.3 / 2025-06-21
 #       Added -T / --datetime and -D / --dateminus12 options
+# Version 0.4 / 2026-10-18
+#       Use shared "discord" limiter from ratelimit, retries with Retry-After
+#       on 429 (Discord webhook rate limit), keep-alive session from httpclient
+#       No retry after timeouts or server errors, the message may have been
+#       posted already
 
 import sys
 import argparse
 import datetime
 
 # The following libs must be installed with pip
-import requests
 from icecream import ic
 # Disable debugging
 ic.disable()
 # Local modules
 from verbose import verbose, warning, error
 from jsonconfig import JSONConfig
+from ratelimit  import get_limiter
+from httpclient import http_post
 
 
-VERSION = "0.3 / 2025-06-21"
+VERSION = "0.4 / 2026-10-18"
 AUTHOR  = "Martin Junius"
 NAME    = "discordmsg"
 
 CHANNEL = "#alerts"
 CONFIG  = "discord-config.json"
-TIMEOUT = 20                # seconds timeout for requests.post()
+TIMEOUT = 20                # seconds timeout for http_post()
+RATE    = 1.0               # max. messages per second
+BURST   = 5                 # max. burst of messages
+
+# Rate limit and retries for webhook requests
+_limiter = get_limiter("discord", rate=RATE, burst=BURST)
 
 
 class DiscordConfig(JSONConfig):
@@ -138,7 +149,8 @@ def discord_message(msg: str):
     url = config.url()
     data = { "content": msg }
     ic(url, data)
-    response = requests.post(url, json=data, timeout=TIMEOUT)
+    # Not idempotent, a retry after a timeout could post the message twice
+    response = _limiter.call(http_post, url, json=data, timeout=TIMEOUT, retry=False)
     ic(response.status_code)
 
 
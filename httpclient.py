@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# ChangeLog
+# Version 0.1 / 2026-10-18
+#       Shared HTTP client, one keep-alive requests.Session per host with
+#       connection pool and default timeout
+#
+#       Usage:  from httpclient import http_get, http_post
+#               response = http_get(url, params=..., timeout=...)
+#               response = http_post(url, data=..., timeout=...)
+#               http_stats()        requests and new connections per host
+#
+#       requests doesn't support HTTP/2, connections are reused with
+#       HTTP/1.1 keep-alive instead
+#
+#       set_http_hook(hook) routes all requests through hook(send, method, url, **kwargs),
+#       e.g. mpc.mpcreplay for recording/replaying HTTP traffic
+
+import argparse
+import threading
+import time
+import typing
+from urllib.parse import urlsplit
+
+# The following libs must be installed with pip
+import requests
+from requests.adapters import HTTPAdapter
+from icecream import ic
+# Disable debugging
+ic.disable()
+# Local modules
+from verbose import verbose, warning, error
+
+
+VERSION = "0.1 / 2026-10-18"
+AUTHOR  = "Martin Junius"
+NAME    = "httpclient"
+
+TIMEOUT          = 60       # seconds, default timeout for all requests
+POOL_CONNECTIONS = 4        # number of connection pools per session
+POOL_MAXSIZE     = 8        # max. number of kept-alive connections per host, >= parallel requests
+USER_AGENT       = f"astro-{NAME}/{VERSION.split()[0]} " + requests.utils.default_user_agent()
+
+
+
+class HTTPClient:
+    """ Keep-alive sessions per host, safe to use from worker threads """
+
+    def __init__(self, timeout: float=TIMEOUT, pool_maxsize: int=POOL_MAXSIZE):
+        """
+        Create HTTP client
+
+        :param timeout: default timeout in seconds, defaults to TIMEOUT
+        :type timeout: float, optional
+        :param pool_maxsize: max. number of connections per host, defaults to POOL_MAXSIZE
+        :type pool_maxsize: int, optional
+        """
+        self.timeout      = timeout
+        self.pool_maxsize = pool_maxsize
+        self._sessions    = {}          # scheme://host:port -> requests.Session
+        self._requests    = {}          # scheme://host:port -> number of requests
+        self._lock        = threading.Lock()
+
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=self.pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["User-Agent"] = USER_AGENT
+        return session
+
+
+    def session(self, url: str) -> requests.Session:
+        """
+        Get session for host of URL, created on first use
+
+        :param url: request URL
+        :type url: str
+        :return: session
+        :rtype: requests.Session
+        """
+        u = urlsplit(url)
+        host = f"{u.scheme}://{u.netloc}"
+        with self._lock:
+            if host not in self._sessions:
+                ic(host)
+                self._sessions[host] = self._new_session()
+                self._requests[host] = 0
+            self._requests[host] += 1
+            return self._sessions[host]
+
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        return self.session(url).request(method, url, **kwargs)
+
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send HTTP request, same parameters as requests.request()
+
+        :param method: HTTP method
+        :type method: str
+        :param url: URL
+        :type url: str
+        :return: response
+        :rtype: requests.Response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if _hook:
+            return _hook(self._send, method, url, **kwargs)
+        return self._send(method, url, **kwargs)
+
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+
+    def stats(self) -> dict:
+        """ Number of requests and new connections per host """
+        stats = {}
+        with self._lock:
+            for host, session in self._sessions.items():
+                pools = session.get_adapter(host).poolmanager.pools
+                connections = sum(pools[key].num_connections for key in pools.keys())
+                stats[host] = { "requests": self._requests[host], "connections": connections }
+        return stats
+
+
+    def close(self):
+        """ Close all sessions """
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+            self._requests = {}
+
+
+
+# Shared client for all modules
+client = HTTPClient()
+
+# Optional hook for all requests
+_hook = None
+
+def set_http_hook(hook: typing.Callable):
+    """
+    Set hook for all requests
+
+    :param hook: function hook(send, method, url, **kwargs) -> requests.Response,
+                 calling send(method, url, **kwargs) for real requests, None to disable
+    :type hook: typing.Callable
+    """
+    global _hook
+    _hook = hook
+
+
+def http_request(method: str, url: str, **kwargs) -> requests.Response:
+    """ Send request with shared client, see HTTPClient.request() """
+    return client.request(method, url, **kwargs)
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """ GET request with shared client """
+    return client.request("GET", url, **kwargs)
+
+
+def http_post(url: str, **kwargs) -> requests.Response:
+    """ POST request with shared client """
+    return client.request("POST", url, **kwargs)
+
+
+def http_stats() -> list:
+    """ Stats of shared client, as list of str """
+    return [ f"{host}: {s['requests']} requests, {s['connections']} connections"
+             for host, s in client.stats().items() ]
+
+
+
+### Test run as a command line script ###
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Test HTTP client, request URL N times with and without keep-alive session",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("-n", "--number", type=int, default=10, help="number of requests, default 10")
+    arg.add_argument("url", help="URL")
+
+    args = arg.parse_args()
+
+    if args.verbose:
+        verbose.set_prog(NAME)
+        verbose.enable()
+    if args.debug:
+        ic.enable()
+
+    t0 = time.perf_counter()
+    for i in range(args.number):
+        requests.get(args.url, timeout=TIMEOUT)
+    t1 = time.perf_counter()
+    for i in range(args.number):
+        http_get(args.url)
+    t2 = time.perf_counter()
+
+    print(f"requests.get(): {(t1 - t0) / args.number * 1000:8.1f} ms/request")
+    print(f"http_get():     {(t2 - t1) / args.number * 1000:8.1f} ms/request")
+    for line in http_stats():
+        print(line)
+
+
+
+if __name__ == "__main__":
+    main()
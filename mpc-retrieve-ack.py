@@ -45,10 +45,26 @@
 #       Added -m --match, -J --json options
 # Version 1.8 / 2024-11-10
 #       Fixed -n --no-wamo-requests
+# Version 1.9 / 2026-10-18
+#       Added --db option, store ACK mails and observations in local SQLite database
+#       Retrieve all ACK mails first, then WAMO data for all mails with parallel
+#       requests, new --wamo-concurrency, --wamo-rate options
+#       Ids of all mails are deduplicated and combined into large WAMO
+#       requests, new --wamo-batch-size option
+#       Added --wamo-cache option, persistent cache for WAMO responses
+#       Request statistics (retries, throttling, connections) in verbose output
+#       Added --record and --replay options, offline replay of HTTP requests
+#       Added --refresh option, WAMO requests only for observations not yet
+#       published according to --db, delta report of status changes
+#       Added --archive-cache, --archive-offline options
+#       Added --mpec-cache option
+#       Added --wamo-cache-ttl, --wamo-cache-refresh options
+#       Internal _ids not in -J JSON output
 
 import argparse
 import imaplib
 import re
+import sys
 
 # The following libs must be installed with pip
 from icecream import ic
@@ -57,16 +73,23 @@ ic.disable()
 
 # Local modules
 from verbose          import verbose, warning, error
+from ratelimit        import ratelimit_stats
+from httpclient       import http_stats
 from jsonconfig       import JSONConfig, config
-from mpc.mpcosarchive import Publication
-from mpc.mpcwamo      import retrieve_from_wamo_json, get_wamo_fields, get_wamo_data
+from mpc.mpcosarchive import Publication, set_archive_cache, set_mpec_cache
+from mpc.mpcwamo      import retrieve_from_wamo_planned, get_wamo_fields, get_wamo_data
+from mpc.mpcwamo      import WAMO_CONCURRENCY, WAMO_RATE, WAMO_BATCH_SIZE, set_wamo_cache
+from mpc.mpcwamocache import WAMOCache, parse_ttls
+from mpc.mpcreplay    import start_replay
+from mpc.mpcdata80    import MPCData80
+from mpc.mpcobsdb     import MPCObsDB, WAMORefresh
 from ovoutput         import OverviewOutput
 from csvoutput        import csv_output as CSVOutput
 from jsonoutput       import JSONOutput
 
 
 NAME    = "mpc-retrieve-ack"
-VERSION = "1.8 / 2024-11-10"
+VERSION = "1.9 / 2026-10-18"
 AUTHOR  = "Martin Junius"
 
 CONFIG = "imap-account.json"
@@ -87,6 +110,13 @@ class Options:
     match       = None      # -m --match
     json        = False     # -J --json
     submitted   = False     # -S --submitted
+    db          = None      # --db, MPCObsDB object
+    wamo_concurrency = WAMO_CONCURRENCY     # --wamo-concurrency
+    wamo_rate   = WAMO_RATE # --wamo-rate
+    wamo_batch_size = WAMO_BATCH_SIZE       # --wamo-batch-size
+    wamo_cache  = None      # --wamo-cache, WAMOCache object
+    replay      = None      # --record, --replay, HTTPReplay object
+    refresh     = None      # --refresh, WAMORefresh object
 
 
 class RetrieveConfig(JSONConfig):
@@ -159,7 +189,47 @@ def retrieve_from_folder(server, folder):
         msg = data[0][1].decode()
         obj = retrieve_from_msg(folder, n, msg)
         if obj:
-            JSONOutput.add_obj(obj)
+            Acks.append((folder, n, obj))
+
+
+
+# Parsed ACK mails (folder, message number, ACK object), processed after WAMO
+# requests for all mails
+Acks = []
+
+
+def process_acks():
+    """
+    Retrieve WAMO data for all ACK mails, then process mails in order
+    """
+    wamo_list = [ None ] * len(Acks)
+    wamo_ids  = [ None ] * len(Acks)
+    if not Options.no_wamo:
+        ids_list = [ obj["_ids"] for (folder, n, obj) in Acks ]
+        known = Options.refresh.known(ids_list) if Options.refresh else None
+        (wamo_list, wamo_ids) = retrieve_from_wamo_planned(ids_list, Options.wamo_batch_size, Options.wamo_concurrency,
+                                                           Options.wamo_rate, known=known, with_ids=True)
+        if Options.refresh:
+            Options.refresh.update(wamo_list, wamo_ids)
+    for (folder, n, obj), wamo, ids in zip(Acks, wamo_list, wamo_ids):
+        if not Options.no_wamo:
+            process_wamo(folder, obj, wamo)
+        # _ids only used internally, not part of JSON output
+        JSONOutput.add_obj({ k: v for k, v in obj.items() if k != "_ids" })
+        if Options.db:
+            store_ack(f"{folder}/{n}", obj, ids)
+
+
+
+def store_ack(source: str, obj: dict, wamo_ids: list=None):
+    """ Store ACK mail and observations in local observation database """
+    db = Options.db
+    report_id = db.add_report(source, "ACK", submission=obj["submission"], ack=obj["ack"], date=obj["date"])
+    for wamo in obj["_wamo"]:
+        db.add_wamo(report_id, wamo, wamo_ids)
+    if not obj["_wamo"]:
+        ids = obj["_ids"]
+        db.add_observations(report_id, [ MPCData80(line) for line in ids.values() if len(line) >= 80 ], ids)
 
 
 
@@ -227,6 +297,7 @@ def retrieve_from_msg(msg_folder, msg_n, msg):
     ack_obj["subject"] = msg_subject
     ack_obj["ack"] = msg_ack
     ack_obj["submission"] = msg_submission
+    ack_obj["_ids"] = msg_ids
 
     if Options.no_wamo:
         if Options.csv:
@@ -234,68 +305,73 @@ def retrieve_from_msg(msg_folder, msg_n, msg):
                 # CSV output: list of messages in mailbox with id and obs
                 CSVOutput.add_fields([ "Folder", "Message#", "Date", "ACK", "id", "obs" ])
                 CSVOutput.add_row([ msg_folder, msg_n, msg_date.removeprefix("Date: "), msg_ack, id, obs ])
-    else:
-        # mpc.mpcwamo module
-        wamo = retrieve_from_wamo_json(msg_ids)
-        if wamo:
-            # Get publications and add to global list
-            for obs in wamo:
-                pub = obs["publication"]
-                if pub:
-                    Publication.add(pub)
-
-            ack_obj["_wamo"].append(wamo)
-            if Options.csv:
-                for wobj in wamo:
-                    ##FIXME: use new get_wamo_...() function in mpc.mpcwamo
-                    # CSV output: list of messages in mailbox with complete WAMO data
-                    CSVOutput.add_fields([  "Folder", "Message#", "Date", "ACK", 
-                                            "id", "objId", "publication",
-                                            "data80", 
-                                            "permId", "provId", "discovery", 
-                                            "note1", "note2",
-                                            "obs_date", "obs_date_minus12", 
-                                            "ra", "dec", 
-                                            "mag", "band", "catalog",
-                                            "reference", "code" ])
-                    # Special handling of mag as a float
-                    mag = wobj["data"]["mag"]
-                    if mag:
-                        mag = float(mag)
-                    # Replace objId with permId oder provId
-                    objId = wobj["data"]["permId"] or wobj["data"]["provId"] or wobj["objId"]
-                    ic(mag, objId)
-                    CSVOutput.add_row([ msg_folder, msg_n, msg_date.removeprefix("Date: "), msg_ack, 
-                                            wobj["observationID"], objId, wobj["publication"],
-                                            wobj["data"]["data"],
-                                            wobj["data"]["permId"], wobj["data"]["provId"], wobj["data"]["discovery"],
-                                            wobj["data"]["note1"], wobj["data"]["note2"], 
-                                            wobj["data"]["date"], wobj["data"]["date_minus12"], 
-                                            wobj["data"]["ra"], wobj["data"]["dec"], 
-                                            mag, wobj["data"]["band"], wobj["data"]["catalog"], 
-                                            wobj["data"]["reference"], wobj["data"]["code"]
-                                        ])
-
-            if Options.overview:
-                # for wobj in wamo:
-                for wobj, orig in zip(wamo, msg_ids.values()):
-                    text     = wobj["data"]["data"]
-                    key_id   = wobj["objId"]
-                    key_date = wobj["data"]["date_minus12"]
-                    if Options.sort_by_date:
-                        OverviewOutput.add(key_date, key_id, text)
-                        if Options.submitted:
-                            OverviewOutput.add(key_date, key_id, f"{orig}    << submitted (ACK mail)")
-                    else:
-                        OverviewOutput.add(key_id, key_date, text)
-                        if Options.submitted:
-                            OverviewOutput.add(key_id, key_date, f"{orig}    << submitted (ACK mail)")
-       
 
     return ack_obj
 
 
 
+def process_wamo(msg_folder: str, ack_obj: dict, wamo: list):
+    """ Process WAMO data for ACK mail """
+    msg_n    = ack_obj["message"]
+    msg_date = ack_obj["date"]
+    msg_ack  = ack_obj["ack"]
+    msg_ids  = ack_obj["_ids"]
+    if wamo:
+        # Get publications and add to global list
+        for obs in wamo:
+            pub = obs["publication"]
+            if pub:
+                Publication.add(pub)
+
+        ack_obj["_wamo"].append(wamo)
+        if Options.csv:
+            for wobj in wamo:
+                ##FIXME: use new get_wamo_...() function in mpc.mpcwamo
+                # CSV output: list of messages in mailbox with complete WAMO data
+                CSVOutput.add_fields([  "Folder", "Message#", "Date", "ACK", 
+                                        "id", "objId", "publication",
+                                        "data80", 
+                                        "permId", "provId", "discovery", 
+                                        "note1", "note2",
+                                        "obs_date", "obs_date_minus12", 
+                                        "ra", "dec", 
+                                        "mag", "band", "catalog",
+                                        "reference", "code" ])
+                # Special handling of mag as a float
+                mag = wobj["data"]["mag"]
+                if mag:
+                    mag = float(mag)
+                # Replace objId with permId oder provId
+                objId = wobj["data"]["permId"] or wobj["data"]["provId"] or wobj["objId"]
+                ic(mag, objId)
+                CSVOutput.add_row([ msg_folder, msg_n, msg_date.removeprefix("Date: "), msg_ack, 
+                                        wobj["observationID"], objId, wobj["publication"],
+                                        wobj["data"]["data"],
+                                        wobj["data"]["permId"], wobj["data"]["provId"], wobj["data"]["discovery"],
+                                        wobj["data"]["note1"], wobj["data"]["note2"], 
+                                        wobj["data"]["date"], wobj["data"]["date_minus12"], 
+                                        wobj["data"]["ra"], wobj["data"]["dec"], 
+                                        mag, wobj["data"]["band"], wobj["data"]["catalog"], 
+                                        wobj["data"]["reference"], wobj["data"]["code"]
+                                    ])
+
+        if Options.overview:
+            # for wobj in wamo:
+            for wobj, orig in zip(wamo, msg_ids.values()):
+                text     = wobj["data"]["data"]
+                key_id   = wobj["objId"]
+                key_date = wobj["data"]["date_minus12"]
+                if Options.sort_by_date:
+                    OverviewOutput.add(key_date, key_id, text)
+                    if Options.submitted:
+                        OverviewOutput.add(key_date, key_id, f"{orig}    << submitted (ACK mail)")
+                else:
+                    OverviewOutput.add(key_id, key_date, text)
+                    if Options.submitted:
+                        OverviewOutput.add(key_id, key_date, f"{orig}    << submitted (ACK mail)")
+
+
+
 # Hack from https://stackoverflow.com/questions/6405208/how-to-convert-numeric-string-ranges-to-a-list-in-python
 def str_to_list(s):
     return sum(((list(range(*[int(j) + k for k,j in enumerate(i.split('-'))]))
@@ -325,6 +401,19 @@ def main():
     arg.add_argument("-O", "--overview", action="store_true", help="create overview of objects and observations")
     arg.add_argument("-S", "--submitted", action="store_true", help="add submitted observation to overview")
     arg.add_argument("-D", "--sort-by-date", action="store_true", help="sort overview by observation date (minus 12h)")
+    arg.add_argument("--db", help="store ACK mails and observations in SQLite database DB")
+    arg.add_argument("--wamo-concurrency", type=int, default=WAMO_CONCURRENCY, help=f"max. parallel WAMO requests, default {WAMO_CONCURRENCY}")
+    arg.add_argument("--wamo-batch-size", type=int, default=WAMO_BATCH_SIZE, help=f"max. ids per WAMO request, default {WAMO_BATCH_SIZE}")
+    arg.add_argument("--wamo-cache", help="cache WAMO responses in SQLite database WAMO_CACHE")
+    arg.add_argument("--wamo-cache-ttl", help="TTLs of cached WAMO answers per status, e.g. pending=3600,queue=600,unknown=0,published=none")
+    arg.add_argument("--wamo-cache-refresh", action="store_true", help="ignore cached WAMO answers for this run, store new ones")
+    arg.add_argument("--wamo-rate", type=float, default=WAMO_RATE, help=f"max. WAMO requests per second, default {WAMO_RATE}")
+    arg.add_argument("--refresh", action="store_true", help="request WAMO status only for observations not yet published in DB, print changes")
+    arg.add_argument("--archive-cache", help="cache MPC archive index in ARCHIVE_CACHE (JSON)")
+    arg.add_argument("--archive-offline", action="store_true", help="use MPC archive index from ARCHIVE_CACHE only")
+    arg.add_argument("--mpec-cache", help="cache MPEC URLs in MPEC_CACHE (JSON)")
+    arg.add_argument("--record", help="record all HTTP requests to SQLite store RECORD")
+    arg.add_argument("--replay", help="replay HTTP requests from SQLite store REPLAY, no network access")
     args = arg.parse_args()
 
     verbose.set_prog(NAME)
@@ -346,6 +435,28 @@ def main():
     Options.match       = args.match
     Options.json        = args.json
     Options.submitted   = args.submitted
+    if args.db:
+        Options.db      = MPCObsDB(args.db)
+    Options.wamo_concurrency = args.wamo_concurrency
+    Options.wamo_rate   = args.wamo_rate
+    Options.wamo_batch_size = args.wamo_batch_size
+    if args.wamo_cache:
+        try:
+            ttls = parse_ttls(args.wamo_cache_ttl) if args.wamo_cache_ttl else None
+        except ValueError as e:
+            error(f"--wamo-cache-ttl: {e}")
+        Options.wamo_cache = WAMOCache(args.wamo_cache, ttls=ttls, refresh=args.wamo_cache_refresh)
+        set_wamo_cache(Options.wamo_cache)
+    if args.record or args.replay:
+        Options.replay = start_replay(args.record or args.replay, record=bool(args.record))
+    if args.archive_cache:
+        set_archive_cache(args.archive_cache, args.archive_offline)
+    if args.mpec_cache:
+        set_mpec_cache(args.mpec_cache)
+    if args.refresh:
+        if not Options.db:
+            error("--refresh requires --db")
+        Options.refresh = WAMORefresh(Options.db)
 
     if Options.sort_by_date:
         OverviewOutput.set_description1("Total observation dates:  ")
@@ -355,6 +466,7 @@ def main():
         OverviewOutput.set_description2("Total single observations: ")
 
     retrieve_from_imap(config)
+    process_acks()
 
     if Options.overview:
         if Options.output:
@@ -371,6 +483,21 @@ def main():
     elif Options.json:
         JSONOutput.write(Options.output)
 
+    if Options.refresh:
+        # Don't mix with CSV/JSON/overview output to stdout
+        to_stdout = not Options.output and (Options.csv or Options.json or Options.overview)
+        Options.refresh.report(sys.stderr if to_stdout else sys.stdout)
+    if Options.db:
+        Options.db.close()
+    if Options.wamo_cache:
+        verbose(Options.wamo_cache.stats())
+        Options.wamo_cache.close()
+    if Options.replay:
+        verbose(Options.replay.stats())
+        Options.replay.close()
+    for line in ratelimit_stats() + http_stats():
+        verbose(line)
+
 
 
 if __name__ == "__main__":
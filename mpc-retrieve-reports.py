@@ -27,16 +27,39 @@
 #       Fixed -n --no-wamo-requests
 # Version 1.8 / 2025-01-22
 #       Implemented CSV output for MPC1992 and ADES reports
+# Version 1.9 / 2026-10-18
+#       Added --db option, store reports and observations in local SQLite database
+#       Parse all reports first, then retrieve WAMO data for all reports with
+#       parallel requests, new --wamo-concurrency, --wamo-rate options
+#       Ids of all reports are deduplicated and combined into large WAMO
+#       requests, new --wamo-batch-size option
+#       Added --wamo-cache option, persistent cache for WAMO responses
+#       Request statistics (retries, throttling, connections) in verbose output
+#       Added --record and --replay options, offline replay of HTTP requests
+#       Added --refresh option, WAMO requests only for observations not yet
+#       published according to --db, delta report of status changes
+#       Added --archive-cache, --archive-offline options
+#       Added --mpec-cache option
+#       Report directories scanned with os.scandir, format detected from the
+#       first line, reports parsed in parallel worker threads, in sorted
+#       order of file names, new -j --jobs option
+#       Scan skips unreadable directories, no symlinked directories, as os.walk()
+#       Added --manifest, --manifest-hash, --rebuild options, parsed reports
+#       are stored in a manifest, only new or modified reports are parsed
+#       Added --wamo-cache-ttl, --wamo-cache-refresh options
+#       Internal _ids not in -J JSON output for MPC1992 reports
 
 NAME    = "mpc-retrieve-reports"
-VERSION = "1.8 / 2025-02-08"
+VERSION = "1.9 / 2026-10-18"
 AUTHOR  = "Martin Junius"
 
 import os
+import sys
 import argparse
 import re
 import csv
 import typing
+from concurrent.futures import ThreadPoolExecutor
 
 # The following libs must be installed with pip
 from icecream import ic
@@ -45,9 +68,16 @@ ic.disable()
 
 # Local modules
 from verbose          import verbose, warning, error
-from mpc.mpcosarchive import Publication
-from mpc.mpcwamo      import retrieve_from_wamo_json, get_wamo_fields, get_wamo_data
+from ratelimit        import ratelimit_stats
+from httpclient       import http_stats
+from mpc.mpcosarchive import Publication, set_archive_cache, set_mpec_cache
+from mpc.mpcwamo      import retrieve_from_wamo_planned, get_wamo_fields, get_wamo_data
+from mpc.mpcwamo      import WAMO_CONCURRENCY, WAMO_RATE, WAMO_BATCH_SIZE, set_wamo_cache
+from mpc.mpcwamocache import WAMOCache, parse_ttls
+from mpc.mpcreplay    import start_replay
 from mpc.mpcdata80    import MPCData80
+from mpc.mpcobsdb     import MPCObsDB, WAMORefresh
+from mpc.mpcmanifest  import ReportManifest
 from ovoutput         import OverviewOutput
 from csvoutput        import csv_output
 from jsonoutput       import JSONOutput
@@ -64,6 +94,19 @@ class Options:
     overview    = False     # -O --overview
     sort_by_date= False     # -D --sort-by-date
     json        = False     # -J --json
+    db          = None      # --db, MPCObsDB object
+    wamo_concurrency = WAMO_CONCURRENCY     # --wamo-concurrency
+    wamo_rate   = WAMO_RATE # --wamo-rate
+    wamo_batch_size = WAMO_BATCH_SIZE       # --wamo-batch-size
+    wamo_cache  = None      # --wamo-cache, WAMOCache object
+    replay      = None      # --record, --replay, HTTPReplay object
+    refresh     = None      # --refresh, WAMORefresh object
+    jobs        = 8         # -j --jobs
+    manifest    = None      # --manifest, ReportManifest object
+
+
+
+SNIFF_SIZE = 256            # max. chars read for the first line
 
 
 
@@ -148,43 +191,181 @@ class ReportMeta:
 
 
 
+def scan_reports(root: str) -> list:
+    """
+    Scan directory tree for report files, sorted by name per directory,
+    files before subdirectories
+
+    :param root: directory
+    :type root: str
+    :return: list of report files (*.txt)
+    :rtype: list
+    """
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                if entry.is_dir():
+                    # Same as os.walk(), symlinks to directories are not followed
+                    if not entry.is_symlink():
+                        subdirs.append(entry.path)
+                elif entry.name.endswith(".txt") or entry.name.endswith(".TXT"):
+                    files.append(entry.path)
+    except OSError as e:
+        # Same as os.walk(), skip unreadable directories
+        warning(f"can't read directory {root}: {e}")
+    files.sort()
+    for dir in sorted(subdirs):
+        files += scan_reports(dir)
+    return files
+
+
+
+def report_format(line1: str) -> str:
+    """
+    Detect report format from first line
+
+    :param line1: first line, stripped
+    :type line1: str
+    :return: "MPC1992", "ADES" or None
+    :rtype: str
+    """
+    # Old MPC 1992 report format
+    if line1.startswith("COD "):
+        return "MPC1992"
+    # New ADES (PSV) report format
+    if line1 == "# version=2017":
+        return "ADES"
+    return None
+
+
+
 def retrieve_from_directory(root: str) -> None:
-    for dir, subdirs, files in os.walk(root):
-        verbose("Processing directory", dir)
-        for f in files:
-            if f.endswith(".txt") or f.endswith(".TXT"):
-                # print("f =", f)
-                process_file(os.path.join(dir, f))
+    verbose("Processing directory", root)
+    files = scan_reports(root)
+    verbose(f"{len(files)} files, {Options.jobs} jobs")
+    with ThreadPoolExecutor(max_workers=max(1, Options.jobs)) as pool:
+        # map() returns results in order of files
+        for file, (format, obj) in zip(files, pool.map(read_file, files)):
+            add_report(file, format, obj)
 
 
 
 def process_file(file: str) -> None:
+    add_report(file, *read_file(file))
+
+
+
+def read_file(file: str) -> tuple:
+    """
+    Parsed report from manifest if file is unchanged, else parse file
+
+    :param file: report file
+    :type file: str
+    :return: (format, report object or None if not processed)
+    :rtype: tuple
+    """
+    manifest = Options.manifest
+    if not manifest:
+        return parse_file(file)
+    key = manifest.file_key(file)
+    entry = manifest.lookup(file, key)
+    # Reparse if format wasn't requested when stored
+    if entry and (entry["obj"] or not wanted_format(entry["format"])):
+        return (entry["format"], entry["obj"])
+    (format, obj) = parse_file(file)
+    manifest.store(file, key, format, obj)
+    return (format, obj)
+
+
+
+def wanted_format(format: str) -> bool:
+    return (format == "MPC1992" and Options.mpc1992) or (format == "ADES" and Options.ades)
+
+
+
+def parse_file(file: str) -> tuple:
+    """
+    Parse report file, format detected from the first line, runs in worker thread
+
+    :param file: report file
+    :type file: str
+    :return: (format, report object or None if not processed)
+    :rtype: tuple
+    """
     with open(file, "r") as fh:
         ic(file)
-        line1 = fh.readline().strip()
-        obj = None
-
-        # Old MPC 1992 report format
-        if line1.startswith("COD "):
-            if Options.mpc1992:
-                verbose("Processing MPC1992", file)
-                format = "MPC1992"
-                obj = process_mpc1992(fh, line1)
-
-        # New ADES (PSV) report format
-        elif line1 == "# version=2017":
-            if Options.ades:
-                verbose("Processing ADES", file)
-                format = "ADES"
-                obj = process_ades(fh, line1)
+        line1 = fh.readline(SNIFF_SIZE).strip()
+        format = report_format(line1)
+        if wanted_format(format):
+            if format == "MPC1992":
+                return (format, process_mpc1992(fh, line1))
+            return (format, process_ades(fh, line1))
+    return (format, None)
+
+
+
+def add_report(file: str, format: str, obj: dict) -> None:
+    if obj:
+        verbose(f"Processing {format}", file)
+        obj["_file"] = file.replace("\\", "/")
+        obj["_format"] = format
+        Reports.append(obj)
+    else:
+        verbose("Not processing", file)
+
 
-        else:
-            verbose("Not processing", file)
 
-        if obj:
-            obj["_file"] = file.replace("\\", "/")
-            obj["_format"] = format
+# Parsed reports, processed after WAMO requests for all reports
+Reports = []
+
+
+def process_reports() -> None:
+    """
+    Retrieve WAMO data for all parsed reports, then process reports in order
+    """
+    wamo_list = [ None ] * len(Reports)
+    wamo_ids  = [ None ] * len(Reports)
+    if Options.wamo:
+        ids_list = [ obj["_ids"] for obj in Reports ]
+        known = Options.refresh.known(ids_list) if Options.refresh else None
+        (wamo_list, wamo_ids) = retrieve_from_wamo_planned(ids_list, Options.wamo_batch_size, Options.wamo_concurrency,
+                                                           Options.wamo_rate, known=known, with_ids=True)
+        if Options.refresh:
+            Options.refresh.update(wamo_list, wamo_ids)
+    for obj, wamo, ids in zip(Reports, wamo_list, wamo_ids):
+        if obj["_format"] == "MPC1992":
+            process_mpc1992_wamo(obj, wamo)
+            # _ids only used internally, not part of JSON output for MPC1992 reports
+            JSONOutput.add_obj({ k: v for k, v in obj.items() if k != "_ids" })
+        else:
+            process_ades_wamo(obj, wamo)
             JSONOutput.add_obj(obj)
+        if Options.db:
+            store_report(obj, ids)
+
+
+
+def store_report(obj: dict, wamo_ids: list=None) -> None:
+    """
+    Store report and observations in local observation database
+
+    :param obj: report object from process_mpc1992() / process_ades()
+    :type obj: dict
+    :param wamo_ids: queried WAMO id for each WAMO result, defaults to None
+    :type wamo_ids: list, optional
+    """
+    db = Options.db
+    report_id = db.add_report(obj["_file"], obj["_format"],
+                              observatory=(obj.get("observatory") or {}).get("mpcCode"),
+                              submitter=(obj.get("submitter") or {}).get("name"))
+    if obj.get("_wamo"):
+        db.add_wamo(report_id, obj["_wamo"], wamo_ids)
+    elif obj["_format"] == "MPC1992":
+        db.add_observations(report_id, [ obs["data"] for obs in obj["_observations"] ])
+    else:
+        db.add_ades(report_id, obj["_observations"])
 
 
 
@@ -192,12 +373,6 @@ def process_mpc1992(fh: typing.TextIO, line1: str) -> dict:
     mpc1992_obj = {}
     mpc1992_obj["_observations"] = []
     ids = {}
-    meta = ReportMeta()
-
-    # For CSV output
-    fields_meta = meta.get_fields()
-    # Get from WAMO module
-    fields_wamo = get_wamo_fields()
 
     line = line1
     while line:
@@ -262,13 +437,25 @@ def process_mpc1992(fh: typing.TextIO, line1: str) -> dict:
         if line.startswith("----- end"):
             break
 
+    mpc1992_obj["_ids"] = ids
+    return mpc1992_obj
+
+
+
+def process_mpc1992_wamo(mpc1992_obj: dict, wamo: list) -> None:
+    meta = ReportMeta()
+
+    # For CSV output
+    fields_meta = meta.get_fields()
+    # Get from WAMO module
+    fields_wamo = get_wamo_fields()
+
     # Meta data for CSV
     meta.set_from_json(mpc1992_obj)
 
     if Options.wamo:
         if Options.csv:
             fields = fields_meta + fields_wamo
-        wamo = retrieve_from_wamo_json(ids)
         if wamo:
             mpc1992_obj["_wamo"] = wamo
             # Get publications and add to global list
@@ -299,7 +486,6 @@ def process_mpc1992(fh: typing.TextIO, line1: str) -> dict:
                 csv_output(row=data)
 
     # verbose("JSON =", json.dumps(mpc1992_obj, indent=4))
-    return mpc1992_obj
 
 
 
@@ -331,14 +517,6 @@ def convert_to_float(s: str) -> typing.Any:
 
 def process_ades(fh: typing.TextIO, line1: str) -> dict:
     ades_obj = {}
-    meta = ReportMeta()
-
-    # For CSV output
-    fields_meta = meta.get_fields()
-    # Get from PSV data
-    fields_report = None
-    # Get from WAMO module
-    fields_wamo = get_wamo_fields()
 
     # Read report txt file
     key1 = None
@@ -370,10 +548,6 @@ def process_ades(fh: typing.TextIO, line1: str) -> dict:
             for row in reader:
                 row = dict_remove_ws(row)
                 ic(row)
-                # Get fields from DictReader keys
-                if not fields_report:
-                    fields_report = list(row.keys())
-                    ic(fields_report)
                 ades_obj["_observations"].append(row)
             break
 
@@ -383,14 +557,27 @@ def process_ades(fh: typing.TextIO, line1: str) -> dict:
         ids[trk["trkSub"] + " " + trk["stn"]] = True
     ades_obj["_ids"] = ids
 
+    return ades_obj
+
+
+
+def process_ades_wamo(ades_obj: dict, wamo: list) -> None:
+    meta = ReportMeta()
+
+    # For CSV output
+    fields_meta = meta.get_fields()
+    # Get fields from DictReader keys
+    fields_report = list(ades_obj["_observations"][0].keys()) if ades_obj["_observations"] else []
+    ic(fields_report)
+    # Get from WAMO module
+    fields_wamo = get_wamo_fields()
+
     # Meta data for CSV
     meta.set_from_json(ades_obj)
 
     if Options.wamo:
         if Options.csv:
             fields = fields_meta + fields_report + fields_wamo
-        ic(ids)
-        wamo = retrieve_from_wamo_json(ids)
         ic(wamo)
         if wamo:
             ades_obj["_wamo"] = wamo
@@ -418,7 +605,7 @@ def process_ades(fh: typing.TextIO, line1: str) -> dict:
                         OverviewOutput.add(w_obs["objId"], w_obs["data"]["date_minus12"], w_obs["data"]["data"])
 
                 if Options.csv:
-                    data = meta.get_data() + [ convert_to_float(row[k]) for k in fields_report ] + get_wamo_data(w_obs)
+                    data = meta.get_data() + [ convert_to_float(r_obs[k]) for k in fields_report ] + get_wamo_data(w_obs)
                     csv_output(fields=fields)
                     csv_output(row=data)
         else:
@@ -432,8 +619,6 @@ def process_ades(fh: typing.TextIO, line1: str) -> dict:
                 data = meta.get_data() + [ convert_to_float(row[k]) for k in fields_report ]
                 csv_output(row=data)
 
-    return ades_obj
-
 
 
 def main():
@@ -452,6 +637,23 @@ def main():
     arg.add_argument("-J", "--json", action="store_true", help="use JSON output format")
     arg.add_argument("-O", "--overview", action="store_true", help="create overview of objects and observations")
     arg.add_argument("-D", "--sort-by-date", action="store_true", help="sort overview by observation date (minus 12h)")
+    arg.add_argument("--db", help="store reports and observations in SQLite database DB")
+    arg.add_argument("-j", "--jobs", type=int, default=Options.jobs, help=f"parallel jobs for reading reports, default {Options.jobs}")
+    arg.add_argument("--manifest", help="store parsed reports in SQLite database MANIFEST, parse only new or modified reports")
+    arg.add_argument("--manifest-hash", action="store_true", help="check content hash of reports with changed mtime")
+    arg.add_argument("--rebuild", action="store_true", help="rebuild MANIFEST, parse all reports")
+    arg.add_argument("--wamo-concurrency", type=int, default=WAMO_CONCURRENCY, help=f"max. parallel WAMO requests, default {WAMO_CONCURRENCY}")
+    arg.add_argument("--wamo-batch-size", type=int, default=WAMO_BATCH_SIZE, help=f"max. ids per WAMO request, default {WAMO_BATCH_SIZE}")
+    arg.add_argument("--wamo-cache", help="cache WAMO responses in SQLite database WAMO_CACHE")
+    arg.add_argument("--wamo-cache-ttl", help="TTLs of cached WAMO answers per status, e.g. pending=3600,queue=600,unknown=0,published=none")
+    arg.add_argument("--wamo-cache-refresh", action="store_true", help="ignore cached WAMO answers for this run, store new ones")
+    arg.add_argument("--wamo-rate", type=float, default=WAMO_RATE, help=f"max. WAMO requests per second, default {WAMO_RATE}")
+    arg.add_argument("--refresh", action="store_true", help="request WAMO status only for observations not yet published in DB, print changes")
+    arg.add_argument("--archive-cache", help="cache MPC archive index in ARCHIVE_CACHE (JSON)")
+    arg.add_argument("--archive-offline", action="store_true", help="use MPC archive index from ARCHIVE_CACHE only")
+    arg.add_argument("--mpec-cache", help="cache MPEC URLs in MPEC_CACHE (JSON)")
+    arg.add_argument("--record", help="record all HTTP requests to SQLite store RECORD")
+    arg.add_argument("--replay", help="replay HTTP requests from SQLite store REPLAY, no network access")
     args = arg.parse_args()
 
     verbose.set_prog(NAME)
@@ -467,6 +669,35 @@ def main():
     Options.overview    = args.overview
     Options.sort_by_date= args.sort_by_date
     Options.json        = args.json
+    Options.jobs        = args.jobs
+    if args.manifest:
+        Options.manifest = ReportManifest(args.manifest, args.manifest_hash)
+        if args.rebuild:
+            Options.manifest.clear()
+    elif args.rebuild:
+        error("--rebuild requires --manifest")
+    if args.db:
+        Options.db      = MPCObsDB(args.db)
+    Options.wamo_concurrency = args.wamo_concurrency
+    Options.wamo_rate   = args.wamo_rate
+    Options.wamo_batch_size = args.wamo_batch_size
+    if args.wamo_cache:
+        try:
+            ttls = parse_ttls(args.wamo_cache_ttl) if args.wamo_cache_ttl else None
+        except ValueError as e:
+            error(f"--wamo-cache-ttl: {e}")
+        Options.wamo_cache = WAMOCache(args.wamo_cache, ttls=ttls, refresh=args.wamo_cache_refresh)
+        set_wamo_cache(Options.wamo_cache)
+    if args.record or args.replay:
+        Options.replay = start_replay(args.record or args.replay, record=bool(args.record))
+    if args.archive_cache:
+        set_archive_cache(args.archive_cache, args.archive_offline)
+    if args.mpec_cache:
+        set_mpec_cache(args.mpec_cache)
+    if args.refresh:
+        if not Options.db:
+            error("--refresh requires --db")
+        Options.refresh = WAMORefresh(Options.db)
 
     if Options.sort_by_date:
         OverviewOutput.set_description1("Total observation dates:  ")
@@ -484,6 +715,7 @@ def main():
             retrieve_from_directory(dir)
         if os.path.isfile(dir):
             process_file(dir)
+    process_reports()
 
     if Options.overview:
         if Options.output:
@@ -502,6 +734,24 @@ def main():
     elif Options.json:
         JSONOutput.write(Options.output)
 
+    if Options.refresh:
+        # Don't mix with CSV/JSON/overview output to stdout
+        to_stdout = not Options.output and (Options.csv or Options.json or Options.overview)
+        Options.refresh.report(sys.stderr if to_stdout else sys.stdout)
+    if Options.db:
+        Options.db.close()
+    if Options.manifest:
+        verbose(Options.manifest.stats())
+        Options.manifest.close()
+    if Options.wamo_cache:
+        verbose(Options.wamo_cache.stats())
+        Options.wamo_cache.close()
+    if Options.replay:
+        verbose(Options.replay.stats())
+        Options.replay.close()
+    for line in ratelimit_stats() + http_stats():
+        verbose(line)
+
 
 
 if __name__ == "__main__":
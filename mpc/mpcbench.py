@@ -0,0 +1,446 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   python -m mpc.mpcbench [-n N] [-o baseline.json] [-b baseline.json] [component ...]
+#
+#   Generators for synthetic test data, deterministic for a given seed:
+#   gen_data80(n), gen_ades_psv(n), gen_wamo_json(n), gen_archive_html(), gen_pub_ids(archive, n)
+
+# ChangeLog
+# Version 0.1 / 2026-10-18
+#       Offline throughput benchmark suite for the mpc package with
+#       synthetic data generators and baseline comparison
+# Version 0.2 / 2026-10-18
+#       Added mpc.mpcconvert components
+# Version 0.3 / 2026-10-18
+#       Added archive_search, archive_search_pubs components
+# Version 0.4 / 2026-10-18
+#       Added archive_stream component, archive page parsed from streamed
+#       response
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# The following libs must be installed with pip
+import requests
+from icecream import ic
+# Disable debugging
+ic.disable()
+# Local modules
+from verbose           import verbose, warning, error
+from mpc.mpcdata80     import MPCData80, MPCData80Batch
+from mpc.mpcdesig      import pack_id, unpack_id, cache_clear
+from mpc.mpcdate       import parse_date
+from mpc.mpcwamo       import decode_wamo_json
+from mpc.mpcosarchive  import MPCOSArchive, STREAM_CHUNK
+from mpc.mpcparsecache import parse_ades
+from mpc.mpcconvert    import obs80_to_ades_psv, ades_to_80
+
+
+VERSION = "0.4 / 2026-10-18"
+AUTHOR  = "Martin Junius"
+NAME    = "mpcbench"
+
+SEED      = 4711
+TOLERANCE = 0.10            # throughput regression warning threshold vs. baseline
+
+
+
+### Synthetic data generators ###
+
+_HALF   = "ABCDEFGHJKLMNOPQRSTUVWXY"
+_SECOND = "ABCDEFGHJKLMNOPQRSTUVWXYZ"
+_B62    = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_CODES  = ["M49", "C51", "G96", "F51", "703", "I41", "T05"]
+_CATS   = "VWUq"
+
+
+def _gen_packed(rnd: random.Random, kind: str) -> str:
+    if kind == "numbered":
+        return pack_id(f"({rnd.randint(1, 700000)})")
+    if kind == "provisional":
+        cycle = rnd.randint(0, 400)
+        return pack_id(prov_id=f"{rnd.randint(2000, 2026)} {rnd.choice(_HALF)}{rnd.choice(_SECOND)}{cycle or ''}")
+    if kind == "comet":
+        if rnd.random() < 0.5:
+            return pack_id(f"{rnd.randint(1, 480)}P")
+        return pack_id(prov_id=f"{rnd.choice('CP')}/{rnd.randint(2000, 2026)} {rnd.choice(_HALF)}{rnd.randint(1, 20)}")
+    if kind == "satellite":
+        return f"{rnd.choice('JSUN')}{rnd.randint(1, 80):03d}S       "
+    # NEOCP tracklet, trkSub in columns 6-12
+    return "     " + "".join(rnd.choice(_B62) for i in range(7))
+
+
+def _gen_obs80(rnd: random.Random, packed: str, mjd_day: int=None) -> str:
+    y  = rnd.randint(2015, 2026)
+    mo = rnd.randint(1, 12)
+    d  = rnd.randint(1, 28)
+    date = f"{y:04d} {mo:02d} {d:02d}.{rnd.randint(0, 99999):05d} "
+    ra   = f"{rnd.randint(0, 23):02d} {rnd.randint(0, 59):02d} {rnd.uniform(0, 59.99):05.2f} "
+    dec  = f"{rnd.choice('+-')}{rnd.randint(0, 89):02d} {rnd.randint(0, 59):02d} {rnd.uniform(0, 59.9):04.1f} "
+    mag  = f"{rnd.uniform(12, 22):4.1f} " if rnd.random() < 0.95 else "     "
+    if rnd.random() < 0.6:
+        ref = f"E{rnd.choice(_HALF)}{rnd.randint(1, 150):03d}"
+    elif rnd.random() < 0.5:
+        ref = f"{rnd.randint(10000, 99999)}"
+    else:
+        ref = "     "
+    line = (packed + rnd.choice("  *") + " " + rnd.choice("CCB") + date + ra + dec + " " * 9 +
+            mag + rnd.choice("GVRco") + rnd.choice(_CATS) + ref + rnd.choice(_CODES))
+    assert len(line) == 80, line
+    return line
+
+
+_KINDS   = ["numbered", "provisional", "comet", "satellite", "neocp"]
+_WEIGHTS = [40, 35, 5, 2, 18]
+
+
+def gen_data80(n: int, seed: int=SEED) -> list:
+    """
+    Generate 80-column observation lines, mix of numbered, provisional, comet,
+    satellite and NEOCP tracklet designations, tracklets of 3-5 observations
+
+    :param n: number of lines
+    :type n: int
+    :param seed: random seed, defaults to SEED
+    :type seed: int, optional
+    :return: list of lines
+    :rtype: list
+    """
+    rnd = random.Random(seed)
+    lines = []
+    while len(lines) < n:
+        packed = _gen_packed(rnd, rnd.choices(_KINDS, _WEIGHTS)[0])
+        for i in range(rnd.randint(3, 5)):
+            lines.append(_gen_obs80(rnd, packed))
+    return lines[:n]
+
+
+def gen_ades_psv(n: int, seed: int=SEED) -> str:
+    """
+    Generate ADES PSV report
+
+    :param n: number of observations
+    :type n: int
+    :param seed: random seed, defaults to SEED
+    :type seed: int, optional
+    :return: report text
+    :rtype: str
+    """
+    rnd = random.Random(seed)
+    text = ("# version=2017\n# observatory\n! mpcCode M49\n# submitter\n! name M. Junius\n"
+            "# observers\n! name M. Junius\n# measurers\n! name M. Junius\n"
+            "# telescope\n! design reflector\n! aperture 0.25\n! fRatio 4.5\n! detector CMO\n"
+            "# software\n! astrometry Astrometrica\n! photometry Astrometrica\n")
+    fields = ["permID", "provID", "trkSub", "mode", "stn", "obsTime", "ra", "dec", "astCat", "mag", "band"]
+    widths = [7, 11, 8, 4, 4, 24, 11, 11, 6, 5, 4]
+    lines = [ "|".join(f.ljust(w) for f, w in zip(fields, widths)) ]
+    i = 0
+    while i < n:
+        permID = str(rnd.randint(1, 700000)) if rnd.random() < 0.4 else ""
+        provID = f"{rnd.randint(2000, 2026)} {rnd.choice(_HALF)}{rnd.choice(_SECOND)}{rnd.randint(1, 400)}" if not permID and rnd.random() < 0.5 else ""
+        trkSub = "".join(rnd.choice(_B62) for j in range(7))
+        for j in range(rnd.randint(3, 5)):
+            obsTime = f"{rnd.randint(2020, 2026)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T" + \
+                      f"{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}:{rnd.uniform(0, 59.9):04.1f}Z"
+            row = [permID, provID, trkSub, "CMO", "M49", obsTime, f"{rnd.uniform(0, 360):.5f}",
+                   f"{rnd.uniform(-90, 90):.5f}", "Gaia3", f"{rnd.uniform(12, 22):.1f}", "G"]
+            lines.append("|".join(v.ljust(w) for v, w in zip(row, widths)))
+            i += 1
+    return text + "\n".join(lines[:n + 1]) + "\n"
+
+
+def gen_wamo_json(n: int, seed: int=SEED) -> tuple:
+    """
+    Generate WAMO JSON response
+
+    :param n: number of observations
+    :type n: int
+    :param seed: random seed, defaults to SEED
+    :type seed: int, optional
+    :return: (response object, ids dict obsid -> 80-column data)
+    :rtype: tuple
+    """
+    rnd = random.Random(seed)
+    lines = gen_data80(n, seed)
+    found = []
+    ids = {}
+    for line in lines:
+        obsid = "".join(rnd.choice(_B62) for i in range(25))
+        ids[obsid] = line
+        (perm_id, prov_id) = unpack_id(line[0:12])
+        desig = perm_id.strip("()") or prov_id or "2024 AB12"
+        r = rnd.random()
+        ref = ""
+        if r < 0.6:
+            ref = f"MPEC {rnd.randint(2015, 2026)}-{rnd.choice(_HALF)}{rnd.randint(1, 150)}"
+            status = f"{line} ({obsid}) has been identified as {desig} and published in {ref}."
+        elif r < 0.8:
+            status = f"{line} ({obsid}) has been identified as {desig}, publication is pending."
+        elif r < 0.95:
+            desig = ""
+            status = f"{line} ({obsid}) is on the NEOCP/PCCP."
+        else:
+            desig = ""
+            status = f"The obsID '{obsid}' is in the 'neocp' processing queue."
+        found.append({ obsid: [ { "obsid": obsid, "obs80": line, "iau_desig": desig, "ref": ref,
+                                  "trksub": line[5:12].strip() if not desig else "",
+                                  "input_type": "obsid", "status_decoded": status,
+                                  "submission_id": f"2024-06-01T10:20:30.400_{obsid[:8]}" } ] })
+    return ({ "found": found, "not_found": [] }, ids)
+
+
+def gen_archive_html(year_from: int=1990, year_to: int=2026, seed: int=SEED) -> str:
+    """
+    Generate MPCArchive.html page, descending by date
+
+    :param year_from: first year, defaults to 1990
+    :type year_from: int, optional
+    :param year_to: last year, defaults to 2026
+    :type year_to: int, optional
+    :param seed: random seed, defaults to SEED
+    :type seed: int, optional
+    :return: HTML text
+    :rtype: str
+    """
+    rnd = random.Random(seed)
+    # Generate ascending, output descending
+    hi = { "MPC": 15000, "MPS": 1, "MPO": 1 }
+    years = []
+    for y in range(year_from, year_to + 1):
+        dates = []
+        for month in range(1, 13):
+            for day in (rnd.randint(1, 14), rnd.randint(15, 28)):
+                entries = []
+                for mpx, step in (("MPC", 800), ("MPS", 30000), ("MPO", 2000)):
+                    lo = hi[mpx]
+                    hi[mpx] = lo + rnd.randint(step // 2, step)
+                    date = f"{y:04d}{month:02d}{day:02d}"
+                    if y >= 1995:
+                        entries.append(f'<li><a href="/iau/ECS/MPCArchive/{y}/{mpx}_{date}.pdf"><i>{mpx}</i> {lo}-{hi[mpx] - 1}</a>')
+                    else:
+                        entries.append(f'<li><i>{mpx}</i> {lo}-{hi[mpx] - 1}')
+                dates.append((f"{y:04d}/{month:02d}/{day:02d}", entries))
+        years.append((y, dates))
+
+    out = ["<html>", "<head><title>MPC/MPO/MPS Archive</title></head>", "<body>",
+           "<h2>MPC/MPO/MPS Archive</h2>", "<!-- Main content block -->"]
+    for y, dates in reversed(years):
+        out.append(f"<h2>{y}</h2>")
+        out.append("<ul>")
+        for date, entries in reversed(dates):
+            out.append(f"<li>{date}")
+            out.append("<ul>")
+            out += reversed(entries)
+            out.append("</ul>")
+        out.append("</ul>")
+    out += ["<!-- Body postamble -->", "</body>", "</html>"]
+    return "\n".join(out) + "\n"
+
+
+
+### Components ###
+
+def gen_pub_ids(archive: MPCOSArchive, n: int, seed: int=SEED) -> list:
+    """
+    Generate publication ids within the ranges of the archive
+
+    :param archive: archive
+    :type archive: MPCOSArchive
+    :param n: number of ids
+    :type n: int
+    :param seed: random seed, defaults to SEED
+    :type seed: int, optional
+    :return: list of publication ids, e.g. "MPS 2145921"
+    :rtype: list
+    """
+    rnd = random.Random(seed)
+    ranges = { mpx: (min(item["lo"] for item in items), max(item["hi"] for item in items))
+               for mpx, items in archive.pub_dict.items() }
+    series = sorted(ranges.keys())
+    pubs = []
+    for i in range(n):
+        mpx = rnd.choice(series)
+        pubs.append(f"{mpx} {rnd.randint(*ranges[mpx])}")
+    return pubs
+
+
+def _bench_components(n: int, tmpdir: str) -> dict:
+    # name -> (benchmark function, number of records)
+    lines = gen_data80(n)
+    dates = [ line[15:32] for line in lines ]
+    packed = [ line[0:12] for line in lines ]
+    (wamo_response, wamo_ids) = gen_wamo_json(n)
+    html = gen_archive_html()
+    n_archive = html.count("<li><")
+    archive = MPCOSArchive(text=html)
+    pubs = gen_pub_ids(archive, n)
+    ades_file = os.path.join(tmpdir, "ades.txt")
+    with open(ades_file, "w") as f:
+        f.write(gen_ades_psv(n))
+    # Natural satellites are not converted to ADES
+    lines_ades = [ line for line in lines if line[4] != "S" ]
+    psv = list(obs80_to_ades_psv(lines_ades))
+
+    html_bytes = html.encode()
+
+    def archive_stream():
+        # Same as MPCOSArchive.url_get() with streamed response
+        r = requests.Response()
+        r.status_code = 200
+        r.encoding = "utf-8"
+        r.raw = io.BytesIO(html_bytes)
+        MPCOSArchive(lines=r.iter_lines(chunk_size=STREAM_CHUNK, decode_unicode=True))
+
+    def unpack_uncached():
+        cache_clear()
+        for p in packed:
+            unpack_id.__wrapped__(p)
+
+    def unpack_cached():
+        cache_clear()
+        for p in packed:
+            unpack_id(p)
+
+    return {
+        "MPCData80":        (lambda: [ MPCData80(line).to_dict() for line in lines ],   n),
+        "MPCData80.lazy":   (lambda: [ MPCData80(line) for line in lines ],             n),
+        "MPCData80Batch":   (lambda: MPCData80Batch(lines),                             n),
+        "unpack_id":        (unpack_uncached,                                           n),
+        "unpack_id.cached": (unpack_cached,                                             n),
+        "parse_date":       (lambda: [ parse_date(d) for d in dates ],                  n),
+        "wamo_json":        (lambda: decode_wamo_json(wamo_response, wamo_ids),         n),
+        "archive_html":     (lambda: MPCOSArchive(text=html),                           n_archive),
+        "archive_stream":   (archive_stream,                                            n_archive),
+        "archive_search":   (lambda: [ archive.search_pub(p) for p in pubs ],           n),
+        "archive_search_pubs": (lambda: archive.search_pubs(pubs),                      n),
+        "ades_psv":         (lambda: parse_ades(ades_file),                             n),
+        "convert_80_ades":  (lambda: list(obs80_to_ades_psv(lines_ades)),           len(lines_ades)),
+        "convert_ades_80":  (lambda: list(ades_to_80(psv)),                             len(lines_ades)),
+    }
+
+
+def run_benchmarks(n: int, components: list=None, repeat: int=3) -> dict:
+    """
+    Run benchmarks
+
+    :param n: number of records per component
+    :type n: int
+    :param components: list of component names, defaults to None = all
+    :type components: list, optional
+    :param repeat: number of timing runs, best is used, defaults to 3
+    :type repeat: int, optional
+    :return: dict component -> {"records", "seconds", "records_per_s", "peak_kb"}
+    :rtype: dict
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        bench = _bench_components(n, tmpdir)
+        for name, (func, records) in bench.items():
+            if components and name not in components:
+                continue
+            verbose(f"running {name}")
+            best = None
+            for i in range(repeat):
+                t0 = time.perf_counter()
+                func()
+                t = time.perf_counter() - t0
+                best = t if best is None else min(best, t)
+            # Separate run for peak memory, tracemalloc slows down execution
+            tracemalloc.start()
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[name] = { "records": records, "seconds": best,
+                              "records_per_s": records / best, "peak_kb": peak / 1024 }
+    return results
+
+
+def print_results(results: dict, baseline: dict=None):
+    """ Print results, compared to baseline if given """
+    regressions = 0
+    print(f"{'component':18s} {'records':>9s} {'records/s':>12s} {'peak KB':>10s}" + ("  vs. baseline" if baseline else ""))
+    for name, r in results.items():
+        line = f"{name:18s} {r['records']:9d} {r['records_per_s']:12.0f} {r['peak_kb']:10.0f}"
+        b = baseline.get(name) if baseline else None
+        if b:
+            delta = r["records_per_s"] / b["records_per_s"] - 1
+            line += f"  {delta * 100:+6.1f}%"
+            if delta < -TOLERANCE:
+                line += "  REGRESSION"
+                regressions += 1
+        print(line)
+    return regressions
+
+
+
+### Test run as a command line script ###
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Offline throughput benchmarks for the mpc package",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("-n", "--records", type=int, default=20000, help="number of records per component, default 20000")
+    arg.add_argument("-r", "--repeat", type=int, default=3, help="number of timing runs, default 3")
+    arg.add_argument("-o", "--output", help="save results as baseline JSON to OUTPUT")
+    arg.add_argument("-b", "--baseline", help="compare results with BASELINE JSON")
+    arg.add_argument("-l", "--list", action="store_true", help="list components")
+    arg.add_argument("component", nargs="*", help="run COMPONENT(s) only, default all")
+
+    args = arg.parse_args()
+
+    if args.verbose:
+        verbose.set_prog(NAME)
+        verbose.enable()
+    if args.debug:
+        ic.enable()
+
+    if args.list:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in _bench_components(10, tmpdir):
+                print(name)
+        return
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)["results"]
+
+    results = run_benchmarks(args.records, args.component, args.repeat)
+    regressions = print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({ "version": VERSION, "python": platform.python_version(), "records": args.records,
+                        "results": results }, f, indent=4)
+        verbose(f"baseline saved to {args.output}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from mpc.mpcconvert import ades_to_80, obs80_to_ades_psv
+#   for line in ades_to_80(fh): ...             ADES PSV -> MPC1992 80-column
+#   for line in obs80_to_ades_psv(fh): ...      MPC1992 80-column -> ADES PSV
+#
+# Both directions are generators, one line in, one line out, constant memory.
+# Columns 73-77 (publication reference) are not part of ADES submissions and
+# are left blank when converting to 80-column format, all other columns
+# survive a round trip 80-column -> ADES -> 80-column.
+#
+# See also
+#   https://birtwhistle.org.uk/Docs/ADESAstrometryParser/ConversiontoMPC1992format.html
+
+# ChangeLog
+# Version 0.1 / 2026-10-18
+#       Streaming converter ADES PSV <-> MPC1992 80-column format, using the
+#       mpc.mpcdesig codec and mpc.mpcdate date engine
+#       Band (column 71) converted also without magnitude
+
+import argparse
+import sys
+import time
+from datetime import date
+from functools import lru_cache
+
+# The following libs must be installed with pip
+from icecream import ic
+# Disable debugging
+ic.disable()
+# Local modules
+from verbose       import verbose, warning, error
+from mpc.mpcdata80 import MPCData80, mpc_catalog_codes
+import mpc.mpcdesig as mpcdesig
+import mpc.mpcdate as mpcdate
+
+
+VERSION = "0.1 / 2026-10-18"
+AUTHOR  = "Martin Junius"
+NAME    = "mpcconvert"
+
+
+# ADES astCat -> catalog code, column 72
+ades_catalog_codes = {
+    "UCAC4":    "q",
+    "UCAC5":    "Y",
+    "PPMXL":    "t",
+    "NOMAD":    "v",
+    "USNOB1":   "o",
+    "2MASS":    "L",
+    "URAT1":    "S",
+    "CMC15":    "Q",
+    "Tyc2":     "g",
+    "Hip2":     "x",
+    "SDSS8":    "n",
+    "SDSS7":    "N",
+    "Gaia1":    "U",
+    "Gaia2":    "V",
+    "Gaia3":    "W",
+    "Gaia3E":   "X",
+    "Gaia_Int": "3",
+    "ATLAS2":   "Z",
+    "PS1_DR1":  "1",
+    "PS1_DR2":  "2",
+    "GaiaFPR":  "6",
+}
+_CATALOG_ADES = { v: k for k, v in ades_catalog_codes.items() }
+
+# ADES mode -> note 2, column 15
+ades_mode_codes = {
+    "CCD": "C",
+    "CMO": "B",
+    "PHO": "P",
+    "VID": "n",
+    "ENC": "e",
+    "MIC": "M",
+    "MER": "T",
+    "OCC": "E",
+}
+_NOTE2_ADES = { v: k for k, v in ades_mode_codes.items() }
+
+# Default fields and column widths for PSV output
+ADES_FIELDS = ("permID", "provID", "trkSub", "mode", "stn", "obsTime",
+               "ra", "dec", "astCat", "mag", "band", "disc", "notes")
+ADES_WIDTHS = { "permID": 7, "provID": 11, "trkSub": 8, "mode": 4, "stn": 4, "obsTime": 25,
+                "ra": 11, "dec": 11, "astCat": 8, "mag": 5, "band": 4, "disc": 4, "notes": 5 }
+
+
+
+### ADES -> 80-column ###
+
+def _sexagesimal(units: int, p: int) -> tuple:
+    # units of 10^-p seconds -> (deg/h, min, sec, fraction)
+    (s, frac) = divmod(units, 10 ** p)
+    (m, s) = divmod(s, 60)
+    (d, m) = divmod(m, 60)
+    return (d, m, s, frac)
+
+
+def _decimals(s: str) -> int:
+    i = s.find(".")
+    return len(s) - i - 1 if i >= 0 else 0
+
+
+def format_ra(ra: str) -> str:
+    """
+    Format ADES ra (decimal degrees) as 80-column RA, columns 33-44
+
+    :param ra: RA in degrees, number of decimals selects precision
+    :type ra: str
+    :return: HH MM SS.ss or HH MM SS.sss (> 5 decimals)
+    :rtype: str
+    """
+    p = 2 if _decimals(ra) <= 5 else 3
+    units = round(float(ra) / 15 * 3600 * 10 ** p) % (24 * 3600 * 10 ** p)
+    (h, m, s, frac) = _sexagesimal(units, p)
+    return f"{h:02d} {m:02d} {s:02d}.{frac:0{p}d}".ljust(12)
+
+
+def format_dec(dec: str) -> str:
+    """
+    Format ADES dec (decimal degrees) as 80-column Decl., columns 45-56
+
+    :param dec: Decl. in degrees, number of decimals selects precision
+    :type dec: str
+    :return: sDD MM SS.s or sDD MM SS.ss (> 5 decimals)
+    :rtype: str
+    """
+    p = 1 if _decimals(dec) <= 5 else 2
+    v = float(dec)
+    units = round(abs(v) * 3600 * 10 ** p)
+    (d, m, s, frac) = _sexagesimal(units, p)
+    sign = "-" if v < 0 and units else "+"
+    return f"{sign}{d:02d} {m:02d} {s:02d}.{frac:0{p}d}".ljust(12)
+
+
+def format_date80(obs_time: str) -> str:
+    """
+    Format ADES obsTime as 80-column date, columns 16-32
+
+    :param obs_time: YYYY-MM-DDThh:mm:ss[.sss]Z
+    :type obs_time: str
+    :raises ValueError: invalid obsTime
+    :return: YYYY MM DD.ddddd (up to 0.1 s) or YYYY MM DD.dddddd
+    :rtype: str
+    """
+    if obs_time[4:5] != "-" or obs_time[7:8] != "-" or obs_time[10:11] != "T":
+        raise ValueError(f"invalid obsTime {obs_time!r}")
+    secs = obs_time[11:].rstrip("Z")
+    (h, m, s) = secs.split(":")
+    # Same precision as the conversion from 80-column in obs80_to_ades()
+    digits = 6 if _decimals(s) >= 2 else 5
+    scale = 10 ** digits
+    units = round((int(h) * 3600 + int(m) * 60 + float(s)) * scale / 86400)
+    ymd = obs_time[0:10]
+    if units >= scale:
+        # Rounded up to the next day
+        units -= scale
+        ymd = date.fromordinal(date.fromisoformat(ymd).toordinal() + 1).isoformat()
+    return f"{ymd[0:4]} {ymd[5:7]} {ymd[8:10]}.{units:0{digits}d}".ljust(17)
+
+
+# Designations repeat within a report, the same as for unpack_id()
+_pack_id = lru_cache(maxsize=mpcdesig.CACHE_SIZE)(mpcdesig.pack_id)
+
+
+def _ades_packed(obs: dict) -> str:
+    perm_id = obs.get("permID", "")
+    prov_id = obs.get("provID", "")
+    if perm_id.isdigit():
+        perm_id = "(" + perm_id + ")"
+    if perm_id or prov_id:
+        return _pack_id(perm_id, prov_id)
+    trk_sub = obs.get("trkSub", "")
+    if not trk_sub or len(trk_sub) > 7:
+        raise ValueError(f"can't pack trkSub {trk_sub!r}")
+    return "     " + trk_sub.ljust(7)
+
+
+def ades_to_obs80(obs: dict) -> str:
+    """
+    Convert ADES observation to 80-column line
+
+    :param obs: ADES fields, at least permID/provID/trkSub, stn, obsTime, ra, dec
+    :type obs: dict
+    :raises ValueError: observation can't be converted
+    :return: 80-column line
+    :rtype: str
+    """
+    try:
+        mag = obs.get("mag", "")
+        line = (_ades_packed(obs) +
+                (obs.get("disc") or " ")[0] +
+                (obs.get("notes") or " ")[0] +
+                ades_mode_codes.get(obs.get("mode", ""), " ") +
+                format_date80(obs["obsTime"]) +
+                format_ra(obs["ra"]) +
+                format_dec(obs["dec"]) +
+                " " * 9 +
+                (f"{float(mag):4.1f} " if mag and len(mag) > 5 else mag.ljust(5)) +
+                (obs.get("band") or " ")[0] +
+                ades_catalog_codes.get(obs.get("astCat", ""), " ") +
+                " " * 5 +
+                obs["stn"].ljust(3))
+    except KeyError as e:
+        raise ValueError(f"missing ADES field {e}")
+    if len(line) != 80:
+        raise ValueError(f"invalid 80-column line {line!r}")
+    return line
+
+
+def iter_ades(lines):
+    """
+    Iterate over observations of ADES PSV data
+
+    :param lines: iterable of lines, including # / ! header
+    :yield: dict field -> value, white space removed
+    """
+    fields = None
+    for line in lines:
+        if line.startswith("#") or line.startswith("!"):
+            continue
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        values = [ v.strip() for v in line.split("|") ]
+        if fields is None:
+            fields = values
+            continue
+        yield dict(zip(fields, values))
+
+
+def ades_to_80(lines):
+    """
+    Streaming conversion ADES PSV -> 80-column, observations which can't be
+    converted are skipped with a warning
+
+    :param lines: iterable of ADES PSV lines
+    :yield: 80-column lines, without newline
+    """
+    for obs in iter_ades(lines):
+        try:
+            yield ades_to_obs80(obs)
+        except ValueError as e:
+            warning(f"skipping observation: {e}")
+
+
+
+### 80-column -> ADES ###
+
+def _to_degrees(s: str, scale: int) -> float:
+    # "HH MM SS.ss" / "sDD MM SS.s" -> decimal degrees
+    (d, m, sec) = s.split()
+    v = abs(int(d)) + int(m) / 60 + float(sec) / 3600
+    return scale * (-v if d[0] == "-" else v)
+
+
+def obs80_to_ades(line: str) -> dict:
+    """
+    Convert 80-column line to ADES observation
+
+    :param line: 80-column line
+    :type line: str
+    :raises ValueError: line can't be converted
+    :return: dict ADES field -> value
+    :rtype: dict
+    """
+    if len(line) < 80:
+        raise ValueError(f"invalid 80-column line {line!r}")
+    rec = MPCData80(line)
+    perm_id = rec.permId
+    prov_id = rec.provId
+    trk_sub = "" if perm_id or prov_id else line[5:12].strip()
+    if not (perm_id or prov_id or trk_sub):
+        raise ValueError(f"no designation in {line!r}")
+
+    date80 = line[15:32]
+    frac = mpcdate.split_date80(date80)
+    if not frac:
+        raise ValueError(f"invalid date {date80!r}")
+    ra = line[32:44].strip()
+    dec = line[44:56].strip()
+    try:
+        ra_deg  = _to_degrees(ra, 15)
+        dec_deg = _to_degrees(dec, 1)
+    except ValueError:
+        raise ValueError(f"invalid RA/Decl. {ra!r} {dec!r}")
+    cat = line[71]
+
+    return {
+        "permID":  perm_id.strip("()"),
+        "provID":  prov_id,
+        "trkSub":  trk_sub,
+        "mode":    _NOTE2_ADES.get(rec.note2, "UNK"),
+        "stn":     rec.code,
+        # Precision such that the conversion back yields the same digits
+        "obsTime": mpcdate.format_ades(date80, max(1, len(frac[1]) - 4)),
+        "ra":      f"{ra_deg:.{max(5, _decimals(ra) + 3)}f}",
+        "dec":     f"{dec_deg:.{max(5, _decimals(dec) + 4)}f}",
+        "astCat":  _CATALOG_ADES.get(cat, mpc_catalog_codes.get(cat, "")),
+        "mag":     rec.mag,
+        "band":    rec.band.strip(),
+        "disc":    rec.discovery,
+        "notes":   rec.note1.strip(),
+    }
+
+
+def format_psv(values: dict, fields=ADES_FIELDS) -> str:
+    """ Format PSV line, values or field names padded to ADES_WIDTHS """
+    return "|".join(values.get(f, "").ljust(ADES_WIDTHS.get(f, 0)) for f in fields)
+
+
+def obs80_to_ades_psv(lines, header: dict=None, fields=ADES_FIELDS):
+    """
+    Streaming conversion 80-column -> ADES PSV, lines which can't be converted
+    are skipped with a warning
+
+    :param lines: iterable of 80-column lines
+    :param header: ADES header, dict e.g. { "observatory": { "mpcCode": "M49" } }, defaults to None
+    :type header: dict, optional
+    :param fields: PSV fields, defaults to ADES_FIELDS
+    :yield: ADES PSV lines, without newline
+    """
+    yield "# version=2017"
+    if header:
+        for key1, values in header.items():
+            yield f"# {key1}"
+            for key2, v in values.items():
+                yield f"! {key2} {v}"
+    yield format_psv({ f: f for f in fields }, fields)
+    widths = [ (f, ADES_WIDTHS.get(f, 0)) for f in fields ]
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        try:
+            obs = obs80_to_ades(line)
+            yield "|".join(obs.get(f, "").ljust(w) for f, w in widths)
+        except ValueError as e:
+            warning(f"skipping line: {e}")
+
+
+
+def benchmark(n: int=1000000):
+    """ Throughput of both directions, synthetic data from mpc.mpcbench """
+    from itertools import islice, cycle, chain
+    from mpc.mpcbench import gen_data80
+
+    # Repeat a block of generated lines to keep memory constant,
+    # natural satellites have no ADES designation here
+    block = [ line for line in gen_data80(min(n, 50000)) if line[4] != "S" ]
+
+    t0 = time.perf_counter()
+    psv = 0
+    for line in obs80_to_ades_psv(islice(cycle(block), n)):
+        psv += 1
+    t1 = time.perf_counter()
+    psv_block = list(obs80_to_ades_psv(block))
+    (psv_header, psv_rows) = (psv_block[0:2], psv_block[2:])
+    t2 = time.perf_counter()
+    obs80 = 0
+    for line in ades_to_80(chain(psv_header, islice(cycle(psv_rows), n))):
+        obs80 += 1
+    t3 = time.perf_counter()
+
+    print(f"{n} observations")
+    print(f"80-column -> ADES {t1 - t0:8.3f} s  {n / (t1 - t0):12.0f} /s")
+    print(f"ADES -> 80-column {t3 - t2:8.3f} s  {n / (t3 - t2):12.0f} /s")
+
+
+
+def _is_ades(line1: str) -> bool:
+    return line1.strip() == "# version=2017"
+
+
+### Test run as a command line script ###
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Convert ADES PSV <-> MPC1992 80-column format",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("-o", "--output", help="write converted data to OUTPUT, default stdout")
+    arg.add_argument("-c", "--code", help="observatory code for ADES header")
+    arg.add_argument("-B", "--benchmark", action="store_true", help="run benchmark")
+    arg.add_argument("-n", "--records", type=int, default=1000000, help="number of observations for benchmark, default 1000000")
+    arg.add_argument("file", nargs="*", help="ADES PSV or 80-column file, format detected from first line")
+
+    args = arg.parse_args()
+
+    if args.verbose:
+        verbose.set_prog(NAME)
+        verbose.enable()
+    if args.debug:
+        ic.enable()
+
+    if args.benchmark:
+        benchmark(args.records)
+        return
+
+    out = open(args.output, "w", newline="\n") if args.output else sys.stdout
+    header = { "observatory": { "mpcCode": args.code } } if args.code else None
+    for file in args.file:
+        with open(file, "r") as fh:
+            line1 = fh.readline()
+            fh.seek(0)
+            if _is_ades(line1):
+                verbose(f"{file}: ADES -> 80-column")
+                converted = ades_to_80(fh)
+            else:
+                verbose(f"{file}: 80-column -> ADES")
+                converted = obs80_to_ades_psv(fh, header)
+            for line in converted:
+                out.write(line + "\n")
+    if args.output:
+        out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -55,11 +55,31 @@
 #       Bumped version number to 1.0
 # Version 1.1 / 2024-11-14
 #       Added parameter type hints to functions, format datetime ADES-like
+# Version 1.2 / 2026-10-18
+#       Added MPCData80Batch, columnar batch parser for many lines at once,
+#       new -f --file and -B --benchmark options
+#       Added MPCData80Reader, memory-mapped streaming reader with filters for
+#       observatory code and date range, new -S --stream, -c --code,
+#       --date-from, --date-to options
+#       Designation unpacking moved to mpc.mpcdesig (cached, table-driven)
+#       MPCData80 is now a lazy, __slots__-based read-only Mapping, fields are
+#       decoded on first access, get_obj() / to_dict() return a real dict
+#       Date parsing moved to mpc.mpcdate (no regex, MJD), new mjd property
+#       Added parse_file_parallel(), splits large files into line-aligned chunks
+#       parsed in a process pool, new -j --jobs option
+#       Benchmark verifies all batch columns, including mjd, ra, dec, mag
 
 import argparse
-import re
 import json
-from datetime import datetime, timedelta
+import math
+import mmap
+import os
+import time
+import tracemalloc
+from array import array
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 
 # The following libs must be installed with pip
 from icecream import ic
@@ -67,9 +87,11 @@ from icecream import ic
 ic.disable()
 # Local modules
 from verbose import verbose
+import mpc.mpcdesig as mpcdesig
+import mpc.mpcdate as mpcdate
 
 
-VERSION = "1.1 / 2024-11-14"
+VERSION = "1.2 / 2026-10-18"
 AUTHOR  = "Martin Junius"
 NAME    = "mpcdata80"
 
@@ -140,10 +162,42 @@ mpc_catalog_codes = {
 
 
 
-class MPCData80:
+class MPCData80(Mapping):
+    """
+    MPC 80-column observation record
+
+    Only the raw line is stored, fields are decoded on first access, the
+    expensive ones (designation, dates, reference) are cached in slots.
+    Read-only dict-like access with the same keys as before, e.g. obj["date"].
+    """
+
+    #    Columns     Format   Use
+    #     1 -  5       A5     Packed minor planet number
+    #     6 - 12       A7     Packed provisional designation, or a temporary designation
+    #    13            A1     Discovery asterisk
+    #    14            A1     Note 1                C=CCD, B=CMOS, V=Roving Observer, X=replaced
+    #    15            A1     Note 2                leer, K=stacked, 0=?, 1=?
+    #    16 - 32              Date of observation
+    #    33 - 44              Observed RA (J2000.0)
+    #    45 - 56              Observed Decl. (J2000.0)
+    #    57 - 65       9X     Must be blank
+    #    66 - 71    F5.2,A1   Observed magnitude and band
+    #                            (or nuclear/total flag for comets)
+    #    72            A1     Catalog code
+    #    73 - 77       A5     Publication reference
+    #    78 - 80       A3     Observatory code
+
+    KEYS = ("data", "permId", "provId", "discovery", "note1", "note2",
+            "date", "date_minus12", "ra", "dec", "mag", "band", "catalog", "reference", "code")
+    _KEYS_SET = frozenset(KEYS)
+
+    __slots__ = ("data80", "_ids", "_dates", "_reference")
+
     def __init__(self, data: str):
-        self.data80 = data
-        self.parse_data()
+        self.data80     = data
+        self._ids       = None
+        self._dates     = None
+        self._reference = None
 
 
     def get_col(self, col1: int, col2: int=0):
@@ -153,215 +207,517 @@ class MPCData80:
             return self.data80[col1 - 1]
 
 
+    # Mapping interface
+    def __getitem__(self, key: str):
+        if key not in MPCData80._KEYS_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(MPCData80.KEYS)
+
+    def __len__(self):
+        return len(MPCData80.KEYS)
+
+    def __repr__(self):
+        return f"MPCData80({self.data80!r})"
+
+
+    # Fields
+    @property
+    def data(self):
+        return self.data80
+
+    @property
+    def permId(self):
+        return self._get_ids()[0]
+
+    @property
+    def provId(self):
+        return self._get_ids()[1]
+
+    @property
+    def discovery(self):
+        return self.get_col(13).strip()
+
+    @property
+    def note1(self):
+        return self.get_col(14)
+
+    @property
+    def note2(self):
+        return self.get_col(15)
+
+    @property
+    def date(self):
+        return self._get_dates()[0]
+
+    @property
+    def date_minus12(self):
+        return self._get_dates()[1]
+
+    @property
+    def ra(self):
+        return self.get_col(33, 44).strip()
+
+    @property
+    def dec(self):
+        return self.get_col(45, 56).strip()
+
+    @property
+    def mag(self):
+        return self.get_col(66, 70).strip()
+
+    @property
+    def band(self):
+        return self.get_col(71)
+
+    @property
+    def catalog(self):
+        cat = self.get_col(72)
+        return mpc_catalog_codes[cat] if cat != " " else ""
+
+    @property
+    def reference(self):
+        if self._reference is None:
+            year = self.get_col(16, 19)     # FIXME: quick hack to get the MPEC year, is this really correct?
+            ref = MPCData80.unpack_reference(self.get_col(73, 77), year)
+            self._reference = ref if ref != "     " else ""
+        return self._reference
+
+    @property
+    def code(self):
+        return self.get_col(78, 80)
+
+
+    def _get_ids(self):
+        if self._ids is None:
+            self._ids = MPCData80.unpack_id(self.get_col(1, 12))
+        return self._ids
+
+    def _get_dates(self):
+        if self._dates is None:
+            self._dates = self.parse_date(self.get_col(16, 32))
+        return self._dates
+
+
     def parse_data(self):
-        self.obj = {}
-        self.obj["data"] = self.data80
-
-        #    Columns     Format   Use
-        #     1 -  5       A5     Packed minor planet number
-        #     6 - 12       A7     Packed provisional designation, or a temporary designation
-        #    13            A1     Discovery asterisk
-        #    14            A1     Note 1
-        #    15            A1     Note 2
-        #    16 - 32              Date of observation
-        #    33 - 44              Observed RA (J2000.0)
-        #    45 - 56              Observed Decl. (J2000.0)
-        #    57 - 65       9X     Must be blank
-        #    66 - 71    F5.2,A1   Observed magnitude and band
-        #                            (or nuclear/total flag for comets)
-        #    72 - 77       X      Must be blank
-        #    78 - 80       A3     Observatory code
-
-        packed_id      = self.get_col(1, 12)
-        discovery      = self.get_col(13)
-        note1          = self.get_col(14)        # C=CCD, B=CMOS, V=Roving Observer, X=replaced
-        note2          = self.get_col(15)        # leer, K=stacked, 0=?, 1=?
-        date           = self.get_col(16, 32)
-        ra             = self.get_col(33, 44)
-        dec            = self.get_col(45, 56)
-        #blank                       (57, 65)
-        mag            = self.get_col(66, 70)
-        band           = self.get_col(71)
-        cat            = self.get_col(72)        # catalog codes
-        packed_ref     = self.get_col(73, 77)    # publication reference
-        code           = self.get_col(78, 80)
-
-        ic(packed_id, discovery, note1, note2, date, ra, dec, mag, band, cat, packed_ref, code)
-
-        (perm_id, prov_id) = MPCData80.unpack_id(packed_id)
-
-        year = date[0:4]                # FIXME: quick hack to get the MPEC year, is this really correct?
-        ref = MPCData80.unpack_reference(packed_ref, year)
-        ic(perm_id, prov_id, ref)
-
-        self.obj["permId"] = perm_id
-        self.obj["provId"] = prov_id
-        self.obj["discovery"] = discovery.strip()
-        self.obj["note1"] = note1
-        self.obj["note2"] = note2
-        (self.obj["date"], 
-         self.obj["date_minus12"]) = self.parse_date(date)
-        self.obj["ra"] = ra.strip()
-        self.obj["dec"] = dec.strip()
-        self.obj["mag"] = mag.strip()
-        self.obj["band"] = band
-        self.obj["catalog"] = mpc_catalog_codes[cat] if cat != " " else ""
-        self.obj["reference"] = ref if ref != "     " else ""
-        self.obj["code"] = code
+        """ Decode all fields at once """
+        for key in MPCData80.KEYS:
+            self[key]
+
+
+    @property
+    def obj(self):
+        return self.to_dict()
 
 
     def parse_date(self, date: str):
-        m = re.search(r'^(\d\d\d\d) (\d\d) (\d\d)\.(\d+)', date)
-        if m:
-            ic(m.groups())
-            dt = datetime(int(m.group(1)), int(m.group(2)), int(m.group(3))) + timedelta(days=float("0."+m.group(4)))
-            dt_minus12 = dt - timedelta(hours=12)
-            #FIXME: use string representation as in ADES format
-            # date = dt.strftime("%Y-%m-%d %H:%M:%S.%f")
-            date_iso = dt.isoformat(timespec="microseconds")
-            date_ades = self._isoformat_ADES(dt)
-            date_minus12 = str(dt_minus12.date())
-            ic(dt, dt_minus12, date_iso, date_ades, date_minus12)
-            return(date_ades, date_minus12)
-        else:
-            return (date, "")
+        """ Date columns 16-32 -> (ADES date string, minus 12h date), see mpc.mpcdate """
+        return mpcdate.parse_date(date)
 
     def _isoformat_ADES(self, dt: datetime, precision: int=1):
         """Format datetime as ADES-like / ISO-like string, ROUNDING dt.microsecond to required precision"""
-        # Adapted from https://gist.github.com/jarek/354423854a7cc20b1e91
-        frac = dt.microsecond / 1e6
-        rounded = round(frac, precision)
-
-        if rounded < 1:
-            # format the number to have the required amount of decimal digits,
-            # this is important in case the rounded number is 0
-            frac_s = '{:.{prec}f}'.format(rounded, prec=precision)[2:]
-        else:
-            # round up by adding a second to the datetime
-            dt += timedelta(seconds=1)
-            frac_s = '0' * precision
+        return mpcdate._isoformat_ADES(dt, precision)
 
-        # ADES example 2024-10-04T22:05:19.6Z
-        return dt.strftime("%Y-%m-%dT%H:%M:%S.") + frac_s + "Z"
+    @property
+    def mjd(self):
+        """ Observation date as MJD """
+        return mpcdate.date80_to_mjd(self.get_col(16, 32))
 
 
     def get_json(self, indent: int=4):
-        return json.dumps(self.obj, indent=indent)
+        return json.dumps(self.to_dict(), indent=indent)
 
     def get_obj(self):
-        return self.obj
+        """ Get observation record as dict, same as to_dict() """
+        return self.to_dict()
+
+    def to_dict(self) -> dict:
+        """ Get observation record as a real dict """
+        return { key: self[key] for key in MPCData80.KEYS }
     
 
+    # Designation codec, see mpc.mpcdesig
     def decode_single(c: str):
-        v = ord(c)
-        if v >= ord("0"):
-            if v >= ord("A"):
-                if v >= ord("a"):
-                    return v - ord("a") + 10 + 26
-                return v - ord("A") + 10
-            return v - ord("0")
-        return 0
-    
-    def decode_base62(s: str): 
-        """ Input s = ~XXXX """
-        return ( ( (  MPCData80.decode_single(s[1]) * 62 
-                    + MPCData80.decode_single(s[2])      ) * 62 
-                    + MPCData80.decode_single(s[3])             ) * 62
-                    + MPCData80.decode_single(s[4])                    )
+        return mpcdesig.decode_single(c)
 
+    def decode_base62(s: str):
+        """ Input s = ~XXXX """
+        return mpcdesig.decode_base62(s)
 
-    # Below adapted from https://github.com/IAU-ADES/ADES-Master/blob/master/Python/bin/packUtil.py
     def unpack_reference(packedref, year: str):
-        if packedref[0] == "E":                                     # Temporary MPEC
-            packedref = "MPEC " + year + "-" + packedref[1] + str( "{:02d}".format(int(packedref[2:])) )
-        elif packedref[0] in '0123456789':                          # MPC case A
-            packedref = "MPC  " + str(int(packedref))               #   <5-digit number>
-        elif packedref[0] == '@':                                   # MPC case B
-            packedref = "MPC  " + str(100000 + int(packedref[1:]))  #   @<4-digit number>
-        elif packedref[0] == '#':                                   # MPC case C
-            n = 110000 + MPCData80.decode_base62(packedref)         #   ~<4-digit radix 62>
-            packedref = "MPC  " + str(n)
-        elif packedref[0] in 'abcdefghijklmnopqrstuvwxyz':          # MPS case D
-            n = int(packedref[1:]) + 10000*'abcdefghijklmnopqrstuvwxyz'.index(packedref[0])
-            packedref = "MPS  " + str(n)                            #   <letter + 4-digit base 10>
-        elif packedref[0] == '~':                                   # MPS case E
-            n = 260000 + MPCData80.decode_base62(packedref)         #   ~<4-digit radix 62>
-            packedref = "MPS  " + str(n)
-        # Case F, G not handled
-        return packedref
-    
+        return mpcdesig.unpack_reference(packedref, year)
 
     def unpack_id(packed: str):
-        perm_id = ""
-        prov_id = ""
-
-        ic(packed)
-        # Regex #1
-        # Minor planet
-        m = re.search(r'^(?: {5}|([0-9A-Za-z])(\d{4})|(~[0-9A-Za-z]{4}))' +
-        #                         ^(1)         ^(2)    ^(3)
-                      r'(?: {7}|([I-K])(\d{2})([A-HJ-Y])([a-zA-Z0-9])(\d)(?:([A-HJ-Z])|0))$', packed)
-        #                        ^(4)   ^(5)   ^(6)      ^(7)         ^(8)   ^(9)
-        if m:
-            ic("match regex #1")
-            ic(m, m.groups())
-            # permId
-            if m.group(1) or m.group(3):
-                if m.group(1):
-                    n = int(m.group(2)) + 10000 * MPCData80.decode_single(m.group(1))
-                if m.group(3):
-                    n = 620000 + MPCData80.decode_base62(m.group(3))
-                if n:
-                    perm_id = "(" + str(n) + ")"
-            # provId
-            if m.group(4):
-                y = MPCData80.decode_single(m.group(4)) * 100 + int(m.group(5))
-                y = "{0:0d}".format(y)
-                n = MPCData80.decode_single(m.group(7)) * 10 + int(m.group(8))
-                ns = str(n) if n>0 else ""
-                if m.group(9):  # normal asteroid provid
-                    prov_id =  y + ' ' + m.group(6) + m.group(9) + ns
-                else:           # comet ID -- use A/
-                    prov_id =  'A/' + y + ' ' + m.group(6) + ns
-    
-        # Regex #2
-        # Comets
-        m = re.search(r'^(?: {4}|(\d{4}))([APCDXI])' +
-        #                         ^(1)    ^(2)
-        ## regex fixed, 7 spaces are also an option
-        #              r'(?:([0-9A-Za-z])(\d{2})([A-HJ-Y])([a-zA-Z0-9])(\d)(?:0|([A-Z])|([a-z])))$', packed)
-                      r'(?: {7}|([0-9A-Za-z])(\d{2})([A-HJ-Y])([a-zA-Z0-9])(\d)(?:0|([A-Z])|([a-z])))$', packed)
-        #                   ^(3)         ^(4)   ^(5)      ^(6)         ^(7)     ^(8)    ^(9)
-        if m:
-            ic("match regex #2")
-            ic(m, m.groups())
-            type = m.group(2)
-            if m.group(1):
-                n = int(m.group(1))
-                perm_id = str(n) + type
-                # now check for fragments
-                if m.group(9):
-                    perm_id = perm_id + '-' + m.group(9).upper()
-                ##FIXME: regex doesn't contain a group 11
-                # if m.group(11):
-                #     frag = (m.group(10) + m.group(11)).strip().upper()
-                # perm_id = perm_id + '-' + frag
-
-            if m.group(3):
-                y = MPCData80.decode_single(m.group(3)) * 100 + int(m.group(4))
-                y = "{0:0d}".format(y)
-                n = MPCData80.decode_single(m.group(6)) * 10 + int(m.group(7))
-                ns = str(n) if n>0 else ""
-                extra = ''
-                if m.group(8): # m.group(8) changes nothing 
-                    extra = m.group(8) # adds order
-                frag = ''
-                if m.group(9): # fragment letter
-                    frag = '-' + m.group(9).upper()
-
-                prov_id =  m.group(2) + '/' + y + ' ' + m.group(5) + extra + ns + frag
-
-        return (perm_id, prov_id)
+        return mpcdesig.unpack_id(packed)
+
+    def pack_id(perm_id: str="", prov_id: str=""):
+        return mpcdesig.pack_id(perm_id, prov_id)
+
+
+
+
+class MPCData80Batch:
+    """ Columnar batch parser for MPC 80-column data, many lines at once """
+
+    def __init__(self, data=None):
+        # Parallel columns, index i corresponds to i-th observation line
+        self.data    = []               # raw 80-column lines
+        self.packed  = []               # packed id, columns 1-12
+        self.permId  = []
+        self.provId  = []
+        self.mjd     = array("d")       # observation date as MJD, NaN if not parseable
+        self.ra      = array("d")       # RA in decimal degrees
+        self.dec     = array("d")       # DEC in decimal degrees
+        self.mag     = array("d")       # magnitude, NaN if blank
+        self.band    = []
+        self.catalog = []               # catalog name, same as MPCData80.get_obj()
+        self.code    = []               # observatory code
+
+        # The same designations repeat many times in a file
+        self._id_cache   = {}
+
+        if data:
+            self.parse_many(data)
+
+
+    def from_file(file: str):
+        """ Create batch from file with 80-column data """
+        with open(file, "rb") as f:
+            return MPCData80Batch(f.read())
+
+
+    def __len__(self):
+        return len(self.data)
+
+
+    def parse_many(self, data):
+        """ Parse str or bytes buffer, or iterable of lines """
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data).decode("latin-1")
+        if isinstance(data, str):
+            data = data.splitlines()
+
+        id_cache = self._id_cache
+        nan = math.nan
+        date80_to_mjd = mpcdate.date80_to_mjd
+        for line in data:
+            line = line.rstrip("\r\n")
+            if not line.strip():
+                continue
+            data80 = line if len(line) >= 80 else line.ljust(80)
+
+            packed = data80[0:12]
+            ids = id_cache.get(packed)
+            if ids is None:
+                ids = id_cache[packed] = MPCData80.unpack_id(packed)
+            mag = data80[65:70].strip()
+            cat = data80[71]
+
+            self.data.append(line)
+            self.packed.append(packed)
+            self.permId.append(ids[0])
+            self.provId.append(ids[1])
+            self.mjd.append(date80_to_mjd(data80[15:32]))
+            self.ra.append(15 * MPCData80Batch._parse_sexagesimal(data80[32:44]))
+            self.dec.append(MPCData80Batch._parse_sexagesimal(data80[44:56]))
+            self.mag.append(float(mag) if mag else nan)
+            self.band.append(data80[70])
+            self.catalog.append(mpc_catalog_codes[cat] if cat != " " else "")
+            self.code.append(data80[77:80])
+
+
+    def _parse_sexagesimal(s: str) -> float:
+        """ "HH MM SS.ss" / "+DD MM SS.s" -> decimal hours/degrees """
+        parts = s.split()
+        if not parts:
+            return math.nan
+        sign = -1 if parts[0][0] == "-" else +1
+        v = 0.0
+        for p, scale in zip(parts, (1, 60, 3600)):
+            v += abs(float(p)) / scale
+        return sign * v
+
+
+    def get_obj(self, i: int) -> dict:
+        """ Get i-th observation as dict, same as MPCData80.get_obj() """
+        return MPCData80(self.data[i]).get_obj()
+
+
+    # Compact columnar form for passing between processes:
+    # arrays as raw bytes, str columns joined by "\n"
+    _STR_COLUMNS   = ("data", "packed", "permId", "provId", "band", "catalog", "code")
+    _ARRAY_COLUMNS = ("mjd", "ra", "dec", "mag")
+
+    def to_chunk(self) -> tuple:
+        """ Get columns in compact form """
+        return (len(self),
+                tuple("\n".join(getattr(self, c)) for c in MPCData80Batch._STR_COLUMNS),
+                tuple(getattr(self, c).tobytes() for c in MPCData80Batch._ARRAY_COLUMNS))
+
+
+    def extend_chunk(self, chunk: tuple):
+        """ Append columns in compact form from to_chunk() """
+        (n, str_columns, array_columns) = chunk
+        if not n:
+            return
+        for c, v in zip(MPCData80Batch._STR_COLUMNS, str_columns):
+            getattr(self, c).extend(v.split("\n"))
+        for c, v in zip(MPCData80Batch._ARRAY_COLUMNS, array_columns):
+            getattr(self, c).frombytes(v)
+
+
+
+def _parse_range(file: str, start: int, end: int) -> tuple:
+    # Worker: parse byte range of file, return compact columns
+    with open(file, "rb") as f:
+        f.seek(start)
+        buffer = f.read(end - start)
+    return MPCData80Batch(buffer).to_chunk()
+
+
+def _line_ranges(file: str, n: int) -> list:
+    # Split file into n line-aligned byte ranges
+    size = os.path.getsize(file)
+    bounds = [0]
+    with open(file, "rb") as f:
+        for i in range(1, n):
+            pos = max(size * i // n, bounds[-1])
+            f.seek(pos)
+            if pos > 0:
+                f.readline()
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [ (lo, hi) for lo, hi in zip(bounds, bounds[1:]) if hi > lo ]
+
+
+def parse_file_parallel(file: str, jobs: int=None, chunks_per_job: int=4) -> MPCData80Batch:
+    """
+    Parse large file with 80-column data in parallel worker processes
+
+    :param file: file name
+    :type file: str
+    :param jobs: number of worker processes, defaults to None = number of CPUs
+    :type jobs: int, optional
+    :param chunks_per_job: number of chunks per worker, defaults to 4
+    :type chunks_per_job: int, optional
+    :return: batch with all observations in original order
+    :rtype: MPCData80Batch
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        return MPCData80Batch.from_file(file)
+
+    ranges = _line_ranges(file, jobs * chunks_per_job)
+    ic(jobs, ranges)
+    batch = MPCData80Batch()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # map() returns results in submission order
+        for chunk in executor.map(_parse_range, [file] * len(ranges), *zip(*ranges) if ranges else ([], [])):
+            batch.extend_chunk(chunk)
+    return batch
+
+
+
+class MPCData80Reader:
+    """
+    Memory-mapped streaming reader for large files with 80-column data
+
+    Iterating yields the matching records as zero-copy memoryview slices of the
+    mapped file, without line ending. Lines shorter than 80 columns are skipped.
+    The filters operate on the raw bytes before any decoding. All memoryviews
+    must be released before closing the reader.
+    """
+
+    def __init__(self, file: str, codes: list=None, date_from: str=None, date_to: str=None):
+        """
+        Create reader object
+
+        :param file: file name
+        :type file: str
+        :param codes: list of observatory codes (columns 78-80) to select, defaults to None = all
+        :type codes: list, optional
+        :param date_from: first observation date YYYY-MM-DD to select, defaults to None
+        :type date_from: str, optional
+        :param date_to: last observation date YYYY-MM-DD to select, defaults to None
+        :type date_to: str, optional
+        """
+        self.file      = file
+        self.codes     = { c.encode("ascii") for c in codes } if codes else None
+        self.date_from = MPCData80Reader._date_key(date_from)
+        self.date_to   = MPCData80Reader._date_key(date_to)
+        self._f        = None
+        self._mm       = None
+
+
+    def _date_key(date: str) -> bytes:
+        # YYYY-MM-DD -> b"YYYY MM DD", same as columns 16-25
+        return date.replace("-", " ").encode("ascii") if date else None
+
+
+    def open(self):
+        if self._mm is None:
+            self._f = open(self.file, "rb")
+            try:
+                self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty file can't be mapped
+                self._mm = b""
+        return self
+
+
+    def close(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._mm = None
+        if self._f:
+            self._f.close()
+        self._f = None
+
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    def __iter__(self):
+        self.open()
+        mm     = self._mm
+        size   = len(mm)
+        codes  = self.codes
+        dfrom  = self.date_from
+        dto    = self.date_to
+        with memoryview(mm) as mv:
+            pos = 0
+            while pos < size:
+                end = mm.find(b"\n", pos)
+                if end < 0:
+                    end = size
+                nxt = end + 1
+                if end > pos and mm[end - 1] == 13:     # \r
+                    end -= 1
+                if end - pos >= 80:
+                    if codes and mm[pos + 77 : pos + 80] not in codes:
+                        pos = nxt
+                        continue
+                    if dfrom or dto:
+                        date = mm[pos + 15 : pos + 25]
+                        if dfrom and date < dfrom or dto and date > dto:
+                            pos = nxt
+                            continue
+                    yield mv[pos:end]
+                pos = nxt
+
+
+    def lines(self):
+        """ Iterate over matching records decoded to str """
+        for rec in self:
+            yield str(rec, "latin-1")
+
+
+    def objects(self):
+        """ Iterate over matching records as MPCData80 objects """
+        for rec in self:
+            yield MPCData80Reader.decode(rec)
+
+
+    def decode(rec: memoryview) -> MPCData80:
+        """ Decode single record """
+        return MPCData80(str(rec, "latin-1"))
+
+
+
+def _same_float(a: float, b: float, eps: float) -> bool:
+    """ a == b within eps, NaN == NaN """
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return abs(a - b) <= eps
+
+
+def _ref_mjd(line: str) -> float:
+    """ Reference MJD for benchmark(), via datetime """
+    try:
+        day = datetime.strptime(line[15:25], "%Y %m %d")
+        return day.toordinal() - datetime(1858, 11, 17).toordinal() + float(line[25:32])
+    except ValueError:
+        return math.nan
+
+
+def _ref_sexagesimal(s: str) -> float:
+    """ Reference "HH MM SS.ss" / "+DD MM SS.s" conversion for benchmark() """
+    try:
+        (d, m, sec) = s.split()
+    except ValueError:
+        return math.nan
+    v = abs(int(d)) + int(m) / 60 + float(sec) / 3600
+    return -v if d.startswith("-") else v
+
+
+def benchmark(file: str):
+    """ Compare per-line MPCData80 and MPCData80Batch parsing """
+    with open(file, "rb") as f:
+        buffer = f.read()
+    lines = [ line for line in buffer.decode("latin-1").splitlines() if line.strip() ]
+
+    t0 = time.perf_counter()
+    objs = [ MPCData80(line).to_dict() for line in lines ]
+    t1 = time.perf_counter()
+    batch = MPCData80Batch(buffer)
+    t2 = time.perf_counter()
+
+    # Verify all batch columns against per-line results. Float columns are
+    # checked against a plain reference conversion of the per-line fields,
+    # mag exactly, mjd/ra/dec with tolerance EPS (days/degrees), far below
+    # the resolution of the 80-column format (1e-6 d, 0.01 s, 0.1")
+    EPS = 1e-9
+    errors = 0
+    for i, obj in enumerate(objs):
+        line = lines[i]
+        mag  = float(obj["mag"]) if obj["mag"] else math.nan
+        if (line           != batch.data[i]    or line[0:12]    != batch.packed[i] or
+            obj["permId"]  != batch.permId[i]  or obj["provId"] != batch.provId[i] or
+            obj["band"]    != batch.band[i]    or obj["code"]   != batch.code[i]   or
+            obj["catalog"] != batch.catalog[i] or
+            not _same_float(mag, batch.mag[i], 0) or
+            not _same_float(_ref_mjd(line), batch.mjd[i], EPS) or
+            not _same_float(15 * _ref_sexagesimal(obj["ra"]), batch.ra[i], EPS) or
+            not _same_float(_ref_sexagesimal(obj["dec"]), batch.dec[i], EPS)):
+            errors += 1
+            verbose("mismatch:", line)
+
+    n = len(lines)
+    print(f"{n} lines, {errors} mismatches")
+    print(f"MPCData80      {t1 - t0:8.3f} s  {n / (t1 - t0):12.0f} lines/s")
+    print(f"MPCData80Batch {t2 - t1:8.3f} s  {n / (t2 - t1):12.0f} lines/s  (x{(t1 - t0) / (t2 - t1):.1f})")
+
+    # Lazy record vs. fully decoded dict per observation
+    del objs, batch
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    objs = [ MPCData80(line) for line in lines ]
+    t1 = time.perf_counter()
+    mem_lazy = tracemalloc.get_traced_memory()[0]
+    dicts = [ obj.to_dict() for obj in objs ]
+    t2 = time.perf_counter()
+    mem_dict = tracemalloc.get_traced_memory()[0] - mem_lazy
+    tracemalloc.stop()
+    print(f"MPCData80 lazy {(t1 - t0) / n * 1e6:8.3f} us/record {mem_lazy / n:8.0f} bytes/record")
+    print(f"to_dict()      {(t2 - t1) / n * 1e6:8.3f} us/record {mem_dict / n:8.0f} bytes/record")
+    del objs, dicts
+
+
+def benchmark_parallel(file: str, jobs_list: list=(1, 2, 4, 8)):
+    """ Scaling of parse_file_parallel() with number of workers """
+    t1 = None
+    for jobs in jobs_list:
+        t0 = time.perf_counter()
+        batch = parse_file_parallel(file, jobs)
+        t = time.perf_counter() - t0
+        t1 = t1 or t
+        print(f"--jobs {jobs:2d}     {t:8.3f} s  {len(batch) / t:12.0f} lines/s  (x{t1 / t:.1f})")
 
 
 
@@ -374,6 +730,13 @@ def main():
         epilog      = "Version " + VERSION + " / " + AUTHOR)
     arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
     arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("-f", "--file", action="store_true", help="parse DATA80 file with batch parser")
+    arg.add_argument("-B", "--benchmark", action="store_true", help="benchmark per-line vs batch parser on DATA80 file")
+    arg.add_argument("-j", "--jobs", type=int, help="parse DATA80 file with JOBS worker processes (0 = #CPUs)")
+    arg.add_argument("-S", "--stream", action="store_true", help="stream DATA80 file with memory-mapped reader")
+    arg.add_argument("-c", "--code", help="select observatory code(s) (comma-separated) for --stream")
+    arg.add_argument("--date-from", help="select observations from date YYYY-MM-DD for --stream")
+    arg.add_argument("--date-to", help="select observations up to date YYYY-MM-DD for --stream")
     arg.add_argument("data80", help="80-column data, use quotes!")
 
     args = arg.parse_args()
@@ -384,6 +747,29 @@ def main():
     if args.debug:
         ic.enable()
 
+    if args.benchmark:
+        benchmark(args.data80)
+        benchmark_parallel(args.data80)
+        return
+    if args.stream:
+        codes = args.code.split(",") if args.code else None
+        n = 0
+        with MPCData80Reader(args.data80, codes, args.date_from, args.date_to) as reader:
+            for line in reader.lines():
+                print(line)
+                n += 1
+        verbose(f"{n} observations")
+        return
+    if args.file:
+        if args.jobs is not None:
+            batch = parse_file_parallel(args.data80, args.jobs)
+        else:
+            batch = MPCData80Batch.from_file(args.data80)
+        for i in range(len(batch)):
+            print(f"{batch.packed[i]} {batch.mjd[i]:.6f} {batch.ra[i]:11.6f} {batch.dec[i]:+11.6f} "
+                  f"{batch.mag[i]:5.1f} {batch.band[i]} {batch.code[i]}")
+        return
+
     data = MPCData80(args.data80)
     data.parse_data()
     print(data.get_json())
@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Date field of MPC 80-column data, columns 16-32
+#   YYYY MM DD.dddddd
+# see https://www.minorplanetcenter.net/iau/info/OpticalObs.html
+
+# ChangeLog
+# Version 0.1 / 2026-10-18
+#       Date engine for MPC 80-column data: fixed-width parsing to MJD/JD
+#       without regex, vectorized mjd_array(), ADES and minus 12h date
+#       strings formatted on demand, same rounding as MPCData80 1.1
+
+import argparse
+import math
+import time
+from array import array
+from datetime import datetime, date, timedelta
+from functools import lru_cache
+
+# The following libs must be installed with pip
+from icecream import ic
+# Disable debugging
+ic.disable()
+# Local modules
+from verbose import verbose, warning, error
+
+
+VERSION = "0.1 / 2026-10-18"
+AUTHOR  = "Martin Junius"
+NAME    = "mpcdate"
+
+# MJD = proleptic Gregorian ordinal - ordinal of 1858-11-17
+MJD_ORDINAL = date(1858, 11, 17).toordinal()
+# JD = MJD + 2400000.5
+JD_MJD      = 2400000.5
+
+US_PER_DAY  = 86400 * 1000000
+US_12H      = 12 * 3600 * 1000000
+
+
+
+@lru_cache(maxsize=4096)
+def _ordinal(ymd: str) -> int:
+    # "YYYY MM DD" -> proleptic Gregorian ordinal, None if not a date
+    if ymd[4:5] != " " or ymd[7:8] != " " or not (ymd[0:4] + ymd[5:7] + ymd[8:10]).isdigit() or len(ymd) != 10:
+        return None
+    return date(int(ymd[0:4]), int(ymd[5:7]), int(ymd[8:10])).toordinal()
+
+
+def _fraction(date80: str) -> str:
+    # Digits after the decimal point, "" if none
+    if date80[10:11] != ".":
+        return ""
+    frac = date80[11:].split(" ", 1)[0]
+    if frac.isdigit():
+        return frac
+    n = 0
+    for c in frac:
+        if not c.isdigit():
+            break
+        n += 1
+    return frac[:n]
+
+
+def split_date80(date80: str) -> tuple:
+    """
+    Split date field into day ordinal and fraction of day
+
+    :param date80: date YYYY MM DD.dddddd, columns 16-32
+    :type date80: str
+    :return: (ordinal, fraction digits) or None if not a valid date
+    :rtype: tuple
+    """
+    ordinal = _ordinal(date80[0:10])
+    frac = _fraction(date80)
+    if ordinal is None or not frac:
+        return None
+    return (ordinal, frac)
+
+
+def date80_to_mjd(date80: str) -> float:
+    """
+    Convert date field to MJD
+
+    :param date80: date YYYY MM DD.dddddd, columns 16-32
+    :type date80: str
+    :return: MJD, NaN if not a valid date
+    :rtype: float
+    """
+    d = split_date80(date80)
+    if not d:
+        return math.nan
+    return d[0] - MJD_ORDINAL + float("0." + d[1])
+
+
+def date80_to_jd(date80: str) -> float:
+    """ Convert date field to JD """
+    return date80_to_mjd(date80) + JD_MJD
+
+
+def mjd_array(lines, col1: int=16, col2: int=32) -> array:
+    """
+    Vectorized conversion of date fields of many 80-column lines to MJD
+
+    :param lines: iterable of 80-column lines
+    :param col1: first date column, defaults to 16
+    :type col1: int, optional
+    :param col2: last date column, defaults to 32
+    :type col2: int, optional
+    :return: MJD array, NaN for invalid dates
+    :rtype: array
+    """
+    days = {}
+    nan = math.nan
+    result = array("d")
+    append = result.append
+    for line in lines:
+        d = line[col1 - 1 : col2]
+        day = days.get(d[0:10], False)
+        if day is False:
+            ordinal = _ordinal(d[0:10])
+            day = days[d[0:10]] = ordinal - MJD_ORDINAL if ordinal is not None else None
+        frac = _fraction(d) if day is not None else ""
+        append(day + float("0." + frac) if frac else nan)
+    return result
+
+
+def mjd_to_datetime(mjd: float) -> datetime:
+    """ Convert MJD to datetime """
+    return datetime.fromordinal(MJD_ORDINAL) + timedelta(days=mjd)
+
+
+
+def _isoformat_ADES(dt: datetime, precision: int=1) -> str:
+    """Format datetime as ADES-like / ISO-like string, ROUNDING dt.microsecond to required precision"""
+    # Adapted from https://gist.github.com/jarek/354423854a7cc20b1e91
+    frac = dt.microsecond / 1e6
+    rounded = round(frac, precision)
+
+    if rounded < 1:
+        # format the number to have the required amount of decimal digits,
+        # this is important in case the rounded number is 0
+        frac_s = '{:.{prec}f}'.format(rounded, prec=precision)[2:]
+    else:
+        # round up by adding a second to the datetime
+        dt += timedelta(seconds=1)
+        frac_s = '0' * precision
+
+    # ADES example 2024-10-04T22:05:19.6Z
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + frac_s + "Z"
+
+
+@lru_cache(maxsize=4096)
+def _isodate(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+def _decode(date80: str) -> tuple:
+    # -> (ordinal, microseconds of day), microseconds rounded exactly like timedelta(days=...)
+    d = split_date80(date80)
+    if not d:
+        return None
+    return (d[0], round(float("0." + d[1]) * US_PER_DAY))
+
+
+def _format_ades(ordinal: int, us: int, precision: int=1) -> str:
+    (secs, micro) = divmod(us, 1000000)
+    rounded = round(micro / 1e6, precision)
+    if rounded < 1:
+        frac_s = '{:.{prec}f}'.format(rounded, prec=precision)[2:]
+    else:
+        secs += 1
+        frac_s = '0' * precision
+    if secs >= 86400:
+        # Rare carry into the next day
+        return _isoformat_ADES(datetime.fromordinal(ordinal) + timedelta(microseconds=us), precision)
+    (h, secs) = divmod(secs, 3600)
+    (m, secs) = divmod(secs, 60)
+    return _isodate(ordinal) + f"T{h:02d}:{m:02d}:{secs:02d}.{frac_s}Z"
+
+
+def _format_minus12(ordinal: int, us: int) -> str:
+    return _isodate(ordinal + (us - US_12H) // US_PER_DAY)
+
+
+def format_ades(date80: str, precision: int=1) -> str:
+    """
+    Format date field as ADES obsTime, e.g. 2024-10-04T22:05:19.6Z
+
+    :param date80: date YYYY MM DD.dddddd, columns 16-32
+    :type date80: str
+    :param precision: decimal digits of seconds, defaults to 1
+    :type precision: int, optional
+    :return: ADES date string, date80 unchanged if not a valid date
+    :rtype: str
+    """
+    d = _decode(date80)
+    return _format_ades(*d, precision) if d else date80
+
+
+def format_minus12(date80: str) -> str:
+    """
+    Format date field minus 12h as YYYY-MM-DD, i.e. the start of the observing night
+
+    :param date80: date YYYY MM DD.dddddd, columns 16-32
+    :type date80: str
+    :return: night date or "" if not a valid date
+    :rtype: str
+    """
+    d = _decode(date80)
+    return _format_minus12(*d) if d else ""
+
+
+def parse_date(date80: str) -> tuple:
+    """
+    Parse date field, compatible with MPCData80.parse_date()
+
+    :param date80: date YYYY MM DD.dddddd, columns 16-32
+    :type date80: str
+    :return: (ADES date string, minus 12h date), (date80, "") if not a valid date
+    :rtype: tuple
+    """
+    d = _decode(date80)
+    if not d:
+        return (date80, "")
+    return (_format_ades(*d), _format_minus12(*d))
+
+
+
+def benchmark(n: int=200000):
+    """ Compare datetime-based and fixed-width date parsing """
+    dates = [ "2024 {:02d} {:02d}.{:05d}".format(1 + i % 12, 1 + i % 28, (i * 7919) % 100000) for i in range(n) ]
+
+    t0 = time.perf_counter()
+    for d in dates:
+        dt = datetime(int(d[0:4]), int(d[5:7]), int(d[8:10])) + timedelta(days=float("0." + d[11:]))
+        _isoformat_ADES(dt)
+        str((dt - timedelta(hours=12)).date())
+    t1 = time.perf_counter()
+    for d in dates:
+        parse_date(d)
+    t2 = time.perf_counter()
+    mjd_array(dates, 1, 17)
+    t3 = time.perf_counter()
+
+    print(f"{n} dates")
+    print(f"datetime     {t1 - t0:8.3f} s  {n / (t1 - t0):12.0f} /s")
+    print(f"parse_date() {t2 - t1:8.3f} s  {n / (t2 - t1):12.0f} /s")
+    print(f"mjd_array()  {t3 - t2:8.3f} s  {n / (t3 - t2):12.0f} /s")
+
+
+
+### Test run as a command line script ###
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Convert MPC 80-column dates",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("-B", "--benchmark", action="store_true", help="run benchmark")
+    arg.add_argument("date", nargs="*", help="date YYYY MM DD.dddddd, use quotes!")
+
+    args = arg.parse_args()
+
+    if args.verbose:
+        verbose.set_prog(NAME)
+        verbose.enable()
+    if args.debug:
+        ic.enable()
+
+    if args.benchmark:
+        benchmark()
+        return
+    for d in args.date:
+        mjd = date80_to_mjd(d)
+        print(f"\"{d}\": MJD {mjd:.6f}, JD {mjd + JD_MJD:.6f}, ADES {format_ades(d)}, night {format_minus12(d)}")
+
+
+if __name__ == "__main__":
+    main()
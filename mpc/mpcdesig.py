@@ -0,0 +1,443 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Packed designations, see
+#   https://www.minorplanetcenter.net/iau/info/PackedDes.html
+# References
+#   https://minorplanetcenter.net/iau/info/References.html
+
+# ChangeLog
+# Version 0.1 / 2026-10-18
+#       Designation codec moved from MPCData80: table-driven base-62 decoding,
+#       precompiled regexes, LRU cached unpack_id() / unpack_reference(),
+#       new pack_id() encoder
+#       Benchmark against the original regex implementation from MPCData80
+
+import argparse
+import re
+import time
+from functools import lru_cache
+
+# The following libs must be installed with pip
+from icecream import ic
+# Disable debugging
+ic.disable()
+# Local modules
+from verbose import verbose, warning, error
+
+
+VERSION = "0.1 / 2026-10-18"
+AUTHOR  = "Martin Junius"
+NAME    = "mpcdesig"
+
+# Max number of cached designations / references
+CACHE_SIZE = 8192
+
+BASE62 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+
+
+def _decode_single_ord(v: int) -> int:
+    # Same semantics as the original chained ord() comparisons
+    if v >= ord("0"):
+        if v >= ord("A"):
+            if v >= ord("a"):
+                return v - ord("a") + 10 + 26
+            return v - ord("A") + 10
+        return v - ord("0")
+    return 0
+
+# 256-entry lookup table for single base-62 digits
+_DECODE = [ _decode_single_ord(v) for v in range(256) ]
+
+
+def decode_single(c: str) -> int:
+    """ Decode single base-62 digit """
+    v = ord(c)
+    return _DECODE[v] if v < 256 else _decode_single_ord(v)
+
+
+def decode_base62(s: str) -> int:
+    """ Input s = ~XXXX """
+    t = _DECODE
+    return ((t[ord(s[1])] * 62 + t[ord(s[2])]) * 62 + t[ord(s[3])]) * 62 + t[ord(s[4])]
+
+
+def encode_base62(n: int, width: int) -> str:
+    """ Encode n as base-62 number with width digits """
+    s = ""
+    for i in range(width):
+        s = BASE62[n % 62] + s
+        n //= 62
+    if n:
+        raise ValueError(f"{n} too large for {width} base-62 digits")
+    return s
+
+
+
+# Regex #1
+# Minor planet
+_RE_MINOR_PLANET = re.compile(r'^(?: {5}|([0-9A-Za-z])(\d{4})|(~[0-9A-Za-z]{4}))' +
+#                                         ^(1)         ^(2)    ^(3)
+                              r'(?: {7}|([I-K])(\d{2})([A-HJ-Y])([a-zA-Z0-9])(\d)(?:([A-HJ-Z])|0))$')
+#                                        ^(4)   ^(5)   ^(6)      ^(7)         ^(8)   ^(9)
+
+# Regex #2
+# Comets
+_RE_COMET = re.compile(r'^(?: {4}|(\d{4}))([APCDXI])' +
+#                                  ^(1)    ^(2)
+                       r'(?: {7}|([0-9A-Za-z])(\d{2})([A-HJ-Y])([a-zA-Z0-9])(\d)(?:0|([A-Z])|([a-z])))$')
+#                                ^(3)         ^(4)   ^(5)      ^(6)         ^(7)     ^(8)    ^(9)
+
+# Unpacked designations for pack_id()
+_RE_PERM_MINOR_PLANET = re.compile(r'^\((\d+)\)$')
+_RE_PERM_COMET        = re.compile(r'^(\d{1,4})([APCDXI])(?:-([A-Z]))?$')
+_RE_PROV_MINOR_PLANET = re.compile(r'^(\d{4}) ([A-HJ-Y])([A-HJ-Z])(\d*)$')
+_RE_PROV_COMET        = re.compile(r'^([APCDXI])/(\d{4}) ([A-HJ-Y])([A-Z]?)(\d*)(?:-([A-Z]))?$')
+
+
+
+# Below adapted from https://github.com/IAU-ADES/ADES-Master/blob/master/Python/bin/packUtil.py
+@lru_cache(maxsize=CACHE_SIZE)
+def unpack_reference(packedref: str, year: str) -> str:
+    """ Unpack publication reference, columns 73-77 """
+    c = packedref[0]
+    if c == "E":                                                # Temporary MPEC
+        packedref = "MPEC " + year + "-" + packedref[1] + str( "{:02d}".format(int(packedref[2:])) )
+    elif c in '0123456789':                                     # MPC case A
+        packedref = "MPC  " + str(int(packedref))               #   <5-digit number>
+    elif c == '@':                                              # MPC case B
+        packedref = "MPC  " + str(100000 + int(packedref[1:]))  #   @<4-digit number>
+    elif c == '#':                                              # MPC case C
+        n = 110000 + decode_base62(packedref)                   #   ~<4-digit radix 62>
+        packedref = "MPC  " + str(n)
+    elif c in 'abcdefghijklmnopqrstuvwxyz':                     # MPS case D
+        n = int(packedref[1:]) + 10000*'abcdefghijklmnopqrstuvwxyz'.index(c)
+        packedref = "MPS  " + str(n)                            #   <letter + 4-digit base 10>
+    elif c == '~':                                              # MPS case E
+        n = 260000 + decode_base62(packedref)                   #   ~<4-digit radix 62>
+        packedref = "MPS  " + str(n)
+    # Case F, G not handled
+    return packedref
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def unpack_id(packed: str) -> tuple:
+    """ Unpack designation, columns 1-12, returns (perm_id, prov_id) """
+    perm_id = ""
+    prov_id = ""
+
+    m = _RE_MINOR_PLANET.match(packed)
+    if m:
+        # permId
+        if m.group(1) or m.group(3):
+            if m.group(1):
+                n = int(m.group(2)) + 10000 * decode_single(m.group(1))
+            if m.group(3):
+                n = 620000 + decode_base62(m.group(3))
+            if n:
+                perm_id = "(" + str(n) + ")"
+        # provId
+        if m.group(4):
+            y = "{0:0d}".format(decode_single(m.group(4)) * 100 + int(m.group(5)))
+            n = decode_single(m.group(7)) * 10 + int(m.group(8))
+            ns = str(n) if n>0 else ""
+            if m.group(9):  # normal asteroid provid
+                prov_id =  y + ' ' + m.group(6) + m.group(9) + ns
+            else:           # comet ID -- use A/
+                prov_id =  'A/' + y + ' ' + m.group(6) + ns
+
+    m = _RE_COMET.match(packed)
+    if m:
+        type = m.group(2)
+        if m.group(1):
+            perm_id = str(int(m.group(1))) + type
+            # now check for fragments
+            if m.group(9):
+                perm_id = perm_id + '-' + m.group(9).upper()
+
+        if m.group(3):
+            y = "{0:0d}".format(decode_single(m.group(3)) * 100 + int(m.group(4)))
+            n = decode_single(m.group(6)) * 10 + int(m.group(7))
+            ns = str(n) if n>0 else ""
+            extra = m.group(8) or ''            # adds order
+            frag = '-' + m.group(9).upper() if m.group(9) else ''
+            prov_id =  m.group(2) + '/' + y + ' ' + m.group(5) + extra + ns + frag
+
+    return (perm_id, prov_id)
+
+
+
+def _pack_year(y: str) -> str:
+    y = int(y)
+    return BASE62[y // 100] + "{:02d}".format(y % 100)
+
+
+def _pack_cycle(n: str) -> str:
+    n = int(n) if n else 0
+    return BASE62[n // 10] + str(n % 10)
+
+
+def pack_id(perm_id: str="", prov_id: str="") -> str:
+    """
+    Pack designation, inverse of unpack_id()
+
+    :param perm_id: permanent designation, e.g. "(433)", "73P", defaults to ""
+    :type perm_id: str, optional
+    :param prov_id: provisional designation, e.g. "2022 AA", "C/2023 A1", defaults to ""
+    :type prov_id: str, optional
+    :raises ValueError: designation can't be packed
+    :return: packed designation, columns 1-12
+    :rtype: str
+    """
+    mp   = _RE_PERM_MINOR_PLANET.match(perm_id)
+    mc   = _RE_PERM_COMET.match(perm_id)
+    pmp  = _RE_PROV_MINOR_PLANET.match(prov_id)
+    pc   = _RE_PROV_COMET.match(prov_id)
+
+    if (perm_id and not (mp or mc)) or (prov_id and not (pmp or pc)):
+        raise ValueError(f"can't pack designation {perm_id!r} {prov_id!r}")
+
+    # Comets, A/ designations without minor planet number, too
+    if mc or (pc and not mp):
+        type = mc.group(2) if mc else pc.group(1)
+        if mc and pc and pc.group(1) != type:
+            raise ValueError(f"comet type mismatch {perm_id!r} {prov_id!r}")
+        packed = "{:04d}".format(int(mc.group(1))) if mc else "    "
+        packed += type
+        if pc:
+            (t, y, half, extra, n, frag) = pc.groups()
+            if extra and frag:
+                raise ValueError(f"can't pack designation {perm_id!r} {prov_id!r}")
+            packed += _pack_year(y) + half + _pack_cycle(n) + (extra or (frag.lower() if frag else "0"))
+        elif mc.group(3):
+            raise ValueError(f"can't pack fragment without provisional designation {perm_id!r}")
+        else:
+            packed += " " * 7
+        return packed
+
+    # Minor planets
+    if mp:
+        n = int(mp.group(1))
+        if n < 620000:
+            packed = BASE62[n // 10000] + "{:04d}".format(n % 10000)
+        else:
+            packed = "~" + encode_base62(n - 620000, 4)
+    else:
+        packed = " " * 5
+    if pmp:
+        (y, half, second, n) = pmp.groups()
+        packed += _pack_year(y) + half + _pack_cycle(n) + second
+    elif pc:
+        # A/2017 U1 style with minor planet number
+        (t, y, half, extra, n, frag) = pc.groups()
+        if t != "A" or extra or frag:
+            raise ValueError(f"can't pack designation {perm_id!r} {prov_id!r}")
+        packed += _pack_year(y) + half + _pack_cycle(n) + "0"
+    else:
+        packed += " " * 7
+    return packed
+
+
+
+def cache_info() -> dict:
+    """ Hit/miss statistics of the designation caches """
+    return { "unpack_id":        unpack_id.cache_info(),
+             "unpack_reference": unpack_reference.cache_info() }
+
+
+def cache_clear():
+    """ Clear designation caches """
+    unpack_id.cache_clear()
+    unpack_reference.cache_clear()
+
+
+
+# Original regex implementation from MPCData80 (mpcdata80 version 1.1),
+# without ic() calls, reference for benchmark()
+def _orig_decode_single(c: str):
+    v = ord(c)
+    if v >= ord("0"):
+        if v >= ord("A"):
+            if v >= ord("a"):
+                return v - ord("a") + 10 + 26
+            return v - ord("A") + 10
+        return v - ord("0")
+    return 0
+
+def _orig_decode_base62(s: str):
+    """ Input s = ~XXXX """
+    return ( ( (  _orig_decode_single(s[1]) * 62
+                + _orig_decode_single(s[2])      ) * 62
+                + _orig_decode_single(s[3])             ) * 62
+                + _orig_decode_single(s[4])                    )
+
+def _orig_unpack_reference(packedref, year: str):
+    if packedref[0] == "E":                                     # Temporary MPEC
+        packedref = "MPEC " + year + "-" + packedref[1] + str( "{:02d}".format(int(packedref[2:])) )
+    elif packedref[0] in '0123456789':                          # MPC case A
+        packedref = "MPC  " + str(int(packedref))               #   <5-digit number>
+    elif packedref[0] == '@':                                   # MPC case B
+        packedref = "MPC  " + str(100000 + int(packedref[1:]))  #   @<4-digit number>
+    elif packedref[0] == '#':                                   # MPC case C
+        n = 110000 + _orig_decode_base62(packedref)             #   ~<4-digit radix 62>
+        packedref = "MPC  " + str(n)
+    elif packedref[0] in 'abcdefghijklmnopqrstuvwxyz':          # MPS case D
+        n = int(packedref[1:]) + 10000*'abcdefghijklmnopqrstuvwxyz'.index(packedref[0])
+        packedref = "MPS  " + str(n)                            #   <letter + 4-digit base 10>
+    elif packedref[0] == '~':                                   # MPS case E
+        n = 260000 + _orig_decode_base62(packedref)             #   ~<4-digit radix 62>
+        packedref = "MPS  " + str(n)
+    # Case F, G not handled
+    return packedref
+
+def _orig_unpack_id(packed: str):
+    perm_id = ""
+    prov_id = ""
+
+    # Regex #1
+    # Minor planet
+    m = re.search(r'^(?: {5}|([0-9A-Za-z])(\d{4})|(~[0-9A-Za-z]{4}))' +
+                  r'(?: {7}|([I-K])(\d{2})([A-HJ-Y])([a-zA-Z0-9])(\d)(?:([A-HJ-Z])|0))$', packed)
+    if m:
+        # permId
+        if m.group(1) or m.group(3):
+            if m.group(1):
+                n = int(m.group(2)) + 10000 * _orig_decode_single(m.group(1))
+            if m.group(3):
+                n = 620000 + _orig_decode_base62(m.group(3))
+            if n:
+                perm_id = "(" + str(n) + ")"
+        # provId
+        if m.group(4):
+            y = _orig_decode_single(m.group(4)) * 100 + int(m.group(5))
+            y = "{0:0d}".format(y)
+            n = _orig_decode_single(m.group(7)) * 10 + int(m.group(8))
+            ns = str(n) if n>0 else ""
+            if m.group(9):  # normal asteroid provid
+                prov_id =  y + ' ' + m.group(6) + m.group(9) + ns
+            else:           # comet ID -- use A/
+                prov_id =  'A/' + y + ' ' + m.group(6) + ns
+
+    # Regex #2
+    # Comets
+    m = re.search(r'^(?: {4}|(\d{4}))([APCDXI])' +
+                  r'(?: {7}|([0-9A-Za-z])(\d{2})([A-HJ-Y])([a-zA-Z0-9])(\d)(?:0|([A-Z])|([a-z])))$', packed)
+    if m:
+        type = m.group(2)
+        if m.group(1):
+            n = int(m.group(1))
+            perm_id = str(n) + type
+            # now check for fragments
+            if m.group(9):
+                perm_id = perm_id + '-' + m.group(9).upper()
+
+        if m.group(3):
+            y = _orig_decode_single(m.group(3)) * 100 + int(m.group(4))
+            y = "{0:0d}".format(y)
+            n = _orig_decode_single(m.group(6)) * 10 + int(m.group(7))
+            ns = str(n) if n>0 else ""
+            extra = ''
+            if m.group(8): # m.group(8) changes nothing
+                extra = m.group(8) # adds order
+            frag = ''
+            if m.group(9): # fragment letter
+                frag = '-' + m.group(9).upper()
+
+            prov_id =  m.group(2) + '/' + y + ' ' + m.group(5) + extra + ns + frag
+
+    return (perm_id, prov_id)
+
+
+
+def _time(func, data: list) -> float:
+    t0 = time.perf_counter()
+    for args in data:
+        func(*args)
+    return time.perf_counter() - t0
+
+
+def benchmark(n: int=200000):
+    """ Benchmark original regex vs. new unpack_id() / unpack_reference() on a realistic mix """
+    # Mix of numbered, provisional and comet designations, repeating as in a WAMO batch
+    mix = [ "00433       ", "K5127       ", "~0000       ", "     K22A00A", "     K23P25C",
+            "    CK23A010", "0073P       ", "    PK19L02D", "     K17U010", "     C0MTK42",
+            "a1234K22A00A", "0001I       ", "    CJ95O010", "     J98SA8Q", "     K05U00A" ]
+    refs = [ ("E2024", "2024"), ("12345", "2024"), ("@1234", "2024"), ("#1a2B", "2024"),
+             ("a1234", "2024"), ("z9999", "2024"), ("~1a2B", "2024"), ("     ", "2024") ]
+
+    # Cross-check new codec against original, including all designations
+    # packed by pack_id() from a range of numbers
+    check = mix + [ pack_id(f"({i})") for i in range(1, 1000000, 997) ]
+    errors = 0
+    for p in check:
+        if unpack_id.__wrapped__(p) != _orig_unpack_id(p):
+            errors += 1
+            verbose(f"unpack_id mismatch: \"{p}\"", unpack_id.__wrapped__(p), _orig_unpack_id(p))
+    for r in refs:
+        if unpack_reference.__wrapped__(*r) != _orig_unpack_reference(*r):
+            errors += 1
+            verbose(f"unpack_reference mismatch: \"{r[0]}\"", unpack_reference.__wrapped__(*r), _orig_unpack_reference(*r))
+    print(f"{len(check)} designations, {len(refs)} references checked, {errors} mismatches")
+
+    for (name, data, orig, new) in (("unpack_id",        [ (mix[(i * 7) % len(mix)],) for i in range(n) ],
+                                     _orig_unpack_id, unpack_id),
+                                    ("unpack_reference", [ refs[(i * 3) % len(refs)] for i in range(n) ],
+                                     _orig_unpack_reference, unpack_reference)):
+        cache_clear()
+        t_orig     = _time(orig, data)
+        t_uncached = _time(new.__wrapped__, data)
+        t_cached   = _time(new, data)
+        print(f"{name}: {n} calls")
+        print(f"original {t_orig:8.3f} s  {n / t_orig:12.0f} /s")
+        print(f"uncached {t_uncached:8.3f} s  {n / t_uncached:12.0f} /s  (x{t_orig / t_uncached:.1f})")
+        print(f"cached   {t_cached:8.3f} s  {n / t_cached:12.0f} /s  (x{t_orig / t_cached:.1f})")
+        print(cache_info()[name])
+
+
+
+### Test run as a command line script ###
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Pack/unpack MPC designations",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("-p", "--pack", action="store_true", help="pack designation(s) PERMID [PROVID]")
+    arg.add_argument("-B", "--benchmark", action="store_true", help="run micro-benchmark")
+    arg.add_argument("desig", nargs="*", help="packed designation (columns 1-12, use quotes!)")
+
+    args = arg.parse_args()
+
+    if args.verbose:
+        verbose.set_prog(NAME)
+        verbose.enable()
+    if args.debug:
+        ic.enable()
+
+    if args.benchmark:
+        benchmark()
+        return
+    if args.pack:
+        print(f"\"{pack_id(*args.desig)}\"")
+        return
+    for packed in args.desig:
+        print(f"\"{packed}\" ->", unpack_id(packed.ljust(12)))
+
+
+if __name__ == "__main__":
+    main()
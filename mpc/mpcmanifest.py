@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from mpc.mpcmanifest import ReportManifest
+#   manifest = ReportManifest(file, use_hash=False)
+#   key = manifest.file_key(path)
+#   entry = manifest.lookup(path, key)          # {"format": ..., "obj": ...} or None
+#   ...
+#   manifest.store(path, key, format, obj)      # after parsing report
+#   manifest.close()
+#
+# Parsed reports are stored per path, valid as long as size and mtime of
+# the file are unchanged. With use_hash=True a file with changed mtime but
+# same SHA-1 of the content is still valid, e.g. after copying the report
+# archive. Files not processed (other format, or format not requested) are
+# stored with obj = None.
+
+# ChangeLog
+# Version 0.1 / 2026-10-18
+#       Manifest of parsed report files for incremental processing
+#       Commit every COMMIT_EVERY changes, not only in close()
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+# The following libs must be installed with pip
+from icecream import ic
+# Disable debugging
+ic.disable()
+# Local modules
+from verbose       import verbose, warning, error
+from mpc.mpcdata80 import MPCData80
+
+
+VERSION = "0.1 / 2026-10-18"
+AUTHOR  = "Martin Junius"
+NAME    = "mpcmanifest"
+
+REPORT_MANIFEST = "mpc-report-manifest.sqlite"
+COMMIT_EVERY    = 100           # changes per commit, keeps progress of interrupted scans
+
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS report (
+    path        TEXT PRIMARY KEY,
+    size        INTEGER,
+    mtime       INTEGER,                -- ns
+    sha1        TEXT,                   -- only with use_hash
+    format      TEXT,                   -- MPC1992, ADES or NULL
+    obj         TEXT                    -- JSON, parsed report or NULL
+);
+"""
+
+
+
+def _encode(format: str, obj: dict) -> str:
+    # MPC1992 observations as 80-column lines only
+    if obj is None:
+        return None
+    if format == "MPC1992":
+        obj = dict(obj, _observations=[ obs["data"]["data"] for obs in obj["_observations"] ])
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _decode(format: str, text: str) -> dict:
+    if text is None:
+        return None
+    obj = json.loads(text)
+    if format == "MPC1992":
+        obj["_observations"] = [ { "data": MPCData80(line).get_obj(), "publication": None } for line in obj["_observations"] ]
+    return obj
+
+
+def _sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        while chunk := f.read(64 * 1024):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+
+class ReportManifest:
+    """ Manifest of parsed report files, safe to use from worker threads """
+
+    def __init__(self, file: str=REPORT_MANIFEST, use_hash: bool=False):
+        """
+        Open/create manifest
+
+        :param file: SQLite database file, defaults to REPORT_MANIFEST
+        :type file: str, optional
+        :param use_hash: check SHA-1 of content if mtime changed, defaults to False
+        :type use_hash: bool, optional
+        """
+        ic(file, use_hash)
+        self.file     = file
+        self.use_hash = use_hash
+        self.hits     = 0
+        self.misses   = 0
+        self.stored   = 0
+        self._pending = 0           # changes not yet committed
+        self._lock    = threading.Lock()
+        self.db = sqlite3.connect(file, check_same_thread=False)
+        self.db.executescript(_SCHEMA)
+
+
+    def close(self):
+        with self._lock:
+            self.db.commit()
+            self.db.close()
+
+
+    def _changed(self):
+        # Call with lock held
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self.db.commit()
+            self._pending = 0
+
+
+    def file_key(self, path: str) -> tuple:
+        """
+        Get key for file, call before reading the file
+
+        :param path: file path
+        :type path: str
+        :return: (size, mtime in ns)
+        :rtype: tuple
+        """
+        st = os.stat(path)
+        return (st.st_size, st.st_mtime_ns)
+
+
+    def lookup(self, path: str, key: tuple) -> dict:
+        """
+        Look up parsed report
+
+        :param path: file path
+        :type path: str
+        :param key: key from file_key()
+        :type key: tuple
+        :return: {"format": ..., "obj": ...} if unchanged, else None
+        :rtype: dict
+        """
+        with self._lock:
+            row = self.db.execute("SELECT size, mtime, sha1, format, obj FROM report WHERE path=?",
+                                  (path,)).fetchone()
+        if row:
+            (size, mtime, sha1, format, obj) = row
+            valid = (size, mtime) == key
+            if not valid and self.use_hash and sha1 and size == key[0] and _sha1(path) == sha1:
+                # Same content, e.g. copied file
+                with self._lock:
+                    self.db.execute("UPDATE report SET mtime=? WHERE path=?", (key[1], path))
+                    self._changed()
+                valid = True
+            if valid:
+                with self._lock:
+                    self.hits += 1
+                return { "format": format, "obj": _decode(format, obj) }
+        with self._lock:
+            self.misses += 1
+        return None
+
+
+    def store(self, path: str, key: tuple, format: str, obj: dict):
+        """
+        Store parsed report
+
+        :param path: file path
+        :type path: str
+        :param key: key from file_key() before parsing
+        :type key: tuple
+        :param format: report format, "MPC1992", "ADES" or None
+        :type format: str
+        :param obj: parsed report or None if not processed
+        :type obj: dict
+        """
+        sha1 = _sha1(path) if self.use_hash else None
+        row = (path, key[0], key[1], sha1, format, _encode(format, obj))
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO report (path, size, mtime, sha1, format, obj) VALUES (?, ?, ?, ?, ?, ?)", row)
+            self.stored += 1
+            self._changed()
+
+
+    def clear(self):
+        """ Remove all entries, forces full rebuild """
+        with self._lock:
+            self.db.execute("DELETE FROM report")
+            self.db.commit()
+
+
+    def count(self) -> dict:
+        """ Number of entries per format """
+        with self._lock:
+            return dict(self.db.execute("SELECT format, COUNT(*) FROM report GROUP BY format").fetchall())
+
+
+    def stats(self) -> str:
+        """ Statistics of this session """
+        return f"Report manifest: {self.hits} unchanged, {self.misses} new/modified, {self.stored} stored"
+
+
+
+### Test run as a command line script ###
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Manage manifest of parsed reports",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("-f", "--file", default=REPORT_MANIFEST, help=f"manifest file, default {REPORT_MANIFEST}")
+    arg.add_argument("-X", "--clear", action="store_true", help="remove all entries")
+
+    args = arg.parse_args()
+
+    if args.verbose:
+        verbose.set_prog(NAME)
+        verbose.enable()
+    if args.debug:
+        ic.enable()
+
+    manifest = ReportManifest(args.file)
+    if args.clear:
+        manifest.clear()
+    for format, n in manifest.count().items():
+        print(f"{format or 'other':10s} {n:8d}")
+    manifest.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from mpc.mpcobsdb import MPCObsDB
+#   db = MPCObsDB(file)
+#   report_id = db.add_report(source, format, observatory=..., submission=...)
+#   db.add_wamo(report_id, wamo_list, wamo_ids)
+#   db.add_observations(report_id, list_of_MPCData80)
+#   db.query(obj=..., unpublished=..., date_from=..., date_to=..., code=...)
+#   db.close()
+#
+#   Incremental WAMO refresh, only observations not yet published are requested:
+#   refresh = WAMORefresh(db)
+#   known = refresh.known(list_of_ids_dicts)
+#   (wamo_list, wamo_ids) = retrieve_from_wamo_planned(list_of_ids_dicts, ..., known=known, with_ids=True)
+#   refresh.update(wamo_list, wamo_ids)
+#   refresh.report()
+
+# ChangeLog
+# Version 0.1 / 2026-10-18
+#       Local SQLite store for observations, reports and WAMO status
+#       Added state(), WAMORefresh for incremental WAMO refresh with delta report
+#       ADES rows without WAMO data replaced by add_wamo(), not listed as unpublished
+#       Queried WAMO id stored in new column wamo_id, used by WAMORefresh, as
+#       MPC rewrites the 80-column data of re-identified observations
+
+import argparse
+import sqlite3
+import sys
+import time
+import typing
+from datetime import date, datetime, timedelta
+
+# The following libs must be installed with pip
+from icecream import ic
+# Disable debugging
+ic.disable()
+# Local modules
+from verbose       import verbose, warning, error
+from mpc.mpcwamo   import wamo_status, STATUS_PUBLISHED, STATUS_NOT_FINAL
+from mpc.mpcdata80 import MPCData80
+from mpc.mpcdate   import date80_to_mjd
+
+
+VERSION = "0.1 / 2026-10-18"
+AUTHOR  = "Martin Junius"
+NAME    = "mpcobsdb"
+
+OBSDB = "mpc-observations.sqlite"
+
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id          INTEGER PRIMARY KEY,
+    source      TEXT UNIQUE NOT NULL,   -- report file or IMAP folder/message
+    format      TEXT,                   -- MPC1992, ADES, ACK
+    observatory TEXT,
+    submitter   TEXT,
+    submission  TEXT,                   -- submission ID from ACK mail
+    ack         TEXT,
+    date        TEXT,
+    updated     TEXT
+);
+CREATE TABLE IF NOT EXISTS observations (
+    id           INTEGER PRIMARY KEY,
+    key          TEXT UNIQUE NOT NULL,  -- 80-column data or "trkSub stn obsTime" for ADES
+    report_id    INTEGER REFERENCES reports(id),
+    data80       TEXT,
+    obs_id       TEXT,                  -- WAMO observationID
+    trksub       TEXT,
+    obj_id       TEXT,
+    perm_id      TEXT,
+    prov_id      TEXT,
+    date         TEXT,
+    date_minus12 TEXT,
+    mjd          REAL,
+    ra           TEXT,
+    dec          TEXT,
+    mag          TEXT,
+    band         TEXT,
+    reference    TEXT,
+    code         TEXT,
+    publication  TEXT,
+    status       TEXT,                  -- see mpc.mpcwamo STATUS_*
+    updated      TEXT,
+    wamo_id      TEXT                   -- queried WAMO id: obsID, submitted 80-column data or "trkSub stn"
+);
+CREATE INDEX IF NOT EXISTS obs_perm_id      ON observations(perm_id);
+CREATE INDEX IF NOT EXISTS obs_prov_id      ON observations(prov_id);
+CREATE INDEX IF NOT EXISTS obs_obj_id       ON observations(obj_id);
+CREATE INDEX IF NOT EXISTS obs_trksub       ON observations(trksub);
+CREATE INDEX IF NOT EXISTS obs_obs_id       ON observations(obs_id);
+CREATE INDEX IF NOT EXISTS obs_date_minus12 ON observations(date_minus12);
+CREATE INDEX IF NOT EXISTS obs_code         ON observations(code);
+CREATE INDEX IF NOT EXISTS obs_status       ON observations(status);
+"""
+
+_COLUMNS = ("key", "report_id", "data80", "obs_id", "trksub", "obj_id", "perm_id", "prov_id",
+            "date", "date_minus12", "mjd", "ra", "dec", "mag", "band", "reference", "code",
+            "publication", "status", "updated", "wamo_id")
+
+# Keep WAMO results from previous runs, if the new data has none
+_UPSERT = ("INSERT INTO observations (" + ", ".join(_COLUMNS) + ") VALUES (" + ", ".join("?" * len(_COLUMNS)) + ") " +
+           "ON CONFLICT(key) DO UPDATE SET " +
+           "report_id=excluded.report_id, " +
+           "obs_id=COALESCE(excluded.obs_id, obs_id), " +
+           "obj_id=COALESCE(excluded.obj_id, obj_id), " +
+           "publication=COALESCE(excluded.publication, publication), " +
+           "status=CASE WHEN excluded.status='' THEN status ELSE excluded.status END, " +
+           "updated=excluded.updated, " +
+           "wamo_id=COALESCE(excluded.wamo_id, wamo_id)")
+
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+
+class MPCObsDB:
+    """ Local SQLite store for observations, reports and WAMO status """
+
+    def __init__(self, file: str=OBSDB):
+        """
+        Open/create observation database
+
+        :param file: SQLite database file, defaults to OBSDB
+        :type file: str, optional
+        """
+        ic(file)
+        self.file = file
+        self.db = sqlite3.connect(file)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(_SCHEMA)
+        # Database created before column wamo_id was added
+        if "wamo_id" not in [ row["name"] for row in self.db.execute("PRAGMA table_info(observations)") ]:
+            self.db.execute("ALTER TABLE observations ADD COLUMN wamo_id TEXT")
+        self.db.execute("CREATE INDEX IF NOT EXISTS obs_wamo_id ON observations(wamo_id)")
+
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+    def add_report(self, source: str, format: str, **meta) -> int:
+        """
+        Add or update report
+
+        :param source: report file name or IMAP folder/message
+        :type source: str
+        :param format: MPC1992, ADES, ACK
+        :type format: str
+        :param meta: observatory, submitter, submission, ack, date
+        :return: report id
+        :rtype: int
+        """
+        fields = ("observatory", "submitter", "submission", "ack", "date")
+        values = [ meta.get(k) for k in fields ]
+        self.db.execute("INSERT INTO reports (source, format, " + ", ".join(fields) + ", updated) " +
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(source) DO UPDATE SET " +
+                        ", ".join(f"{k}=excluded.{k}" for k in ("format",) + fields + ("updated",)),
+                        [source, format] + values + [_now()])
+        row = self.db.execute("SELECT id FROM reports WHERE source=?", (source,)).fetchone()
+        return row["id"]
+
+
+    def _row(self, report_id: int, data: typing.Mapping, obs_id: str=None, obj_id: str=None,
+             publication: typing.Any=None, updated: str=None, wamo_id: str=None) -> tuple:
+        # Observation row from MPCData80 object or dict
+        data80  = data["data"]
+        perm_id = data["permId"]
+        prov_id = data["provId"]
+        trksub  = data80[5:12].strip() if not perm_id and not prov_id else None
+        status  = wamo_status(publication)
+        return (data80, report_id, data80, obs_id, trksub, obj_id, perm_id, prov_id,
+                data["date"], data["date_minus12"], date80_to_mjd(data80[15:32]), data["ra"], data["dec"], data["mag"],
+                data["band"], data["reference"], data["code"],
+                publication or None, status, updated, wamo_id)
+
+
+    def add_observations(self, report_id: int, observations: list, ids: dict=None):
+        """
+        Bulk insert observations without WAMO data
+
+        :param report_id: report id
+        :type report_id: int
+        :param observations: list of MPCData80 objects
+        :type observations: list
+        :param ids: dict obs_id -> 80-column data, defaults to None
+        :type ids: dict, optional
+        """
+        obs_ids = { v: k for k, v in ids.items() } if ids else {}
+        now = _now()
+        rows = [ self._row(report_id, data, obs_id=obs_ids.get(data["data"]), updated=now) for data in observations ]
+        with self.db:
+            self.db.executemany(_UPSERT, rows)
+
+
+    def add_wamo(self, report_id: int, wamo: list, wamo_ids: list=None):
+        """
+        Bulk insert observations with WAMO data
+
+        :param report_id: report id
+        :type report_id: int
+        :param wamo: list of WAMO objects, see mpc.mpcwamo
+        :type wamo: list
+        :param wamo_ids: queried id for each WAMO object, see retrieve_from_wamo_planned(with_ids=True),
+                         needed for WAMORefresh, defaults to None
+        :type wamo_ids: list, optional
+        """
+        now = _now()
+        rows = [ self._row(report_id, w["data"], obs_id=w.get("observationID"), obj_id=w.get("objId"),
+                           publication=w.get("publication"), updated=now, wamo_id=id)
+                 for w, id in zip(wamo, wamo_ids or [ None ] * len(wamo)) ]
+        with self.db:
+            # ADES rows of this report stored without WAMO data are replaced
+            # by the WAMO rows keyed by 80-column data
+            self.db.execute("DELETE FROM observations WHERE report_id=? AND data80 IS NULL", (report_id,))
+            # Same for rows of re-identified observations, same obsID, but
+            # 80-column data rewritten by MPC
+            self.db.executemany("DELETE FROM observations WHERE obs_id=? AND key!=?",
+                                [ (row[3], row[0]) for row in rows if row[3] ])
+            self.db.executemany(_UPSERT, rows)
+
+
+    def add_ades(self, report_id: int, observations: list):
+        """
+        Bulk insert ADES observations (PSV rows) without WAMO data, these
+        rows have no WAMO status and are replaced by add_wamo() for the same report
+
+        :param report_id: report id
+        :type report_id: int
+        :param observations: list of dicts with ADES fields
+        :type observations: list
+        """
+        now = _now()
+        rows = []
+        for obs in observations:
+            key = f"{obs.get('trkSub')} {obs.get('stn')} {obs.get('obsTime')}"
+            try:
+                dt = datetime.fromisoformat(obs.get("obsTime").rstrip("Z"))
+                date_minus12 = (dt - timedelta(hours=12)).date().isoformat()
+            except (AttributeError, ValueError):
+                date_minus12 = None
+            rows.append((key, report_id, None, None, obs.get("trkSub"), None, obs.get("permID"), obs.get("provID"),
+                         obs.get("obsTime"), date_minus12, None, obs.get("ra"), obs.get("dec"), obs.get("mag"),
+                         obs.get("band"), None, obs.get("stn"), None, "", now, None))
+        with self.db:
+            self.db.executemany(_UPSERT, rows)
+
+
+    def query(self, obj: str=None, unpublished: bool=False, date_from: str=None, date_to: str=None,
+              code: str=None) -> list:
+        """
+        Query observations
+
+        :param obj: object designation (permId, provId, objId) or trkSub, defaults to None
+        :type obj: str, optional
+        :param unpublished: only observations not (yet) published according to WAMO,
+                            ADES rows without WAMO data are not included, defaults to False
+        :type unpublished: bool, optional
+        :param date_from: first night date YYYY-MM-DD (minus 12h), defaults to None
+        :type date_from: str, optional
+        :param date_to: last night date YYYY-MM-DD (minus 12h), defaults to None
+        :type date_to: str, optional
+        :param code: observatory code, defaults to None
+        :type code: str, optional
+        :return: list of sqlite3.Row
+        :rtype: list
+        """
+        where = []
+        params = []
+        if obj:
+            names = [obj, f"({obj})"] if obj.isdigit() else [obj]
+            where.append("(" + " OR ".join(f"{col} IN ({', '.join('?' * len(names))})"
+                                           for col in ("perm_id", "prov_id", "obj_id", "trksub")) + ")")
+            params += names * 4
+        if unpublished:
+            where.append("status != 'published' AND data80 IS NOT NULL")
+        if date_from:
+            where.append("date_minus12 >= ?")
+            params.append(date_from)
+        if date_to:
+            where.append("date_minus12 <= ?")
+            params.append(date_to)
+        if code:
+            where.append("code = ?")
+            params.append(code)
+        sql = "SELECT * FROM observations" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY date, key"
+        ic(sql, params)
+        return self.db.execute(sql, params).fetchall()
+
+
+    def state(self, wamo_ids) -> dict:
+        """
+        Get stored WAMO state of observations
+
+        :param wamo_ids: queried WAMO ids
+        :return: dict WAMO id -> list of sqlite3.Row with data80, obs_id, obj_id, publication, status
+        :rtype: dict
+        """
+        wamo_ids = list(wamo_ids)
+        state = {}
+        # SQLite limits the number of parameters per statement
+        for i in range(0, len(wamo_ids), 500):
+            chunk = wamo_ids[i : i + 500]
+            for row in self.db.execute("SELECT wamo_id, data80, obs_id, obj_id, publication, status FROM observations " +
+                                       "WHERE wamo_id IN (" + ", ".join("?" * len(chunk)) + ") ORDER BY date, key", chunk):
+                state.setdefault(row["wamo_id"], []).append(row)
+        return state
+
+
+    def count(self) -> tuple:
+        """ Number of (reports, observations) """
+        return (self.db.execute("SELECT COUNT(*) FROM reports").fetchone()[0],
+                self.db.execute("SELECT COUNT(*) FROM observations").fetchone()[0])
+
+
+
+class WAMORefresh:
+    """
+    Incremental WAMO refresh: published observations are taken from the
+    database, only observations with a status still changing are requested
+    """
+
+    def __init__(self, db: MPCObsDB):
+        self.db      = db
+        self.old     = {}           # (WAMO id, obsID) -> (status, publication) before refresh
+        self.changes = []           # (data80, obj_id, old status, new status, publication)
+        self.skipped = 0
+        self.queried = 0
+
+
+    def known(self, batches: list) -> dict:
+        """
+        Get WAMO results of published observations from database
+
+        :param batches: list of ids dicts, see mpc.mpcwamo.retrieve_from_wamo_planned()
+        :type batches: list
+        :return: dict id -> list of parsed WAMO data, for the known parameter of
+                 retrieve_from_wamo_planned()
+        :rtype: dict
+        """
+        ids = {}
+        for batch in batches:
+            ids.update(dict.fromkeys(batch or {}))
+        state = self.db.state(ids.keys())
+        known = {}
+        for k in ids.keys():
+            rows = state.get(k, [])
+            for row in rows:
+                self.old[(k, row["obs_id"])] = (row["status"], row["publication"])
+            # All observations for this id published, e.g. all of an ADES tracklet
+            if rows and all(row["status"] == STATUS_PUBLISHED for row in rows):
+                known[k] = [ { "data":          MPCData80(row["data80"]).get_obj(),
+                               "observationID": row["obs_id"],
+                               "objId":         row["obj_id"],
+                               "publication":   row["publication"] } for row in rows ]
+        self.skipped = len(known)
+        self.queried = len(ids) - len(known)
+        verbose(f"WAMO refresh: {self.skipped} ids published, {self.queried} ids to request")
+        return known
+
+
+    def update(self, wamo_list: list, wamo_ids: list):
+        """
+        Compare WAMO results with state before refresh
+
+        :param wamo_list: list of parsed WAMO data lists, as returned by retrieve_from_wamo_planned()
+        :type wamo_list: list
+        :param wamo_ids: list of queried ids lists, as returned by retrieve_from_wamo_planned(with_ids=True)
+        :type wamo_ids: list
+        """
+        seen = set()
+        for wamo, ids in zip(wamo_list, wamo_ids):
+            for w, id in zip(wamo or [], ids or []):
+                obs = (id, w["observationID"])
+                if obs in seen:
+                    continue
+                seen.add(obs)
+                data80 = w["data"]["data"]
+                (old_status, old_pub) = self.old.get(obs, (None, None))
+                if old_status == STATUS_PUBLISHED:
+                    # From database, unchanged
+                    continue
+                new_status = wamo_status(w["publication"])
+                new_pub    = w["publication"] or None
+                if old_status != new_status or old_pub != new_pub:
+                    self.changes.append((data80, w["objId"], old_status, new_status, new_pub))
+
+
+    def report(self, file: typing.TextIO=sys.stdout):
+        """ Print status changes since last run """
+        print(f"\nWAMO refresh: {self.skipped} published observations skipped, {self.queried} requested, " +
+              f"{len(self.changes)} changed", file=file)
+        for (data80, obj_id, old, new, pub) in sorted(self.changes, key=lambda c: (c[2] is not None, c[1] or "", c[0])):
+            old = "new" if old is None else (old or "unknown")
+            print(f"{obj_id or '-':12s} {data80[15:32]} {data80[77:80]}  {old:9s} -> {new or 'unknown':9s} {pub or ''}",
+                  file=file)
+
+
+
+def last_month() -> tuple:
+    """ First and last date of previous month as YYYY-MM-DD """
+    last = date.today().replace(day=1) - timedelta(days=1)
+    return (last.replace(day=1).isoformat(), last.isoformat())
+
+
+
+### Query as a command line script ###
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Query local MPC observation database",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("-f", "--file", help="SQLite database file, default "+OBSDB)
+    arg.add_argument("-o", "--object", help="observations of object or trkSub OBJECT")
+    arg.add_argument("-u", "--unpublished", action="store_true", help="unpublished observations only")
+    arg.add_argument("-c", "--code", help="observations from observatory CODE only")
+    arg.add_argument("--date-from", help="observations from night date YYYY-MM-DD")
+    arg.add_argument("--date-to", help="observations up to night date YYYY-MM-DD")
+    arg.add_argument("-L", "--last-month", action="store_true", help="observations from last month")
+
+    args = arg.parse_args()
+
+    if args.verbose:
+        verbose.set_prog(NAME)
+        verbose.enable()
+    if args.debug:
+        ic.enable()
+
+    (date_from, date_to) = last_month() if args.last_month else (args.date_from, args.date_to)
+
+    db = MPCObsDB(args.file or OBSDB)
+    verbose("%d reports, %d observations" % db.count())
+    t0 = time.perf_counter()
+    rows = db.query(obj=args.object, unpublished=args.unpublished, date_from=date_from, date_to=date_to, code=args.code)
+    t1 = time.perf_counter()
+    for row in rows:
+        print(row["data80"] or row["key"], " ", row["publication"] or row["status"] or "-")
+    verbose(f"{len(rows)} observations, query {(t1 - t0) * 1000:.1f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
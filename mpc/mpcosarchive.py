@@ -19,6 +19,25 @@
 #       MPC module to retrieve PDF from MPC/MPO/MPS archive
 # Version 1.0 / 2024-07-17
 #       Improvements, added Publication class
+# Version 1.1 / 2026-10-18
+#       MPCOSArchive(text=...) parses given archive page without network access
+#       Requests to MPC web server use shared "mpc" limiter from ratelimit
+#       and keep-alive session from httpclient
+#       Added --record, --replay options
+#       Accept http:// and port in archive URL
+#       Interval index per series with bisect for _search_dict(), new
+#       search_pubs() for many publications in one sorted sweep
+#       Optional local cache of the parsed archive index with conditional
+#       requests (ETag, If-Modified-Since) and offline mode, see
+#       set_archive_cache(), new -c/--cache, --offline options
+#       MPEC URLs computed locally from packed MPEC id, displaycirc.cgi only
+#       as a fallback, concurrent lookups and persistent id -> URL cache,
+#       see MPECResolver, set_mpec_cache(), new -m/--mpec-cache, --mpec-server
+#       options
+#       Archive page parsed while streaming the response (iter_lines) in a
+#       single pass, precompiled anchored patterns after prefix checks,
+#       MPCOSArchive(lines=...) parses any iterable of lines
+#       Archive page lines may be indented
 
 # Web page for MPC archive:
 # https://www.minorplanetcenter.net/iau/ECS/MPCArchive/MPCArchive.html
@@ -41,107 +60,287 @@
 #   <!-- Body postamble -->
 
 import argparse
+import json
+import os
 import re
-import requests
 import sys
+import threading
+import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 
 # The following libs must be installed with pip
 from icecream import ic
 # Disable debugging
 ic.disable()
 # Local modules
-from verbose import verbose, warning, error
+from verbose       import verbose, warning, error
+from ratelimit     import get_limiter
+from httpclient    import http_get, http_post
+from mpc.mpcreplay import start_replay
 
 
-VERSION = "1.0 / 2024-07-17"
+VERSION = "1.1 / 2026-10-18"
 AUTHOR  = "Martin Junius"
 NAME    = "mpcosarchive"
 
 ARCHIVE_URL = "https://www.minorplanetcenter.net/iau/ECS/MPCArchive/MPCArchive.html"
 MPEC_URL    = "https://cgi.minorplanetcenter.net/cgi-bin/displaycirc.cgi"
+MPEC_BASE   = "https://www.minorplanetcenter.net/mpec/"
 NEOCP_URL   = "https://www.minorplanetcenter.net/iau/NEO/toconfirm_tabular.html"
 PCCP_URL    = "https://www.minorplanetcenter.net/iau/NEO/pccp_tabular.html"
 
+# Publication id, e.g. "MPS 2145921"
+_PUB_RE = re.compile(r'([A-Z]+) *(\d+)$')
+# MPCArchive.html lines within the archive block
+_MAIN_START = "<!-- Main content block -->"
+_MAIN_END   = "<!-- Body postamble -->"
+_YEAR_RE    = re.compile(r'<h2>(\d\d\d\d)</h2>$')
+_DATE_RE    = re.compile(r'<li>(\d\d\d\d)/(\d\d)/(\d\d)$')
+_PDF_RE     = re.compile(r'<li><a href="(/iau/.+\.pdf)"><i>([A-Z]+)</i> *(\d+) *- *(\d+)</a>')
+_NOPDF_RE   = re.compile(r'<li><i>([A-Z]+)</i> *(\d+) *- *(\d+)')
+# MPEC id, e.g. "2023-P25"
+_MPEC_RE = re.compile(r'(\d\d)(\d\d)-([A-Y])(\d+)$')
+_B62     = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+TIMEOUT     = 60                # seconds
+MPC_RATE    = 2.0               # max. requests per second to MPC web server
+STREAM_CHUNK = 64 * 1024        # bytes, chunk size for streamed archive page
+
+# Rate limit and retries shared by all MPC web server requests
+_limiter = get_limiter("mpc", rate=MPC_RATE)
+
+ARCHIVE_CACHE   = "mpc-archive-cache.json"
+ARCHIVE_MAX_AGE = 3600          # seconds, no request at all if cache is younger
+
+MPEC_CACHE   = "mpc-mpec-cache.json"
+MPEC_WORKERS = 4                # max. concurrent displaycirc.cgi requests
+
+
+
+# Optional cache for the parsed archive index
+_archive_cache = None
+
+def set_archive_cache(file: str=ARCHIVE_CACHE, offline: bool=False, max_age: int=ARCHIVE_MAX_AGE):
+    """
+    Set cache file for archive index, used by MPCOSArchive()
+
+    :param file: JSON cache file, defaults to ARCHIVE_CACHE, None to disable
+    :type file: str, optional
+    :param offline: use cache only, never request archive page, defaults to False
+    :type offline: bool, optional
+    :param max_age: don't request archive page if cache is younger (seconds), defaults to ARCHIVE_MAX_AGE
+    :type max_age: int, optional
+    """
+    global _archive_cache
+    _archive_cache = { "file": file, "offline": offline, "max_age": max_age } if file else None
+
 
 
 class MPCOSArchive:
     """ MPC/MPO/MPS archive processing """
 
-    def __init__(self, url = ARCHIVE_URL):
+    def __init__(self, url = ARCHIVE_URL, text: str=None, lines=None):
         ic(url)
         self.pub_dict = {}
-        self.url_get(url)
-
-
-    def url_get(self, url = ARCHIVE_URL):
-        verbose(f"get {url}")
-        m = re.search(r'^(https+://[A-Za-z0-9_\-.]+)/', url)
+        self._index   = {}          # series -> (los, hi prefix max, items), sorted by lo
+        if text is not None:
+            # Archive page already retrieved
+            self._set_url(url)
+            self._parse_text(text)
+        elif lines is not None:
+            # Archive page from file or other iterable of lines
+            self._set_url(url)
+            self._parse_lines(lines)
+        else:
+            self.url_get(url)
+
+
+    def _set_url(self, url):
+        m = re.search(r'^(https?://[A-Za-z0-9_\-.]+(:\d+)?)/', url)
         if not m:
             raise ValueError
         self.url = url
         self.server = m.group(1)
-        r = requests.get(url)
+
+
+    def url_get(self, url = ARCHIVE_URL):
+        self._set_url(url)
+        cache = self._load_cache(url) if _archive_cache else None
+        if cache:
+            if _archive_cache["offline"]:
+                verbose(f"offline, archive index from {_archive_cache['file']}")
+                return
+            if time.time() - cache["fetched"] < _archive_cache["max_age"]:
+                verbose(f"archive index from {_archive_cache['file']}, fetched {time.ctime(cache['fetched'])}")
+                return
+        elif _archive_cache and _archive_cache["offline"]:
+            warning(f"offline, no archive index in {_archive_cache['file']} for {url}")
+            return
+
+        verbose(f"get {url}")
+        headers = {}
+        if cache and cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache and cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
+        r = _limiter.call(http_get, url, headers=headers, stream=True, timeout=TIMEOUT)
         ic(r)
+        if cache and r.status_code == 304:
+            verbose("archive page not modified")
+            r.close()
+            self._save_cache(url, cache.get("etag"), cache.get("last_modified"))
+            return
         r.raise_for_status()
-        self._parse_text(r.text)
+        self.pub_dict = {}
+        self._index   = {}
+        # Parse while receiving, no copy of the whole page in memory
+        r.encoding = r.encoding or "utf-8"
+        with r:
+            self._parse_lines(r.iter_lines(chunk_size=STREAM_CHUNK, decode_unicode=True))
         # print(self.pub_dict)
+        if _archive_cache:
+            self._save_cache(url, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+
+
+    def _load_cache(self, url) -> dict:
+        # Cached index for url, sets pub_dict
+        try:
+            with open(_archive_cache["file"], "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cache.get("url") != url:
+            return None
+        keys = ("lo", "hi", "pdf", "year", "date")
+        self.pub_dict = { mpx: [ dict(zip(keys, item)) for item in items ]
+                          for mpx, items in cache["pubs"].items() }
+        self._index = {}
+        return cache
+
+
+    def _save_cache(self, url, etag, last_modified):
+        # Compact form: lists instead of dicts per entry
+        cache = { "url": url, "etag": etag, "last_modified": last_modified, "fetched": time.time(),
+                  "pubs": { mpx: [ [ item["lo"], item["hi"], item["pdf"], item["year"], item["date"] ] for item in items ]
+                            for mpx, items in self.pub_dict.items() } }
+        tmp = _archive_cache["file"] + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f, separators=(",", ":"))
+        os.replace(tmp, _archive_cache["file"])
 
 
     def search_pub(self, pub):
         verbose(f"search for {pub}")
-        m = re.search(r'([A-Z]+) *(\d+)$', pub)
+        m = _PUB_RE.search(pub)
         if not m:
             return None
         mpx = m.group(1)
         n   = int(m.group(2))
         ic(mpx, n)
         return self._search_dict(mpx, n)
-    
+
+
+    def search_pubs(self, pubs) -> dict:
+        """
+        Search many publications, sorted by number in one sweep per series
+
+        :param pubs: publication ids, e.g. "MPS 2145921"
+        :return: dict publication id -> archive item or None
+        :rtype: dict
+        """
+        result = {}
+        queries = {}
+        for pub in pubs:
+            result[pub] = None
+            m = _PUB_RE.search(pub)
+            if m:
+                queries.setdefault(m.group(1), []).append((int(m.group(2)), pub))
+        for mpx, numbers in queries.items():
+            pos = 0
+            for n, pub in sorted(numbers):
+                (result[pub], pos) = self._lookup(mpx, n, pos)
+        return result
+
+
+    def _get_index(self, mpx) -> tuple:
+        # Build index on first use: items sorted by lo, for equal lo in
+        # list order, plus prefix maximum of hi for overlapping ranges
+        if mpx not in self._index:
+            list = self.pub_dict.get(mpx, [])
+            order = sorted(range(len(list)), key=lambda i: (list[i]["lo"], -i))
+            items = [ (i, list[i]) for i in order ]
+            max_hi = []
+            hi = -1
+            for i, item in items:
+                hi = max(hi, item["hi"])
+                max_hi.append(hi)
+            self._index[mpx] = ([ item["lo"] for i, item in items ], max_hi, items)
+        return self._index[mpx]
+
+
+    def _lookup(self, mpx, n, start=0) -> tuple:
+        # -> (item, position for next search with larger n)
+        (los, max_hi, items) = self._get_index(mpx)
+        pos = bisect_right(los, n, start) - 1
+        # Same result as a linear search of the list: first matching item
+        found = None
+        j = pos
+        while j >= 0 and max_hi[j] >= n:
+            (i, item) = items[j]
+            if item["hi"] >= n and (found is None or i < found[0]):
+                found = (i, item)
+            j -= 1
+        return (found[1] if found else None, max(pos, 0))
+
 
     def _search_dict(self, mpx, n):
-        list = self.pub_dict[mpx]
-        ##FIXME: more efficient search, list is already sorted, descending
-        for item in list:
-            lo = item["lo"]
-            hi = item["hi"]
-            if n >= lo and n <= hi:
-                return item
+        return self._lookup(mpx, n)[0]
 
 
     def _parse_text(self, text):
+        self._parse_lines(text.splitlines())
+
+
+    def _parse_lines(self, lines):
+        # Single pass, only the cheap marker test outside of the archive block,
+        # indentation is ignored
         in_arc_list = False
         year = "0000"
-        date = "0000/00/00"
-        for line in text.splitlines():
-            m = re.search(r'^<!-- Main content block -->$', line)
-            if m:
-                in_arc_list = True
-            m = re.search(r'^<!-- Body postamble -->$', line)
-            if m:
-                in_arc_list = False
-
-            if in_arc_list:
-                # ic(line)
-                m = re.search(r'^<h2>(\d\d\d\d)</h2>$', line)
+        date = "0000-00-00"
+        server = self.server
+        add = self._add_pub
+        for line in lines:
+            line = line.strip()
+            if not in_arc_list:
+                if line == _MAIN_START:
+                    in_arc_list = True
+                continue
+            if not line.startswith("<li>") and not line.startswith("<h2>"):
+                # Entry not at the start of the line, e.g. <ul><li>...
+                i = line.find("<li><")
+                if i > 0:
+                    line = line[i:]
+            if line.startswith("<li>"):
+                c = line[4:5]
+                if c == "<":
+                    m = _PDF_RE.match(line)
+                    if m:
+                        add(m.group(2), m.group(3), m.group(4), server + m.group(1), year, date)
+                        continue
+                    m = _NOPDF_RE.match(line)
+                    if m:
+                        add(m.group(1), m.group(2), m.group(3), None, year, date)
+                elif c.isdigit():
+                    m = _DATE_RE.match(line)
+                    if m:
+                        date = f"{m.group(1)}-{m.group(2)}-{m.group(3)}"
+            elif line.startswith("<h2>"):
+                m = _YEAR_RE.match(line)
                 if m:
                     year = m.group(1)
-                m = re.search(r'^<li>(\d\d\d\d/\d\d/\d\d)$', line)
-                if m:
-                    date = m.group(1).replace("/", "-")
-                m = re.search(r'<li><a href="(/iau/.+\.pdf)"><i>([A-Z]+)</i> *(\d+) *- *(\d+)</a>', line)
-                if m:
-                    pdf = self.server + m.group(1)
-                    mpx = m.group(2)
-                    lo  = m.group(3)
-                    hi  = m.group(4)
-                    self._add_pub(mpx, lo, hi, pdf, year, date)
-                m = re.search(r'<li><i>([A-Z]+)</i> *(\d+) *- *(\d+)', line)
-                if m:
-                    pdf = None
-                    mpx = m.group(1)
-                    lo  = m.group(2)
-                    hi  = m.group(3)
-                    self._add_pub(mpx, lo, hi, pdf, year, date)
+            elif line == _MAIN_END:
+                in_arc_list = False
 
 
     def _add_pub(self, mpx, lo, hi, pdf, year, date):
@@ -150,15 +349,151 @@ class MPCOSArchive:
             self.pub_dict[mpx] = []
         list = self.pub_dict[mpx]
         list.append({"lo": int(lo), "hi": int(hi), "pdf": pdf, "year": year, "date": date})
+        self._index.pop(mpx, None)
 
                 
 
+def mpec_location(id: str) -> str:
+    """
+    URL of MPEC computed from id, same as displaycirc.cgi redirect
+
+    :param id: MPEC id, e.g. "2023-P25"
+    :type id: str
+    :raises ValueError: id not valid
+    :return: URL, e.g. "https://www.minorplanetcenter.net/mpec/K23/K23P25.html"
+    :rtype: str
+    """
+    m = _MPEC_RE.match(id)
+    if not m:
+        raise ValueError(f"invalid MPEC id {id}")
+    (century, year, half, num) = (int(m.group(1)), m.group(2), m.group(3), int(m.group(4)))
+    # Packed number: 2 digits, 100..619 as A0..z9
+    if not 18 <= century <= 21 or num > 619:
+        raise ValueError(f"invalid MPEC id {id}")
+    packed_year = chr(ord("A") + century - 10) + year
+    packed_num  = f"{num:02d}" if num < 100 else _B62[num // 10] + str(num % 10)
+    return f"{MPEC_BASE}{packed_year}/{packed_year}{half}{packed_num}.html"
+
+
+
+class MPECResolver:
+    """ Resolve MPEC ids to URLs, with persistent cache """
+
+    def __init__(self, cache: str=None, local: bool=True, workers: int=MPEC_WORKERS):
+        """
+        Create resolver
+
+        :param cache: JSON cache file, defaults to None = no cache
+        :type cache: str, optional
+        :param local: compute URL locally, displaycirc.cgi only for invalid ids, defaults to True
+        :type local: bool, optional
+        :param workers: max. concurrent requests, defaults to MPEC_WORKERS
+        :type workers: int, optional
+        """
+        self.cache     = cache
+        self.local     = local
+        self.workers   = workers
+        self.urls      = {}         # MPEC id -> URL
+        self.computed  = 0
+        self.requested = 0
+        self._lock     = threading.Lock()
+        if cache:
+            try:
+                with open(cache, "r", encoding="utf-8") as f:
+                    self.urls = json.load(f)
+            except (OSError, ValueError):
+                pass
+        self._cached   = len(self.urls)
+
+
+    def _request(self, id: str) -> str:
+        # Example
+        # curl -v -d "S=M&F=P&N=2023-P25" https://cgi.minorplanetcenter.net/cgi-bin/displaycirc.cgi
+        # yields 302 redirect
+        # Location: https://www.minorplanetcenter.net/mpec/K23/K23P25.html
+        data = { "S": "M",  "F": "P",  "N": id }
+        x = _limiter.call(http_post, MPEC_URL, data=data, allow_redirects=False, timeout=TIMEOUT)
+        url = x.headers.get("Location")
+        ic(id, url)
+        with self._lock:
+            self.requested += 1
+        return url
+
+
+    def _resolve(self, id: str) -> str:
+        if self.local:
+            try:
+                url = mpec_location(id)
+                with self._lock:
+                    self.computed += 1
+                return url
+            except ValueError:
+                pass
+        return self._request(id)
+
+
+    def resolve(self, ids) -> dict:
+        """
+        Resolve MPEC ids, concurrent requests for ids neither cached nor computed locally
+
+        :param ids: MPEC ids, e.g. "2023-P25"
+        :type ids: iterable of str
+        :return: MPEC id -> URL, None if unknown
+        :rtype: dict
+        """
+        ids = list(dict.fromkeys(ids))
+        todo = [ id for id in ids if id not in self.urls ]
+        if todo:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(todo))) as pool:
+                for id, url in zip(todo, pool.map(self._resolve, todo)):
+                    if url:
+                        self.urls[id] = url
+            self.save()
+        return { id: self.urls.get(id) for id in ids }
+
+
+    def save(self):
+        """ Write cache file """
+        if not self.cache:
+            return
+        tmp = self.cache + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.urls, f, indent=0, sort_keys=True)
+        os.replace(tmp, self.cache)
+
+
+    def stats(self) -> str:
+        return (f"MPEC: {self._cached} cached, {self.computed} computed, {self.requested} requested" +
+                (f", cache {self.cache}" if self.cache else ""))
+
+
+
+# Options for MPECResolver used by Publication.print()
+_mpec_options = { "cache": None, "local": True }
+
+def set_mpec_cache(file: str=MPEC_CACHE, local: bool=True):
+    """
+    Set cache file for MPEC URLs, used by Publication.print()
+
+    :param file: JSON cache file, defaults to MPEC_CACHE, None to disable
+    :type file: str, optional
+    :param local: compute URL locally, else always request displaycirc.cgi, defaults to True
+    :type local: bool, optional
+    """
+    _mpec_options["cache"] = file
+    _mpec_options["local"] = local
+
+
+
 class Publication:
     _cache = {}
 
 
     def add(pub):
-            Publication._cache[pub] = True
+        # Not yet published
+        if isinstance(pub, str) and pub.startswith("Processing queue"):
+            return
+        Publication._cache[pub] = True
 
 
     def print(file=sys.stdout):
@@ -166,17 +501,27 @@ class Publication:
             arc = MPCOSArchive()
 
             print("\nPublished:", file=file)
+            found = arc.search_pubs(id for id in Publication._cache.keys()
+                                    if not id.startswith("MPEC ") and id != "NEOCP/PCCP")
+            mpecs = {}
             for id in Publication._cache.keys():
                 m = re.search(r'^MPEC (\d\d\d\d-[A-Z]\d+)', id)
                 if m:
-                    print(f"{id}:", Publication._MPEC_link(m.group(1)), file=file)
+                    mpecs[id] = m.group(1)
+            resolver = MPECResolver(**_mpec_options)
+            mpec_urls = resolver.resolve(mpecs.values())
+            verbose(resolver.stats())
+
+            for id in Publication._cache.keys():
+                if id in mpecs:
+                    print(f"{id}:", mpec_urls[mpecs[id]] or "unknown", file=file)
                     continue
                 if id == "NEOCP/PCCP":
                     print(f"{id}:", NEOCP_URL)
                     print("     or   :", PCCP_URL)
                     continue
 
-                r = arc.search_pub(id)
+                r = found.get(id)
                 if r:
                     print(f"{id}:", r["pdf"], file=file)
                 else:
@@ -184,19 +529,7 @@ class Publication:
 
 
     def _MPEC_link(id):
-        # Example
-        # curl -v -d "S=M&F=P&N=2023-P25" https://cgi.minorplanetcenter.net/cgi-bin/displaycirc.cgi
-        # yields 302 redirect
-        # Location: https://www.minorplanetcenter.net/mpec/K23/K23P25.html
-
-        data = { "S": "M",  "F": "P",  "N": id }
-        x = requests.post(MPEC_URL, data=data, allow_redirects=False)
-
-        # print(x.headers)
-        url = x.headers["Location"]
-        ic(id, url)
-
-        return url
+        return MPECResolver(local=False)._request(id)
 
 
 
@@ -209,6 +542,12 @@ def main():
         epilog      = "Version " + VERSION + " / " + AUTHOR)
     arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
     arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("--record", help="record all HTTP requests to SQLite store RECORD")
+    arg.add_argument("--replay", help="replay HTTP requests from SQLite store REPLAY, no network access")
+    arg.add_argument("-c", "--cache", help=f"cache archive index in CACHE, e.g. {ARCHIVE_CACHE}")
+    arg.add_argument("--offline", action="store_true", help="use archive index from CACHE only")
+    arg.add_argument("-m", "--mpec-cache", help=f"cache MPEC URLs in MPEC_CACHE, e.g. {MPEC_CACHE}")
+    arg.add_argument("--mpec-server", action="store_true", help="always request MPEC URLs from displaycirc.cgi")
     arg.add_argument("pub", nargs="+", help="publication id")
 
     args = arg.parse_args()
@@ -220,12 +559,35 @@ def main():
         ic.enable()
 
 
+    replay = None
+    if args.record or args.replay:
+        replay = start_replay(args.record or args.replay, record=bool(args.record))
+
+    if args.cache:
+        set_archive_cache(args.cache, args.offline)
+
+    t0 = time.perf_counter()
     arc = MPCOSArchive()
+    verbose(f"archive index {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    mpecs = [ arg.removeprefix("MPEC ") for arg in args.pub if _MPEC_RE.match(arg.removeprefix("MPEC ")) ]
+    if mpecs:
+        resolver = MPECResolver(args.mpec_cache, local=not args.mpec_server)
+        t0 = time.perf_counter()
+        for id, url in resolver.resolve(mpecs).items():
+            print(f"MPEC {id}: {url}")
+        verbose(f"{resolver.stats()}, {(time.perf_counter() - t0) * 1000:.1f} ms")
 
     for arg in args.pub:
+        if _MPEC_RE.match(arg.removeprefix("MPEC ")):
+            continue
         r = arc.search_pub(arg)
         print(r)
 
+    if replay:
+        verbose(replay.stats())
+        replay.close()
+
 
 
 if __name__ == "__main__":
@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from mpc.mpcparsecache import parse_80_cached, parse_ades_cached
+#   batch   = parse_80_cached(file)         MPCData80Batch
+#   columns = parse_ades_cached(file)       dict field -> column
+#
+# Sidecar file format (FILE + ".parsecache")
+#   MAGIC
+#   header length, 8 bytes little endian
+#   header JSON: source, size, mtime_ns, n, columns [ {name, type, width, offset, length} ]
+#   column data, 8 byte aligned
+#       type "d": array of doubles
+#       type "s": fixed-width strings, UTF-8, width in bytes, padded with NUL
+
+# ChangeLog
+# Version 0.1 / 2026-10-18
+#       Binary columnar cache for parsed 80-column and ADES PSV files,
+#       invalidated by source size and mtime, loaded via mmap
+#       String columns UTF-8 instead of latin-1, new MAGIC
+#       Short ADES rows padded, column lengths checked against n
+
+import argparse
+import csv
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+
+# The following libs must be installed with pip
+from icecream import ic
+# Disable debugging
+ic.disable()
+# Local modules
+from verbose       import verbose, warning, error
+from mpc.mpcdata80 import MPCData80Batch
+
+
+VERSION = "0.1 / 2026-10-18"
+AUTHOR  = "Martin Junius"
+NAME    = "mpcparsecache"
+
+MAGIC  = b"MPCPARSECACHE2\n\0"
+SUFFIX = ".parsecache"
+
+
+
+class FixedWidthColumn:
+    """ Read-only sequence of str, stored as fixed-width UTF-8 bytes """
+
+    def __init__(self, buffer: memoryview, width: int, n: int):
+        self._buffer = buffer
+        self._width  = width
+        self._n      = n
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [ self[j] for j in range(*i.indices(self._n)) ]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        w = self._width
+        return str(self._buffer[i * w : (i + 1) * w], "utf-8").rstrip("\0")
+
+    def __eq__(self, other):
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+
+
+def _cache_file(file: str, cache_dir: str=None) -> str:
+    if cache_dir:
+        return os.path.join(cache_dir, os.path.basename(file) + SUFFIX)
+    return file + SUFFIX
+
+
+def _stat(file: str) -> tuple:
+    st = os.stat(file)
+    return (st.st_size, st.st_mtime_ns)
+
+
+def write_cache(file: str, columns: dict, n: int, cache_dir: str=None):
+    """
+    Write columns to sidecar cache file
+
+    :param file: source file
+    :type file: str
+    :param columns: dict name -> array("d") or list of str
+    :type columns: dict
+    :param n: number of rows, all columns must have n entries
+    :type n: int
+    :param cache_dir: directory for cache file, defaults to None = next to source file
+    :type cache_dir: str, optional
+    """
+    for name, col in columns.items():
+        if len(col) != n:
+            raise ValueError(f"column {name}: {len(col)} entries, expected {n}")
+    (size, mtime_ns) = _stat(file)
+    header = { "source": os.path.abspath(file), "size": size, "mtime_ns": mtime_ns, "n": n, "columns": [] }
+    blobs  = []
+    offset = 0
+    for name, col in columns.items():
+        if isinstance(col, array):
+            blob = col.tobytes()
+            desc = { "name": name, "type": "d", "width": 8 }
+        else:
+            enc   = [ s.encode("utf-8") for s in col ]
+            width = max((len(b) for b in enc), default=0) or 1
+            blob  = b"".join(b.ljust(width, b"\0") for b in enc)
+            desc  = { "name": name, "type": "s", "width": width }
+        desc["offset"] = offset
+        desc["length"] = len(blob)
+        pad = -len(blob) % 8
+        blobs.append(blob + b"\0" * pad)
+        offset += len(blob) + pad
+        header["columns"].append(desc)
+
+    hdr = json.dumps(header).encode("utf-8")
+    hdr += b" " * (-(len(MAGIC) + 8 + len(hdr)) % 8)
+    cache = _cache_file(file, cache_dir)
+    tmp = cache + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(hdr)))
+        f.write(hdr)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, cache)
+    verbose(f"wrote {cache}")
+
+
+def read_cache(file: str, cache_dir: str=None) -> tuple:
+    """
+    Read columns from sidecar cache file, if still valid
+
+    :param file: source file
+    :type file: str
+    :param cache_dir: directory for cache file, defaults to None = next to source file
+    :type cache_dir: str, optional
+    :return: (n, dict name -> column) or None if no valid cache
+    :rtype: tuple
+    """
+    cache = _cache_file(file, cache_dir)
+    if not os.path.exists(cache):
+        return None
+    with open(cache, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+    if mm[0:len(MAGIC)] != MAGIC:
+        return None
+    pos = len(MAGIC)
+    (hlen,) = struct.unpack("<Q", mm[pos : pos + 8])
+    pos += 8
+    header = json.loads(mm[pos : pos + hlen])
+    pos += hlen
+    (size, mtime_ns) = _stat(file)
+    if header["source"] != os.path.abspath(file) or header["size"] != size or header["mtime_ns"] != mtime_ns:
+        verbose(f"stale {cache}")
+        return None
+
+    # Zero-copy views into the mapped file, the mmap stays open as long as views exist
+    mv = memoryview(mm)
+    n = header["n"]
+    columns = {}
+    for desc in header["columns"]:
+        if desc["length"] != desc["width"] * n:
+            verbose(f"invalid column {desc['name']} in {cache}")
+            return None
+        buf = mv[pos + desc["offset"] : pos + desc["offset"] + desc["length"]]
+        if desc["type"] == "d":
+            columns[desc["name"]] = buf.cast("d")
+        else:
+            columns[desc["name"]] = FixedWidthColumn(buf, desc["width"], n)
+    verbose(f"read {cache}")
+    return (n, columns)
+
+
+
+_BATCH_COLUMNS = MPCData80Batch._STR_COLUMNS + MPCData80Batch._ARRAY_COLUMNS
+
+
+def parse_80_cached(file: str, cache_dir: str=None, refresh: bool=False) -> MPCData80Batch:
+    """
+    Parse file with 80-column data, using sidecar cache
+
+    :param file: file name
+    :type file: str
+    :param cache_dir: directory for cache file, defaults to None = next to source file
+    :type cache_dir: str, optional
+    :param refresh: ignore existing cache, defaults to False
+    :type refresh: bool, optional
+    :return: batch, columns are read-only sequences when loaded from cache
+    :rtype: MPCData80Batch
+    """
+    cached = None if refresh else read_cache(file, cache_dir)
+    if cached:
+        (n, columns) = cached
+        batch = MPCData80Batch()
+        for c in _BATCH_COLUMNS:
+            setattr(batch, c, columns[c])
+        return batch
+
+    batch = MPCData80Batch.from_file(file)
+    try:
+        write_cache(file, { c: getattr(batch, c) for c in _BATCH_COLUMNS }, len(batch), cache_dir)
+    except OSError as e:
+        warning(f"can't write cache for {file}: {e}")
+    return batch
+
+
+def parse_ades(file: str) -> tuple:
+    """
+    Parse observations of ADES PSV file into str columns
+
+    :param file: file name
+    :type file: str
+    :return: (n, dict field -> list of str)
+    :rtype: tuple
+    """
+    with open(file, "r", newline="") as fh:
+        # Skip # / ! header lines
+        while True:
+            pos = fh.tell()
+            line = fh.readline()
+            if not line or not (line.startswith("#") or line.startswith("!")):
+                break
+        fh.seek(pos)
+        reader = csv.reader(fh, delimiter='|', quoting=csv.QUOTE_NONE)
+        fields = [ f.strip() for f in next(reader, []) ]
+        columns = { f: [] for f in fields if f }
+        n = 0
+        for row in reader:
+            if not row:
+                continue
+            # Short or truncated rows padded with empty values, keeps all columns aligned
+            if len(row) < len(fields):
+                row += [ "" ] * (len(fields) - len(row))
+            for f, v in zip(fields, row):
+                if f:
+                    columns[f].append(v.strip())
+            n += 1
+    return (n, columns)
+
+
+def parse_ades_cached(file: str, cache_dir: str=None, refresh: bool=False) -> dict:
+    """
+    Parse observations of ADES PSV file, using sidecar cache
+
+    :param file: file name
+    :type file: str
+    :param cache_dir: directory for cache file, defaults to None = next to source file
+    :type cache_dir: str, optional
+    :param refresh: ignore existing cache, defaults to False
+    :type refresh: bool, optional
+    :return: dict field -> column of str
+    :rtype: dict
+    """
+    cached = None if refresh else read_cache(file, cache_dir)
+    if cached:
+        return cached[1]
+
+    (n, columns) = parse_ades(file)
+    try:
+        write_cache(file, columns, n, cache_dir)
+    except OSError as e:
+        warning(f"can't write cache for {file}: {e}")
+    return columns
+
+
+
+def _is_ades(file: str) -> bool:
+    with open(file, "r") as fh:
+        return fh.readline().strip() == "# version=2017"
+
+
+### Test run as a command line script ###
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Cached parsing of 80-column and ADES PSV files",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("-r", "--refresh", action="store_true", help="ignore and rebuild existing cache")
+    arg.add_argument("-c", "--cache-dir", help="directory for cache files, default next to FILE")
+    arg.add_argument("file", nargs="+", help="80-column or ADES PSV file")
+
+    args = arg.parse_args()
+
+    if args.verbose:
+        verbose.set_prog(NAME)
+        verbose.enable()
+    if args.debug:
+        ic.enable()
+
+    for file in args.file:
+        ades = _is_ades(file)
+        t0 = time.perf_counter()
+        if ades:
+            result = parse_ades_cached(file, args.cache_dir, args.refresh)
+            n = len(next(iter(result.values()), []))
+        else:
+            result = parse_80_cached(file, args.cache_dir, args.refresh)
+            n = len(result)
+        t1 = time.perf_counter()
+        print(f"{file}: {'ADES' if ades else '80-column'}, {n} observations, {t1 - t0:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
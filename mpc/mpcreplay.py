@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from mpc.mpcreplay import start_replay
+#   replay = start_replay(file, record=True)     # record all HTTP exchanges
+#   replay = start_replay(file)                  # replay, no network access
+#   ...
+#   replay.close()
+#
+# All requests made via httpclient (WAMO, MPCArchive.html, displaycirc.cgi)
+# are stored with method, URL and request body as the key. In replay mode
+# requests not found in the store fail with ReplayMissing, rate limits are
+# disabled. Conditional requests (If-None-Match, If-Modified-Since) share the
+# key with the unconditional request, the stored 200 is a valid answer to both.
+
+# ChangeLog
+# Version 0.1 / 2026-10-18
+#       Record/replay HTTP traffic to/from local SQLite store
+#       Replayed responses support iter_lines() for streamed requests
+#       Recorded 2xx responses are not replaced by 304 responses to conditional
+#       requests, stored 304 is not replayed for unconditional requests
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import threading
+import typing
+import zlib
+
+# The following libs must be installed with pip
+import requests
+from requests.structures import CaseInsensitiveDict
+from icecream import ic
+# Disable debugging
+ic.disable()
+# Local modules
+from verbose    import verbose, warning, error
+from httpclient import set_http_hook
+from ratelimit  import enable_limits
+
+
+VERSION = "0.1 / 2026-10-18"
+AUTHOR  = "Martin Junius"
+NAME    = "mpcreplay"
+
+REPLAY_STORE = "mpc-replay.sqlite"
+
+
+
+_CONDITIONAL = ("If-None-Match", "If-Modified-Since")
+
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exchange (
+    key         TEXT PRIMARY KEY,       -- SHA-256 of method, URL, body
+    method      TEXT,
+    url         TEXT,
+    status      INTEGER,
+    reason      TEXT,
+    headers     TEXT,                   -- JSON
+    content     BLOB                    -- zlib compressed
+);
+"""
+
+
+
+class ReplayMissing(requests.RequestException):
+    """ Request not found in replay store """
+
+
+
+def request_key(method: str, url: str, **kwargs) -> tuple:
+    """
+    Key for HTTP request
+
+    :param method: HTTP method
+    :type method: str
+    :param url: URL
+    :type url: str
+    :return: (key, final URL)
+    :rtype: tuple
+    """
+    p = requests.Request(method, url, params=kwargs.get("params"), data=kwargs.get("data"),
+                         json=kwargs.get("json")).prepare()
+    body = p.body or b""
+    if isinstance(body, str):
+        body = body.encode()
+    h = hashlib.sha256(f"{p.method} {p.url}\n".encode())
+    h.update(body)
+    return (h.hexdigest(), p.url)
+
+
+
+class HTTPReplay:
+    """ Record/replay HTTP exchanges, hook for httpclient """
+
+    def __init__(self, file: str=REPLAY_STORE, record: bool=False):
+        """
+        Open/create replay store
+
+        :param file: SQLite database file, defaults to REPLAY_STORE
+        :type file: str, optional
+        :param record: record exchanges, else replay, defaults to False
+        :type record: bool, optional
+        """
+        ic(file, record)
+        self.file     = file
+        self.record   = record
+        self.recorded = 0
+        self.replayed = 0
+        self.missing  = 0
+        self._lock    = threading.Lock()
+        self.db = sqlite3.connect(file, check_same_thread=False)
+        self.db.executescript(_SCHEMA)
+
+
+    def close(self):
+        with self._lock:
+            self.db.commit()
+            self.db.close()
+
+
+    def __call__(self, send: typing.Callable, method: str, url: str, **kwargs) -> requests.Response:
+        (key, full_url) = request_key(method, url, **kwargs)
+        conditional = any(h in (kwargs.get("headers") or {}) for h in _CONDITIONAL)
+        if self.record:
+            response = send(method, url, **kwargs)
+            self._store(key, method, full_url, response)
+            return response
+        return self._load(key, method, full_url, conditional)
+
+
+    def _store(self, key: str, method: str, url: str, response: requests.Response):
+        # Last response wins, e.g. after retries of 429/5xx, but a 304 never
+        # replaces a recorded 2xx
+        row = (key, method, url, response.status_code, response.reason,
+               json.dumps(dict(response.headers)), zlib.compress(response.content))
+        with self._lock:
+            if response.status_code == 304:
+                self.db.execute("INSERT INTO exchange (key, method, url, status, reason, headers, content) " +
+                                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET " +
+                                "status=excluded.status, reason=excluded.reason, headers=excluded.headers, " +
+                                "content=excluded.content WHERE status NOT BETWEEN 200 AND 299", row)
+            else:
+                self.db.execute("INSERT OR REPLACE INTO exchange (key, method, url, status, reason, headers, content) " +
+                                "VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+            self.db.commit()
+            self.recorded += 1
+
+
+    def _load(self, key: str, method: str, url: str, conditional: bool=False) -> requests.Response:
+        with self._lock:
+            row = self.db.execute("SELECT status, reason, headers, content FROM exchange WHERE key=?",
+                                  (key,)).fetchone()
+            # 304 is no answer to an unconditional request
+            if not row or (row[0] == 304 and not conditional):
+                self.missing += 1
+                raise ReplayMissing(f"not in replay store: {method} {url}")
+            self.replayed += 1
+        (status, reason, headers, content) = row
+        response = requests.Response()
+        response.status_code = status
+        response.reason      = reason
+        response.headers     = CaseInsensitiveDict(json.loads(headers))
+        response.url         = url
+        response._content    = zlib.decompress(content)
+        response._content_consumed = True       # iter_content()/iter_lines() from _content
+        response.encoding    = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+
+    def count(self) -> int:
+        with self._lock:
+            (n,) = self.db.execute("SELECT COUNT(*) FROM exchange").fetchone()
+        return n
+
+
+    def list(self) -> list:
+        """ List of (method, url, status) """
+        with self._lock:
+            return self.db.execute("SELECT method, url, status FROM exchange ORDER BY url").fetchall()
+
+
+    def stats(self) -> str:
+        """ Statistics of this session """
+        if self.record:
+            return f"Replay store {self.file}: {self.recorded} exchanges recorded"
+        return f"Replay store {self.file}: {self.replayed} exchanges replayed, {self.missing} missing"
+
+
+
+def start_replay(file: str=REPLAY_STORE, record: bool=False) -> HTTPReplay:
+    """
+    Start recording/replaying all HTTP requests
+
+    :param file: SQLite database file, defaults to REPLAY_STORE
+    :type file: str, optional
+    :param record: record exchanges, else replay, defaults to False
+    :type record: bool, optional
+    :return: replay object, for stats() and close()
+    :rtype: HTTPReplay
+    """
+    replay = HTTPReplay(file, record)
+    set_http_hook(replay)
+    if not record:
+        # No need to be polite to the local store
+        enable_limits(False)
+    verbose(f"{'recording to' if record else 'replaying from'} {file}")
+    return replay
+
+
+
+### Test run as a command line script ###
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "List recorded HTTP exchanges",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("-f", "--file", default=REPLAY_STORE, help=f"replay store, default {REPLAY_STORE}")
+    arg.add_argument("-l", "--list", action="store_true", help="list all exchanges")
+
+    args = arg.parse_args()
+
+    if args.verbose:
+        verbose.set_prog(NAME)
+        verbose.enable()
+    if args.debug:
+        ic.enable()
+
+    replay = HTTPReplay(args.file)
+    if args.list:
+        for method, url, status in replay.list():
+            print(f"{status} {method:4s} {url}")
+    print(f"{replay.count()} exchanges")
+    replay.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   python -m mpc.mpcserver [-p PORT] [--latency S] [--errors P] [--throttle P]
+#       serve until Ctrl-C, use e.g. python -m mpc.mpcwamo -u URL ...
+#   python -m mpc.mpcserver -L [-c 1,4,8] [-b 50,100,500] [-n N]
+#       load test mpc.mpcwamo / mpc.mpcosarchive against the local server
+#
+#   from mpc.mpcserver import MPCStandIn
+#   server = MPCStandIn(latency=0.1, throttle=0.05).start()
+#   ... server.wamo_url, server.archive_url, server.mpec_url
+#   server.stop()
+#
+# Endpoints, close enough to the real ones for mpc.mpcwamo and mpc.mpcosarchive:
+#   GET  /api/wamo                              WAMO JSON API, synthetic
+#        observations from mpc.mpcbench, 80-column lines not in the table
+#        are answered as published
+#   GET  /iau/ECS/MPCArchive/MPCArchive.html    synthetic archive page, with
+#        ETag/Last-Modified and 304 responses to conditional requests
+#   POST /cgi-bin/displaycirc.cgi               302 redirect to MPEC URL
+
+# ChangeLog
+# Version 0.1 / 2026-10-18
+#       Local stand-in server for WAMO/MPC with latency, error and 429
+#       injection, load driver for WAMO concurrency and batch sizes
+#       Conditional requests for archive page
+#       MPEC redirect uses mpcosarchive.mpec_location(), MPEC resolver timings
+
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+# The following libs must be installed with pip
+from icecream import ic
+# Disable debugging
+ic.disable()
+# Local modules
+from verbose          import verbose, warning, error
+from ratelimit        import get_limiter
+from httpclient       import set_http_hook
+from mpc.mpcbench     import gen_wamo_json, gen_archive_html
+import mpc.mpcosarchive
+from mpc.mpcwamo      import retrieve_from_wamo_planned
+from mpc.mpcosarchive import MPCOSArchive, MPECResolver, mpec_location
+
+
+VERSION = "0.1 / 2026-10-18"
+AUTHOR  = "Martin Junius"
+NAME    = "mpcserver"
+
+WAMO_PATH    = "/api/wamo"
+ARCHIVE_PATH = "/iau/ECS/MPCArchive/MPCArchive.html"
+MPEC_PATH    = "/cgi-bin/displaycirc.cgi"
+
+N_OBS        = 10000        # number of synthetic observations
+REPORT_SIZE  = 20           # ids per report for the load driver
+
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        ic(format % args)
+
+
+    def _send(self, status: int, body: bytes=b"", content_type: str="application/json", headers: dict=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def _body(self) -> bytes:
+        n = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(n) if n else b""
+
+
+    def _fault(self) -> bool:
+        # Latency and injected errors, True if request has been answered
+        standin = self.server.standin
+        (delay, fault) = standin.roll()
+        if delay > 0:
+            time.sleep(delay)
+        if fault == 429:
+            standin.count("429")
+            self._send(429, b"Too Many Requests", "text/plain", { "Retry-After": f"{standin.retry_after:g}" })
+            return True
+        if fault == 500:
+            standin.count("500")
+            self._send(500, b"Internal Server Error", "text/plain")
+            return True
+        return False
+
+
+    def do_GET(self):
+        standin = self.server.standin
+        path = self.path.split("?")[0]
+        body = self._body()
+        if path == WAMO_PATH:
+            standin.count("wamo")
+            if not self._fault():
+                query = json.loads(body or b"[]")
+                if isinstance(query, dict):
+                    query = query.get("obs", [])
+                self._send(200, json.dumps(standin.wamo(query)).encode())
+        elif path == ARCHIVE_PATH:
+            standin.count("archive")
+            if not self._fault():
+                headers = { "ETag": standin.archive_etag, "Last-Modified": standin.archive_modified }
+                # If-None-Match takes precedence
+                etag = self.headers.get("If-None-Match")
+                if etag == standin.archive_etag if etag else \
+                   self.headers.get("If-Modified-Since") == standin.archive_modified:
+                    standin.count("archive 304")
+                    self.send_response(304)
+                    for k, v in headers.items():
+                        self.send_header(k, v)
+                    self.end_headers()
+                else:
+                    self._send(200, standin.archive_html, "text/html; charset=utf-8", headers)
+        else:
+            self._send(404, b"Not Found", "text/plain")
+
+
+    def do_POST(self):
+        standin = self.server.standin
+        path = self.path.split("?")[0]
+        body = self._body()
+        if path == MPEC_PATH:
+            standin.count("mpec")
+            if not self._fault():
+                id = parse_qs(body.decode()).get("N", [""])[0]
+                try:
+                    self._send(302, headers={ "Location": mpec_location(id) }, content_type="text/html")
+                except (ValueError, IndexError):
+                    self._send(200, b"<html>No such circular</html>", "text/html")
+        else:
+            self._send(404, b"Not Found", "text/plain")
+
+
+
+class MPCStandIn:
+    """ Local stand-in for WAMO and MPC web server, threaded """
+
+    def __init__(self, host: str="127.0.0.1", port: int=0, latency: float=0.0, jitter: float=0.0,
+                 errors: float=0.0, throttle: float=0.0, retry_after: float=1.0,
+                 n_obs: int=N_OBS, seed: int=None):
+        """
+        Create server
+
+        :param host: listen address, defaults to "127.0.0.1"
+        :type host: str, optional
+        :param port: port, defaults to 0 = any free port
+        :type port: int, optional
+        :param latency: response latency in seconds, defaults to 0.0
+        :type latency: float, optional
+        :param jitter: random additional latency 0...jitter seconds, defaults to 0.0
+        :type jitter: float, optional
+        :param errors: probability of 500 responses, defaults to 0.0
+        :type errors: float, optional
+        :param throttle: probability of 429 responses, defaults to 0.0
+        :type throttle: float, optional
+        :param retry_after: Retry-After of 429 responses in seconds, defaults to 1.0
+        :type retry_after: float, optional
+        :param n_obs: number of synthetic observations, defaults to N_OBS
+        :type n_obs: int, optional
+        :param seed: random seed for faults and latency, defaults to None
+        :type seed: int, optional
+        """
+        self.latency     = latency
+        self.jitter      = jitter
+        self.errors      = errors
+        self.throttle    = throttle
+        self.retry_after = retry_after
+        self.counts      = {}
+        self._random     = random.Random(seed)
+        self._lock       = threading.Lock()
+
+        (response, self.ids) = gen_wamo_json(n_obs)
+        # Observations can be queried by obsid or 80-column data
+        self._table = {}
+        for item in response["found"]:
+            for obsid, obs_list in item.items():
+                self._table[obsid] = obs_list
+                self._table[obs_list[0]["obs80"]] = obs_list
+        self.set_archive(gen_archive_html())
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.standin = self
+        self._thread = None
+
+
+    def set_archive(self, html: str):
+        """ Set archive page """
+        self.archive_html     = html.encode()
+        self.archive_etag     = '"' + hashlib.sha1(self.archive_html).hexdigest() + '"'
+        self.archive_modified = formatdate(usegmt=True)
+
+
+    @property
+    def url(self) -> str:
+        (host, port) = self.httpd.server_address[0:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def wamo_url(self) -> str:
+        return self.url + WAMO_PATH
+
+    @property
+    def archive_url(self) -> str:
+        return self.url + ARCHIVE_PATH
+
+    @property
+    def mpec_url(self) -> str:
+        return self.url + MPEC_PATH
+
+
+    def start(self):
+        """ Start server in background thread, returns self """
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        verbose(f"stand-in server at {self.url}")
+        return self
+
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+    def roll(self) -> tuple:
+        """ Random latency and fault (None, 429, 500) for next request """
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter) if self.jitter else self.latency
+            r = self._random.random()
+        if r < self.throttle:
+            return (delay, 429)
+        if r < self.throttle + self.errors:
+            return (delay, 500)
+        return (delay, None)
+
+
+    def count(self, key: str):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+    def wamo(self, query: list) -> dict:
+        """ WAMO JSON response for list of queried ids """
+        found = []
+        not_found = []
+        for key in query:
+            obs_list = self._table.get(key)
+            if obs_list is None and len(key) == 80:
+                obs_list = [ { "obsid": "", "obs80": key, "iau_desig": "", "ref": "", "trksub": "",
+                               "input_type": "obs80",
+                               "status_decoded": f"{key} (00000000000000000000000000) " +
+                                                 f"has been identified as {key[0:12].strip()} and published in MPEC 2024-A01." } ]
+            if obs_list is None:
+                not_found.append(key)
+            else:
+                found.append({ key: obs_list })
+        return { "found": found, "not_found": not_found }
+
+
+
+def _percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_load(server: MPCStandIn, n_ids: int, concurrency: list, batch_sizes: list,
+             rate: float=0.0, backoff: float=None) -> list:
+    """
+    Load test WAMO retrieval against stand-in server
+
+    :param server: running stand-in server
+    :type server: MPCStandIn
+    :param n_ids: number of ids to retrieve per run
+    :type n_ids: int
+    :param concurrency: list of max. parallel requests
+    :type concurrency: list
+    :param batch_sizes: list of max. ids per request
+    :type batch_sizes: list
+    :param rate: max. requests per second, defaults to 0.0 = no limit
+    :type rate: float, optional
+    :param backoff: base for retry backoff in seconds, defaults to None = unchanged
+    :type backoff: float, optional
+    :return: list of result dicts, one per combination
+    :rtype: list
+    """
+    keys = list(server.ids.keys())[0:n_ids]
+    # Split into reports like mpc-retrieve-reports/-ack
+    reports = [ { k: server.ids[k] for k in keys[i : i + REPORT_SIZE] } for i in range(0, len(keys), REPORT_SIZE) ]
+    limiter = get_limiter("wamo")
+    if backoff is not None:
+        limiter.backoff = backoff
+
+    latencies = []
+    def hook(send, method, url, **kwargs):
+        t = time.perf_counter()
+        try:
+            return send(method, url, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - t)
+
+    results = []
+    set_http_hook(hook)
+    try:
+        for c, b in itertools.product(concurrency, batch_sizes):
+            latencies.clear()
+            before = limiter.stats()
+            t0 = time.perf_counter()
+            wamo = retrieve_from_wamo_planned(reports, b, c, rate, server.wamo_url)
+            wall = time.perf_counter() - t0
+            after = limiter.stats()
+            n_found = sum(len(w) for w in wamo if w)
+            results.append({ "concurrency": c, "batch_size": b, "wall": wall, "found": n_found,
+                             "requests": after["requests"] - before["requests"],
+                             "retries":  after["retries"] - before["retries"],
+                             "failed":   after["failed"] - before["failed"],
+                             "ids_s":    len(keys) / wall,
+                             "p50":      _percentile(latencies, 0.50),
+                             "p95":      _percentile(latencies, 0.95),
+                             "p99":      _percentile(latencies, 0.99) })
+    finally:
+        set_http_hook(None)
+    return results
+
+
+def print_load(results: list):
+    print(f"{'conc':>4} {'batch':>5} {'requests':>8} {'retries':>7} {'failed':>6} {'found':>6} " +
+          f"{'ids/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'wall s':>7}")
+    for r in results:
+        print(f"{r['concurrency']:4d} {r['batch_size']:5d} {r['requests']:8d} {r['retries']:7d} {r['failed']:6d} " +
+              f"{r['found']:6d} {r['ids_s']:9.0f} {r['p50'] * 1000:8.1f} {r['p95'] * 1000:8.1f} " +
+              f"{r['p99'] * 1000:8.1f} {r['wall']:7.2f}")
+
+
+def run_archive(server: MPCStandIn, n_mpec: int) -> dict:
+    """
+    Time archive page retrieval and MPEC link lookups against stand-in server
+
+    :param server: running stand-in server
+    :type server: MPCStandIn
+    :param n_mpec: number of MPEC links to resolve
+    :type n_mpec: int
+    :return: timings in seconds
+    :rtype: dict
+    """
+    mpc.mpcosarchive.MPEC_URL = server.mpec_url
+    ids = [ f"2024-A{i + 1}" for i in range(n_mpec) ]
+    t0 = time.perf_counter()
+    MPCOSArchive(server.archive_url)
+    t1 = time.perf_counter()
+    resolver = MPECResolver(local=False, workers=1)
+    for id in ids:
+        resolver._request(id)
+    t2 = time.perf_counter()
+    MPECResolver(local=False).resolve(ids)
+    t3 = time.perf_counter()
+    MPECResolver().resolve(ids)
+    t4 = time.perf_counter()
+    return { "archive": t1 - t0, "mpec": t2 - t1, "mpec_concurrent": t3 - t2, "mpec_local": t4 - t3,
+             "n_mpec": n_mpec }
+
+
+
+### Test run as a command line script ###
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Local stand-in for WAMO/MPC server, load driver",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("-p", "--port", type=int, default=8080, help="server port, default 8080, 0 for load test")
+    arg.add_argument("--latency", type=float, default=0.05, help="response latency in seconds, default 0.05")
+    arg.add_argument("--jitter", type=float, default=0.05, help="additional random latency in seconds, default 0.05")
+    arg.add_argument("--errors", type=float, default=0.0, help="probability of 500 responses, default 0")
+    arg.add_argument("--throttle", type=float, default=0.0, help="probability of 429 responses, default 0")
+    arg.add_argument("--retry-after", type=float, default=1.0, help="Retry-After of 429 responses, default 1.0 s")
+    arg.add_argument("-L", "--load", action="store_true", help="run load test instead of serving")
+    arg.add_argument("-n", "--ids", type=int, default=2000, help="number of ids per load test run, default 2000")
+    arg.add_argument("-c", "--concurrency", default="1,4,8", help="list of concurrency values, default 1,4,8")
+    arg.add_argument("-b", "--batch-size", default="50,100,500", help="list of batch sizes, default 50,100,500")
+    arg.add_argument("-r", "--rate", type=float, default=0.0, help="max. WAMO requests per second, default 0 = no limit")
+    arg.add_argument("--backoff", type=float, default=0.1, help="retry backoff base for load test, default 0.1 s")
+    arg.add_argument("-M", "--mpec", type=int, default=20, help="number of MPEC links for load test, default 20")
+
+    args = arg.parse_args()
+
+    if args.verbose:
+        verbose.set_prog(NAME)
+        verbose.enable()
+    if args.debug:
+        ic.enable()
+
+    server = MPCStandIn(port=0 if args.load else args.port, latency=args.latency, jitter=args.jitter,
+                        errors=args.errors, throttle=args.throttle, retry_after=args.retry_after,
+                        n_obs=max(N_OBS, args.ids), seed=4711)
+    server.start()
+
+    if args.load:
+        concurrency = [ int(x) for x in args.concurrency.split(",") ]
+        batch_sizes = [ int(x) for x in args.batch_size.split(",") ]
+        print_load(run_load(server, args.ids, concurrency, batch_sizes, args.rate, args.backoff))
+        if args.mpec:
+            get_limiter("mpc").set_rate(0)
+            r = run_archive(server, args.mpec)
+            print(f"\narchive page {r['archive'] * 1000:.1f} ms, {r['n_mpec']} MPEC links " +
+                  f"{r['mpec'] * 1000:.1f} ms sequential, {r['mpec_concurrent'] * 1000:.1f} ms concurrent, " +
+                  f"{r['mpec_local'] * 1000:.1f} ms local")
+        print(f"\nserver: {server.counts}")
+        server.stop()
+    else:
+        print(f"WAMO:    {server.wamo_url}")
+        print(f"Archive: {server.archive_url}")
+        print(f"MPEC:    {server.mpec_url}")
+        try:
+            server._thread.join()
+        except KeyboardInterrupt:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -23,10 +23,35 @@
 #       Use JSON-style WAMO API instead of line-oriented,
 #       new functions retrieve_from_wamo_json(),
 #       get_wamo_fields(), get_wamo_data(), added typing
+# Version 1.2 / 2026-10-18
+#       Added wamo_status(), response parsing moved to decode_wamo_json()
+#       Added retrieve_from_wamo_async() / retrieve_from_wamo_batches(), several
+#       requests in parallel with concurrency cap and global rate limit,
+#       url parameter for testing with a local server
+#       Added WAMOPlanner / retrieve_from_wamo_planned(), ids of all reports are
+#       deduplicated and sent in batches of up to WAMO_BATCH_SIZE, results are
+#       distributed back per report, new decode_wamo_found()
+#       Optional persistent response cache, see set_wamo_cache() and
+#       mpc.mpcwamocache
+#       All requests use the shared "wamo" limiter from ratelimit (token
+#       bucket, retries on 429/5xx/timeouts with backoff), replacing the
+#       fixed 1 s sleep and the async-only rate limit
+#       Requests use keep-alive session from httpclient
+#       New decode_wamo_obs(), uses the structured fields of the JSON response,
+#       status_decoded text is parsed with one precompiled pattern only as a
+#       fallback, results typed as WAMOResult
+#       Added --record, --replay options
+#       WAMOPlanner.preset() / known parameter of retrieve_from_wamo_planned()
+#       for results already known, e.g. published observations from mpc.mpcobsdb
+#       Observations in processing queue returned as WAMOQueued with
+#       submission ID/time, status STATUS_QUEUE
+#       WAMOPlanner.get_ids() / with_ids parameter of retrieve_from_wamo_planned(),
+#       queried id for each result
 
 import argparse
+import asyncio
 import re
-import time
+import typing
 
 # The following libs must be installed with pip
 import requests
@@ -35,17 +60,35 @@ from icecream import ic
 ic.disable()
 # Local modules
 from verbose       import verbose, warning, error
+from ratelimit     import get_limiter
+from httpclient    import http_get
+from mpc.mpcreplay import start_replay
 from mpc.mpcdata80 import MPCData80
 
 
 
-VERSION = "1.1 / 2025-01-22"
+VERSION = "1.2 / 2026-10-18"
 AUTHOR  = "Martin Junius"
 NAME    = "mpcwamo"
 
 # Use WAMO API, see https://data.minorplanetcenter.net/wamo-api/
 WAMO_URL = "https://data.minorplanetcenter.net/api/wamo"
 
+# Defaults for parallel requests
+WAMO_CONCURRENCY = 4        # max. number of requests in flight
+WAMO_RATE        = 1.0      # max. number of requests started per second, 0 = no limit
+WAMO_TIMEOUT     = 120      # seconds
+WAMO_BATCH_SIZE  = 100      # max. number of ids per request
+
+# WAMO status of an observation, derived from "publication"
+STATUS_UNKNOWN   = ""
+STATUS_PENDING   = "pending"
+STATUS_QUEUE     = "queue"
+STATUS_NEOCP     = "neocp"
+STATUS_PUBLISHED = "published"
+# Status may still change
+STATUS_NOT_FINAL = (STATUS_UNKNOWN, STATUS_PENDING, STATUS_QUEUE, STATUS_NEOCP)
+
 
 
 def get_wamo_fields() -> list:
@@ -93,12 +136,94 @@ def get_wamo_data(wobj: dict) -> list:
 
 
 
-def retrieve_from_wamo_json(ids: dict) -> list:
+def wamo_status(pub: typing.Any) -> str:
+    """
+    Get status of observation from WAMO publication
+
+    :param pub: publication from WAMO object, False if publication is pending, None if unknown
+    :type pub: typing.Any
+    :return: one of the STATUS_* constants
+    :rtype: str
+    """
+    if pub is None:
+        return STATUS_UNKNOWN
+    if pub is False:
+        return STATUS_PENDING
+    if pub.startswith("Processing queue"):
+        return STATUS_QUEUE
+    if pub == "NEOCP/PCCP":
+        return STATUS_NEOCP
+    return STATUS_PUBLISHED
+
+
+
+# Rate limit and retries shared by all WAMO requests
+_limiter = get_limiter("wamo", rate=WAMO_RATE)
+
+
+def _wamo_request(ids: dict, url: str=None) -> dict:
+    # Single blocking WAMO request, returns JSON response
+    result = _limiter.call(http_get, url or WAMO_URL, json=list(ids.keys()), timeout=WAMO_TIMEOUT)
+    result.raise_for_status()
+    return result.json()
+
+
+async def _wamo_request_async(ids: dict, url: str=None) -> dict:
+    # Same as _wamo_request(), blocking request runs in worker thread
+    result = await _limiter.call_async(http_get, url or WAMO_URL, json=list(ids.keys()), timeout=WAMO_TIMEOUT)
+    result.raise_for_status()
+    return result.json()
+
+
+
+# Optional response cache, e.g. mpc.mpcwamocache.WAMOCache
+_wamo_cache = None
+
+def set_wamo_cache(cache: typing.Any):
+    """
+    Set cache for WAMO responses
+
+    :param cache: object with lookup(keys) -> dict and store(dict) methods, None to disable
+    :type cache: typing.Any
+    """
+    global _wamo_cache
+    _wamo_cache = cache
+
+
+def _cache_lookup(ids: dict) -> tuple:
+    # -> (dict id -> cached response, dict of ids still to request)
+    if not _wamo_cache:
+        return ({}, ids)
+    cached = _wamo_cache.lookup(ids.keys())
+    return (cached, { k: v for k, v in ids.items() if k not in cached })
+
+
+def _cache_merge(ids: dict, cached: dict, missing: dict, response: dict) -> dict:
+    # Combine cached and requested responses into one response, in the order of ids
+    fetched = {}
+    if response:
+        for item in response.get("found") or []:
+            fetched.update(item)
+        # Ids not found are cached, too
+        for k in missing.keys():
+            fetched.setdefault(k, [])
+        if _wamo_cache:
+            _wamo_cache.store(fetched)
+    found = dict(cached, **fetched)
+    keys = list(ids.keys()) + [ k for k in found.keys() if k not in ids ]
+    return { "found":     [ { k: found[k] } for k in keys if found.get(k) ],
+             "not_found": response.get("not_found", []) if response else [] }
+
+
+
+def retrieve_from_wamo_json(ids: dict, url: str=None) -> list:
     """
     Retrieve observation data from MPC WAMO service, JSON API
 
     :param ids: dict with ids to query (using the keys)
     :type ids: dict
+    :param url: WAMO API URL, defaults to None = WAMO_URL
+    :type url: str, optional
     :return: list of parsed WAMO data
     :rtype: list
     """
@@ -106,100 +231,341 @@ def retrieve_from_wamo_json(ids: dict) -> list:
         # empty ids dict
         return None
 
+    (cached, missing) = _cache_lookup(ids)
     # Return JSON results
-    result = requests.get(WAMO_URL, json=list(ids.keys()))
-    observations = result.json()
-    # ic(observations)
+    response = _wamo_request(missing, url) if missing else None
+    return decode_wamo_json(_cache_merge(ids, cached, missing, response), ids)
+
+
+
+async def retrieve_from_wamo_async(batches: list, concurrency: int=WAMO_CONCURRENCY, 
+                                   rate: float=WAMO_RATE, url: str=None,
+                                   decode: typing.Callable=None, lookup_cache: bool=True) -> list:
+    """
+    Retrieve observation data from MPC WAMO service for many batches of ids,
+    several requests in parallel
+
+    :param batches: list of ids dicts, same as for retrieve_from_wamo_json()
+    :type batches: list
+    :param concurrency: max. number of requests in flight, defaults to WAMO_CONCURRENCY
+    :type concurrency: int, optional
+    :param rate: max. number of requests started per second, sets the shared
+                 WAMO rate limit, defaults to WAMO_RATE
+    :type rate: float, optional
+    :param url: WAMO API URL, defaults to None = WAMO_URL
+    :type url: str, optional
+    :param decode: decode function for the JSON response, defaults to None = decode_wamo_json()
+    :type decode: typing.Callable, optional
+    :param lookup_cache: look up ids in response cache, defaults to True
+    :type lookup_cache: bool, optional
+    :return: list of parsed WAMO data lists in the order of batches, None for empty or failed batches
+    :rtype: list
+    """
+    decode = decode or decode_wamo_json
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    _limiter.set_rate(rate)
+
+    async def request(i: int, ids: dict) -> list:
+        if not ids:
+            return None
+        (cached, missing) = _cache_lookup(ids) if lookup_cache else ({}, ids)
+        response = None
+        if missing:
+            async with semaphore:
+                verbose(f"WAMO request #{i}, {len(missing)} ids")
+                try:
+                    response = await _wamo_request_async(missing, url)
+                except (requests.RequestException, ValueError) as e:
+                    warning(f"WAMO request #{i} failed: {e}")
+                    if not cached:
+                        return None
+        return decode(_cache_merge(ids, cached, missing, response), ids)
+
+    return await asyncio.gather(*(request(i, ids) for i, ids in enumerate(batches)))
+
+
+def retrieve_from_wamo_batches(batches: list, concurrency: int=WAMO_CONCURRENCY, 
+                               rate: float=WAMO_RATE, url: str=None) -> list:
+    """ Blocking wrapper for retrieve_from_wamo_async() """
+    if not any(batches):
+        return [ None ] * len(batches)
+    return asyncio.run(retrieve_from_wamo_async(batches, concurrency, rate, url))
+
+
+
+class WAMOPlanner:
+    """
+    Collect ids of many reports, send deduplicated ids in large batches,
+    distribute results back to the reports
+    """
+
+    def __init__(self, batch_size: int=WAMO_BATCH_SIZE):
+        self.batch_size = max(1, batch_size)
+        self._reports   = []        # list of ids dicts, index = handle
+        self._ids       = {}        # all unique ids -> observation
+        self._found     = {}        # id -> list of parsed WAMO data
+        self.n_requests = 0
+
+
+    def add(self, ids: dict) -> int:
+        """
+        Add ids of a report
+
+        :param ids: dict with ids to query (using the keys)
+        :type ids: dict
+        :return: handle for get()
+        :rtype: int
+        """
+        self._reports.append(ids or {})
+        for k, v in (ids or {}).items():
+            self._ids.setdefault(k, v)
+        return len(self._reports) - 1
+
+
+    def preset(self, found: dict):
+        """
+        Set results already known, these ids are not requested
+
+        :param found: dict id -> list of parsed WAMO data
+        :type found: dict
+        """
+        self._found.update(found)
+
+
+    def batches(self) -> list:
+        """ Unique ids not yet retrieved, split into batches """
+        keys = [ k for k in self._ids.keys() if k not in self._found ]
+        return [ { k: self._ids[k] for k in keys[i : i + self.batch_size] }
+                 for i in range(0, len(keys), self.batch_size) ]
+
+
+    def run(self, concurrency: int=WAMO_CONCURRENCY, rate: float=WAMO_RATE, url: str=None):
+        """ Send all batches, parameters see retrieve_from_wamo_async() """
+        if _wamo_cache:
+            # Only ids not in cache go into the batches
+            keys = [ k for k in self._ids.keys() if k not in self._found ]
+            cached = _wamo_cache.lookup(keys)
+            if cached:
+                self._found.update(decode_wamo_found(_cache_merge(cached, cached, {}, None), self._ids))
+                for k in cached.keys():
+                    self._found.setdefault(k, [])
+        batches = self.batches()
+        if not batches:
+            return
+        verbose(f"WAMO planner: {self.n_ids()} ids, {len(self._ids)} unique, {len(batches)} requests")
+        results = asyncio.run(retrieve_from_wamo_async(batches, concurrency, rate, url, 
+                                                       decode=decode_wamo_found, lookup_cache=False))
+        self.n_requests += len(batches)
+        for found in results:
+            if found:
+                self._found.update(found)
+
+
+    def get(self, handle: int) -> list:
+        """
+        Get results for report
+
+        :param handle: handle returned by add()
+        :type handle: int
+        :return: list of parsed WAMO data in the order of the report's ids, None if nothing found
+        :rtype: list
+        """
+        wamo = []
+        for k in self._reports[handle].keys():
+            wamo.extend(self._found.get(k, []))
+        return wamo or None
+
+
+    def get_ids(self, handle: int) -> list:
+        """
+        Get queried ids for results of report
+
+        :param handle: handle returned by add()
+        :type handle: int
+        :return: list of queried ids, same length and order as get(), None if nothing found
+        :rtype: list
+        """
+        ids = []
+        for k in self._reports[handle].keys():
+            ids.extend([ k ] * len(self._found.get(k, [])))
+        return ids or None
+
+
+    def n_ids(self) -> int:
+        """ Total number of ids of all reports """
+        return sum(len(ids) for ids in self._reports)
+
+
+
+def retrieve_from_wamo_planned(batches: list, batch_size: int=WAMO_BATCH_SIZE,
+                               concurrency: int=WAMO_CONCURRENCY, rate: float=WAMO_RATE, url: str=None,
+                               known: dict=None, with_ids: bool=False) -> list:
+    """
+    Same as retrieve_from_wamo_batches(), but using WAMOPlanner to combine the
+    ids of all batches into as few requests as possible
+
+    :param known: dict id -> list of parsed WAMO data not to be requested, defaults to None
+    :type known: dict, optional
+    :param with_ids: also return the queried id for each result, defaults to False
+    :type with_ids: bool, optional
+    :return: list of parsed WAMO data lists in the order of batches, None if nothing found,
+             with_ids: tuple (list of WAMO data lists, list of queried ids lists)
+    :rtype: list
+    """
+    planner = WAMOPlanner(batch_size)
+    handles = [ planner.add(ids) for ids in batches ]
+    if known:
+        planner.preset(known)
+    planner.run(concurrency, rate, url)
+    wamo_list = [ planner.get(h) for h in handles ]
+    if with_ids:
+        return (wamo_list, [ planner.get_ids(h) for h in handles ])
+    return wamo_list
 
+
+
+def decode_wamo_json(observations: dict, ids: dict) -> list:
+    """
+    Decode WAMO JSON response
+
+    :param observations: WAMO JSON response
+    :type observations: dict
+    :param ids: dict with queried ids (keys) and observations (values)
+    :type ids: dict
+    :return: list of parsed WAMO data
+    :rtype: list
+    """
     wamo = []
-    # for line in observations.splitlines():
+    for obs_list in decode_wamo_found(observations, ids).values():
+        wamo.extend(obs_list)
+    return wamo
+
+
+class WAMOResult(typing.TypedDict):
+    """ Parsed WAMO observation, as returned by decode_wamo_found() """
+    data:          MPCData80        # observation, dict-like
+    observationID: str
+    objId:         str              # designation or tracklet id for NEOCP/PCCP
+    publication:   typing.Any       # reference, "Processing queue ...", "NEOCP/PCCP", False = pending
+
+
+class WAMOQueued(WAMOResult, total=False):
+    """ Observation in processing queue, with submission if known """
+    submissionID:  str              # e.g. "2024-06-01T10:20:30.400_0000ABCD"
+    submitted:     str              # submission time from submission ID
+
+
+
+# Fallback for status_decoded text not covered by the structured fields,
+# one anchored pattern for all known messages
+_STATUS_RE = re.compile(
+    r"(?:(?P<data>.+) \((?P<id>[A-Za-z0-9]+)\) "
+        r"(?:has been identified as (?P<obj>.+)(?: and published in (?P<pub>.+)|, (?P<pending>publication is pending))"
+        r"|is on the (?P<neocp>NEOCP/PCCP))"
+    r"|The obsID '(?P<qid>.+)' is in the '(?P<queue>.+)' processing queue"
+    r"|The obsID '(?P<xid>[A-Za-z0-9]+)' (?:has been (?P<deleted>deleted)|was flagged as a (?P<dup>near-duplicate))"
+    r"|(?P<notfound>.*) was not found)\.$")
+
+
+def _wamo_result(data: str, id: str, obj: str, pub: typing.Any) -> WAMOResult:
+    verbose("       ", id, ":", data)
+    if obj is not None:
+        verbose("       ", " " * len(id), ":", obj)
+    verbose("       ", " " * len(id), ":", pub)
+    data80 = MPCData80(data)
+    if obj is None:
+        obj = data80.get_col(6, 12)     # tracklet ID
+    return WAMOResult(data=data80.get_obj(), observationID=id, objId=obj, publication=pub)
+
+
+def _wamo_queued(obs: dict, ids: dict, id: str, pub: str) -> WAMOQueued:
+    # 80-column data from response or queried observation (ACK mails, id = obsID)
+    data = obs.get("obs80") or ids.get(id)
+    if not isinstance(data, str) or len(data) < 80:
+        verbose("       ", id, ":", pub)
+        return None
+    result = WAMOQueued(**_wamo_result(data, id, None, pub))
+    submission = obs.get("submission_id")
+    if submission:
+        result["submissionID"] = submission
+        # Submission ID starts with the submission time
+        result["submitted"] = submission.split("_")[0]
+    return result
+
+
+def decode_wamo_obs(obs: dict, ids: dict) -> WAMOResult:
+    """
+    Decode single observation of WAMO JSON response
+
+    :param obs: WAMO observation with obsid, obs80, iau_desig, ref, status_decoded
+    :type obs: dict
+    :param ids: dict with queried ids (keys) and observations (values), for warnings
+    :type ids: dict
+    :return: parsed WAMO data, None for deleted, not found etc. and for
+             observations in processing queue without 80-column data
+    :rtype: WAMOResult
+    """
+    line = obs["status_decoded"]
+    if line == "":
+        return None
+
+    # Structured fields, status_decoded only used to tell apart the cases
+    id   = obs.get("obsid")
+    data = obs.get("obs80")
+    desig = obs.get("iau_desig")
+    if id and data:
+        ref = obs.get("ref")
+        if desig and ref and line.endswith(f" and published in {ref}."):
+            return _wamo_result(data, id, desig, ref)
+        if desig and line.endswith(", publication is pending."):
+            return _wamo_result(data, id, desig, False)
+        if line.endswith(") is on the NEOCP/PCCP."):
+            return _wamo_result(data, id, None, "NEOCP/PCCP")
+
+    # Fallback: parse status_decoded text
+    m = _STATUS_RE.match(line)
+    if not m:
+        warning(f"unknown response: {line}")
+        warning("corresponding observations:")
+        for obs in ids.keys():
+            warning(f"    {obs}")
+    elif m["obj"] is not None:
+        return _wamo_result(m["data"], m["id"], m["obj"], False if m["pending"] else m["pub"])
+    elif m["neocp"]:
+        return _wamo_result(m["data"], m["id"], None, m["neocp"])
+    elif m["queue"]:
+        return _wamo_queued(obs, ids, m["qid"], "Processing queue " + m["queue"])
+    elif m["deleted"]:
+        warning(f"id {m['xid']} = observation \"{ids[m['xid']]}\" deleted")
+    elif m["dup"]:
+        warning(f"id {m['xid']} = observation \"{ids[m['xid']]}\" flagged near-duplicate")
+    else:
+        warning(f"not found: {m['notfound']}")
+    return None
+
+
+def decode_wamo_found(observations: dict, ids: dict) -> dict:
+    """
+    Decode WAMO JSON response, grouped by queried id
+
+    :param observations: WAMO JSON response
+    :type observations: dict
+    :param ids: dict with queried ids (keys) and observations (values)
+    :type ids: dict
+    :return: dict queried id -> list of parsed WAMO data
+    :rtype: dict
+    """
+    found = {}
     for item in observations.get("found"):
-        # ic(item, item.keys())
         for k, obs_list in item.items():
-            # ic(k, obs_list)
+            wamo = found.setdefault(k, [])
             for obs in obs_list:
-                line = obs["status_decoded"]
-                ic(k, obs, line)
-                if line == "":
-                    continue
-
-                ## FIXME: use JSON results, don't parse text lines
-                m = re.search(r'^(.+) \(([A-Za-z0-9]+)\) has been identified as (.+) and published in (.+)\.$', line)
-                pending = False
-                if not m:
-                    m = re.search(r'^(.+) \(([A-Za-z0-9]+)\) has been identified as (.+), (publication is pending).$', line)
-                    pending = True
-                if m:    
-                    data = m.group(1)
-                    id   = m.group(2)
-                    obj  = m.group(3)
-                    pub  = m.group(4)
-                    verbose("       ", id, ":", data)
-                    verbose("       ", " " * len(id), ":", obj)
-                    verbose("       ", " " * len(id), ":", pub)
-                    if pending:
-                        pub = False
-                    # Must be handled outside of this function
-                    #     pub = "pending"
-                    # else:
-                    #     Publication.add_publication(pub)
-
-                    data80 = MPCData80(data)
-
-                    wamo.append({"data":          data80.get_obj(),
-                                "observationID": id,
-                                "objId":         obj,
-                                "publication":   pub  })
-
-                if not m:
-                    m = re.search(r'The obsID \'(.+)\' is in the \'(.+)\' processing queue.$', line)
-                    if m:
-                        id = m.group(1)
-                        pub = "Processing queue " + m.group(2)
-                        verbose("       ", id, ":", pub)
-
-                if not m:
-                    m = re.search(r'^(.+) \(([A-Za-z0-9]+)\) is on the (NEOCP/PCCP).$', line)
-                    if m:
-                        data = m.group(1)
-                        id   = m.group(2)
-                        pub  = m.group(3)
-                        verbose("       ", id, ":", data)
-                        verbose("       ", " " * len(id), ":", pub)
-                        data80 = MPCData80(data)
-
-                        wamo.append({"data":          data80.get_obj(),
-                                    "observationID": id,
-                                    "objId":         data80.get_col(6, 12),    # tracklet ID
-                                    "publication":   pub  })
-
-                if not m:
-                    m = re.search(r'^The obsID \'([A-Za-z0-9]+)\' has been deleted.$', line)
-                    if m:
-                        id = m.group(1)
-                        warning(f"id {id} = observation \"{ids[id]}\" deleted")
-
-                if not m:
-                    m = re.search(r'^The obsID \'([A-Za-z0-9]+)\' was flagged as a near-duplicate.$', line)
-                    if m:
-                        id = m.group(1)
-                        warning(f"id {id} = observation \"{ids[id]}\" flagged near-duplicate")
-
-                if not m:
-                    m = re.search(r'(.*) was not found\.$', line)
-                    if m:
-                        warning(f"not found: {m.group(1)}")
-
-                if not m:
-                    warning(f"unknown response: {line}")
-                    warning("corresponding observations:")
-                    for obs in ids.keys():
-                        warning(f"    {obs}")
-
-    # Avoid high load on the MPC server
-    time.sleep(1.0)
+                ic(k, obs)
+                result = decode_wamo_obs(obs, ids)
+                if result:
+                    wamo.append(result)
 
-    return wamo
+    return found
 
 
 
@@ -212,7 +578,8 @@ def retrieve_from_wamo(ids):
         return None
 
     # Return text results, doesn't seem to work as of 2025-01-22
-    result = requests.get(WAMO_URL, json={'return_type': 'string', 'obs': list(ids.keys())})
+    result = _limiter.call(http_get, WAMO_URL, json={'return_type': 'string', 'obs': list(ids.keys())},
+                           timeout=WAMO_TIMEOUT)
     observations = result.text
     ic(observations)
 
@@ -294,9 +661,6 @@ def retrieve_from_wamo(ids):
             for obs in ids.keys():
                 warning(f"    {obs}")
 
-    # Avoid high load on the MPC server
-    time.sleep(1.0)
-
     return wamo
 
 
@@ -309,6 +673,12 @@ def main():
         epilog      = "Version " + VERSION + " / " + AUTHOR)
     arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
     arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("-u", "--url", help=f"WAMO API URL, default {WAMO_URL}")
+    arg.add_argument("-b", "--batch-size", type=int, default=0, help="split ids into batches of BATCH_SIZE, requested in parallel")
+    arg.add_argument("--concurrency", type=int, default=WAMO_CONCURRENCY, help=f"max. parallel requests, default {WAMO_CONCURRENCY}")
+    arg.add_argument("--rate", type=float, default=WAMO_RATE, help=f"max. requests per second, default {WAMO_RATE}")
+    arg.add_argument("--record", help="record all HTTP requests to SQLite store RECORD")
+    arg.add_argument("--replay", help="replay HTTP requests from SQLite store REPLAY, no network access")
     arg.add_argument("id", nargs="+",help="observation id")
 
     args = arg.parse_args()
@@ -319,12 +689,25 @@ def main():
     if args.debug:
         ic.enable()
 
+    replay = None
+    if args.record or args.replay:
+        replay = start_replay(args.record or args.replay, record=bool(args.record))
+
     ids = { k: "-no obs-" for k in args.id }
     ic(ids)
 
-    wamo = retrieve_from_wamo_json(ids)
+    if args.batch_size:
+        keys = list(ids.keys())
+        batches = [ { k: ids[k] for k in keys[i : i + args.batch_size] } for i in range(0, len(keys), args.batch_size) ]
+        wamo = retrieve_from_wamo_planned(batches, args.batch_size, args.concurrency, args.rate, args.url)
+    else:
+        wamo = retrieve_from_wamo_json(ids, args.url)
     ic(wamo)
 
+    if replay:
+        verbose(replay.stats())
+        replay.close()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage
+#   from mpc.mpcwamo import set_wamo_cache
+#   from mpc.mpcwamocache import WAMOCache
+#   set_wamo_cache(WAMOCache(file))
+#
+# Raw WAMO responses are cached per queried id (observation id, 80-column
+# data or "trkSub stn"). Published observations don't change and are kept
+# forever, all other answers expire after a TTL depending on the status.
+# TTLs can be changed with parse_ttls("pending=3600,queue=600,..."), with
+# refresh=True cached answers are ignored but new answers are still stored.
+
+# ChangeLog
+# Version 0.1 / 2026-10-18
+#       Persistent SQLite cache for WAMO responses with status-aware TTLs,
+#       size limit with LRU eviction, hit/miss statistics
+#       Added parse_ttls(), refresh parameter, -t/--ttl option
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+
+# The following libs must be installed with pip
+from icecream import ic
+# Disable debugging
+ic.disable()
+# Local modules
+from verbose     import verbose, warning, error
+from mpc.mpcwamo import STATUS_UNKNOWN, STATUS_PENDING, STATUS_QUEUE, STATUS_NEOCP, STATUS_PUBLISHED
+
+
+VERSION = "0.1 / 2026-10-18"
+AUTHOR  = "Martin Junius"
+NAME    = "mpcwamocache"
+
+WAMO_CACHE  = "mpc-wamo-cache.sqlite"
+MAX_ENTRIES = 200000
+
+# Time to live in seconds, None = never expires
+TTLS = {
+    STATUS_PUBLISHED: None,
+    STATUS_PENDING:   24 * 3600,
+    STATUS_QUEUE:     3600,
+    STATUS_NEOCP:     3600,
+    STATUS_UNKNOWN:   6 * 3600,     # incl. not found
+}
+
+# Status names for parse_ttls(), STATUS_UNKNOWN is ""
+_TTL_NAMES = { "unknown": STATUS_UNKNOWN, STATUS_PENDING: STATUS_PENDING, STATUS_QUEUE: STATUS_QUEUE,
+               STATUS_NEOCP: STATUS_NEOCP, STATUS_PUBLISHED: STATUS_PUBLISHED }
+
+
+
+def parse_ttls(text: str) -> dict:
+    """
+    Parse TTLs from command line
+
+    :param text: comma-separated STATUS=SECONDS, SECONDS "none" = never expires,
+                 e.g. "pending=3600,queue=600,published=none"
+    :type text: str
+    :raises ValueError: unknown status or invalid seconds
+    :return: dict status -> TTL in seconds or None, for WAMOCache(ttls=...)
+    :rtype: dict
+    """
+    ttls = {}
+    for item in text.split(","):
+        (name, _, value) = item.partition("=")
+        name = name.strip().lower()
+        if name not in _TTL_NAMES:
+            raise ValueError(f"unknown status {name}, must be one of {', '.join(_TTL_NAMES)}")
+        value = value.strip().lower()
+        ttls[_TTL_NAMES[name]] = None if value == "none" else int(value)
+    return ttls
+
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS wamo (
+    key         TEXT PRIMARY KEY,       -- queried id
+    status      TEXT,                   -- see mpc.mpcwamo STATUS_*
+    response    TEXT,                   -- JSON list of WAMO observations for this id
+    created     REAL,
+    accessed    REAL
+);
+CREATE INDEX IF NOT EXISTS wamo_accessed ON wamo(accessed);
+"""
+
+
+
+def response_status(obs_list: list) -> str:
+    """
+    Get status of raw WAMO response for one id, without full decoding
+
+    :param obs_list: list of WAMO observations
+    :type obs_list: list
+    :return: STATUS_PUBLISHED if all observations are published, else the
+             first non-final status
+    :rtype: str
+    """
+    if not obs_list:
+        return STATUS_UNKNOWN
+    for obs in obs_list:
+        text = obs.get("status_decoded", "")
+        if " and published in " in text:
+            continue
+        if text.endswith("publication is pending."):
+            return STATUS_PENDING
+        if "processing queue" in text:
+            return STATUS_QUEUE
+        if text.endswith("is on the NEOCP/PCCP."):
+            return STATUS_NEOCP
+        return STATUS_UNKNOWN
+    return STATUS_PUBLISHED
+
+
+
+class WAMOCache:
+    """ Persistent cache for WAMO responses, safe to use from worker threads """
+
+    def __init__(self, file: str=WAMO_CACHE, ttls: dict=None, max_entries: int=MAX_ENTRIES,
+                 refresh: bool=False):
+        """
+        Open/create cache
+
+        :param file: SQLite database file, defaults to WAMO_CACHE
+        :type file: str, optional
+        :param ttls: TTLs per status, overriding TTLS, defaults to None
+        :type ttls: dict, optional
+        :param max_entries: max. number of cached ids, defaults to MAX_ENTRIES
+        :type max_entries: int, optional
+        :param refresh: ignore cached answers, store new ones, defaults to False
+        :type refresh: bool, optional
+        """
+        ic(file)
+        self.file        = file
+        self.ttls        = dict(TTLS, **(ttls or {}))
+        self.max_entries = max_entries
+        self.refresh     = refresh
+        self.hits        = 0
+        self.misses      = 0
+        self.expired     = 0
+        self.stored      = 0
+        self.evicted     = 0
+        self._lock       = threading.Lock()
+        self.db = sqlite3.connect(file, check_same_thread=False)
+        self.db.executescript(_SCHEMA)
+
+
+    def close(self):
+        with self._lock:
+            self.db.commit()
+            self.db.close()
+
+
+    def _expired(self, status: str, created: float, now: float) -> bool:
+        ttl = self.ttls.get(status, self.ttls[STATUS_UNKNOWN])
+        return ttl is not None and now - created > ttl
+
+
+    def lookup(self, keys) -> dict:
+        """
+        Look up ids in cache
+
+        :param keys: queried ids
+        :return: dict id -> list of WAMO observations, for valid entries only
+        :rtype: dict
+        """
+        keys = list(keys)
+        found = {}
+        now = time.time()
+        if self.refresh:
+            with self._lock:
+                self.misses += len(keys)
+            return found
+        with self._lock:
+            # SQLite limits the number of parameters per statement
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                rows = self.db.execute("SELECT key, status, response, created FROM wamo WHERE key IN (" +
+                                       ", ".join("?" * len(chunk)) + ")", chunk).fetchall()
+                for key, status, response, created in rows:
+                    if self._expired(status, created, now):
+                        self.expired += 1
+                        continue
+                    found[key] = json.loads(response)
+            if found:
+                self.db.executemany("UPDATE wamo SET accessed=? WHERE key=?", [ (now, k) for k in found ])
+            self.hits   += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+
+    def store(self, found: dict):
+        """
+        Store WAMO responses
+
+        :param found: dict id -> list of WAMO observations, empty list for ids not found
+        :type found: dict
+        """
+        now = time.time()
+        rows = [ (k, response_status(v), json.dumps(v), now, now) for k, v in found.items() ]
+        with self._lock:
+            self.db.executemany("INSERT OR REPLACE INTO wamo (key, status, response, created, accessed) VALUES (?, ?, ?, ?, ?)", rows)
+            self.stored += len(rows)
+            self._evict()
+            self.db.commit()
+
+
+    def _evict(self):
+        # Remove least recently used entries above max_entries
+        (n,) = self.db.execute("SELECT COUNT(*) FROM wamo").fetchone()
+        if n > self.max_entries:
+            excess = n - self.max_entries
+            self.db.execute("DELETE FROM wamo WHERE key IN (SELECT key FROM wamo ORDER BY accessed LIMIT ?)", (excess,))
+            self.evicted += excess
+
+
+    def purge(self) -> int:
+        """ Remove expired entries, returns number of removed entries """
+        now = time.time()
+        with self._lock:
+            keys = [ key for key, status, created in self.db.execute("SELECT key, status, created FROM wamo")
+                     if self._expired(status, created, now) ]
+            self.db.executemany("DELETE FROM wamo WHERE key=?", [ (k,) for k in keys ])
+            self.db.commit()
+        return len(keys)
+
+
+    def clear(self):
+        """ Remove all entries """
+        with self._lock:
+            self.db.execute("DELETE FROM wamo")
+            self.db.commit()
+
+
+    def count(self) -> dict:
+        """ Number of entries per status """
+        with self._lock:
+            return dict(self.db.execute("SELECT status, COUNT(*) FROM wamo GROUP BY status").fetchall())
+
+
+    def hit_rate(self) -> float:
+        n = self.hits + self.misses
+        return self.hits / n if n else 0.0
+
+
+    def stats(self) -> str:
+        """ Statistics of this session """
+        return (f"WAMO cache: {self.hits} hits, {self.misses} misses ({self.hit_rate() * 100:.1f}% hit rate), " +
+                f"{self.expired} expired, {self.stored} stored, {self.evicted} evicted")
+
+
+
+### Test run as a command line script ###
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Manage WAMO response cache",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("-f", "--file", default=WAMO_CACHE, help=f"cache file, default {WAMO_CACHE}")
+    arg.add_argument("-P", "--purge", action="store_true", help="remove expired entries")
+    arg.add_argument("-X", "--clear", action="store_true", help="remove all entries")
+    arg.add_argument("-t", "--ttl", help="TTLs for --purge, e.g. pending=3600,queue=600,unknown=0,published=none")
+
+    args = arg.parse_args()
+
+    if args.verbose:
+        verbose.set_prog(NAME)
+        verbose.enable()
+    if args.debug:
+        ic.enable()
+
+    try:
+        ttls = parse_ttls(args.ttl) if args.ttl else None
+    except ValueError as e:
+        error(f"--ttl: {e}")
+    cache = WAMOCache(args.file, ttls=ttls)
+    if args.clear:
+        cache.clear()
+    if args.purge:
+        print(f"{cache.purge()} expired entries removed")
+    for status, n in cache.count().items():
+        print(f"{status or 'unknown':10s} {n:8d}")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
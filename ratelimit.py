@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+
+# Copyright 2026 Martin Junius
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# ChangeLog
+# Version 0.1 / 2026-10-18
+#       Token bucket rate limiter with retries, exponential backoff with
+#       jitter and Retry-After support, shared per service name
+#
+#       Usage:  from ratelimit import get_limiter
+#               limiter = get_limiter("wamo", rate=1.0, burst=1)
+#               response = limiter.call(requests.get, url, timeout=...)
+#               response = await limiter.call_async(requests.get, url, timeout=...)
+#               limiter.stats()
+#               ratelimit_stats()       list of stats for all limiters
+#               enable_limits(False)    no rate limits, e.g. for replayed requests
+#               limiter.call(requests.post, url, ..., retry=False)
+#                                       non-idempotent request, no retry after
+#                                       connection errors/timeouts or 5xx
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# The following libs must be installed with pip
+import requests
+from icecream import ic
+# Disable debugging
+ic.disable()
+# Local modules
+from verbose import verbose, warning, error
+
+
+VERSION = "0.1 / 2026-10-18"
+AUTHOR  = "Martin Junius"
+NAME    = "ratelimit"
+
+RETRIES      = 5                            # max. number of retries
+BACKOFF      = 1.0                          # seconds, base for exponential backoff
+MAX_BACKOFF  = 60.0                         # seconds, max. wait before retry
+RETRY_STATUS = (429, 500, 502, 503, 504)    # HTTP status codes to retry
+REJECT_STATUS = (429,)                      # request not processed, safe to retry always
+
+
+
+class TokenBucket:
+    """ Token bucket, thread-safe, tokens are reserved in advance """
+
+    def __init__(self, rate: float, burst: int=1):
+        """
+        Create token bucket
+
+        :param rate: tokens per second, 0 = no limit
+        :type rate: float
+        :param burst: bucket size, defaults to 1
+        :type burst: int, optional
+        """
+        self.rate    = rate
+        self.burst   = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last   = time.monotonic()
+        self._lock   = threading.Lock()
+
+    def reserve(self) -> float:
+        """ Take one token, returns the time to wait before using it """
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+
+def retry_after(response: requests.Response) -> float:
+    """
+    Get Retry-After header in seconds
+
+    :param response: HTTP response
+    :type response: requests.Response
+    :return: seconds or None if not present/invalid
+    :rtype: float
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+
+# Global switch for rate limits, retries are not affected
+_enabled = True
+
+def enable_limits(flag: bool=True):
+    """ Enable/disable rate limits of all limiters """
+    global _enabled
+    _enabled = flag
+
+
+
+class RateLimiter:
+    """ Rate limit and retry HTTP requests for one service """
+
+    def __init__(self, name: str, rate: float=0, burst: int=1, retries: int=RETRIES,
+                 backoff: float=BACKOFF, max_backoff: float=MAX_BACKOFF, retry_status: tuple=RETRY_STATUS):
+        """
+        Create rate limiter
+
+        :param name: service name
+        :type name: str
+        :param rate: max. requests per second, defaults to 0 = no limit
+        :type rate: float, optional
+        :param burst: max. burst of requests, defaults to 1
+        :type burst: int, optional
+        :param retries: max. number of retries, defaults to RETRIES
+        :type retries: int, optional
+        :param backoff: base for exponential backoff in seconds, defaults to BACKOFF
+        :type backoff: float, optional
+        :param max_backoff: max. wait before retry in seconds, defaults to MAX_BACKOFF
+        :type max_backoff: float, optional
+        :param retry_status: HTTP status codes to retry, defaults to RETRY_STATUS
+        :type retry_status: tuple, optional
+        """
+        self.name         = name
+        self.bucket       = TokenBucket(rate, burst)
+        self.retries      = retries
+        self.backoff      = backoff
+        self.max_backoff  = max_backoff
+        self.retry_status = retry_status
+        # Counters
+        self.requests     = 0
+        self.retried      = 0
+        self.failed       = 0
+        self.throttled    = 0.0         # seconds spent waiting for tokens or backoff
+        self._lock        = threading.Lock()
+
+
+    def set_rate(self, rate: float, burst: int=None):
+        """ Change rate and burst """
+        self.bucket.rate = rate
+        if burst:
+            self.bucket.burst = max(1, burst)
+
+
+    def _count(self, requests: int=0, retried: int=0, failed: int=0, throttled: float=0.0):
+        with self._lock:
+            self.requests  += requests
+            self.retried   += retried
+            self.failed    += failed
+            self.throttled += throttled
+
+
+    def _backoff(self, attempt: int, response: requests.Response=None) -> float:
+        # Retry-After if present, else exponential backoff with full jitter
+        wait = retry_after(response) if response is not None else None
+        if wait is None:
+            wait = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        return min(wait, self.max_backoff)
+
+
+    def _check(self, attempt: int, response: requests.Response=None, exc: Exception=None, retry: bool=True) -> float:
+        # Returns wait time before retry, None if done
+        # Without retry, the request may have been processed already, unless rejected
+        if exc is None and response.status_code not in (self.retry_status if retry else REJECT_STATUS):
+            return None
+        if exc is not None and not retry:
+            self._count(failed=1)
+            return None
+        if attempt >= self.retries:
+            self._count(failed=1)
+            return None
+        wait = self._backoff(attempt, response)
+        self._count(retried=1, throttled=wait)
+        what = f"{exc.__class__.__name__}" if exc else f"HTTP {response.status_code}"
+        warning(f"{self.name}: {what}, retry {attempt + 1}/{self.retries} in {wait:.1f} s")
+        return wait
+
+
+    def call(self, func, *args, retry: bool=True, **kwargs) -> requests.Response:
+        """
+        Call request function with rate limit and retries
+
+        :param func: request function, e.g. requests.get, returning requests.Response
+        :param retry: retry after connection errors/timeouts and 5xx, False for
+                      non-idempotent requests (only 429 is retried), defaults to True
+        :type retry: bool, optional
+        :raises requests.RequestException: connection errors/timeouts after last retry
+        :return: response, may still be an error response after last retry
+        :rtype: requests.Response
+        """
+        attempt = 0
+        while True:
+            wait = self.bucket.reserve() if _enabled else 0.0
+            if wait > 0:
+                self._count(throttled=wait)
+                time.sleep(wait)
+            self._count(requests=1)
+            try:
+                response = func(*args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if (wait := self._check(attempt, exc=e, retry=retry)) is None:
+                    raise
+            else:
+                if (wait := self._check(attempt, response, retry=retry)) is None:
+                    return response
+            time.sleep(wait)
+            attempt += 1
+
+
+    async def call_async(self, func, *args, retry: bool=True, **kwargs) -> requests.Response:
+        """ Same as call(), blocking request function runs in worker thread """
+        attempt = 0
+        while True:
+            wait = self.bucket.reserve() if _enabled else 0.0
+            if wait > 0:
+                self._count(throttled=wait)
+                await asyncio.sleep(wait)
+            self._count(requests=1)
+            try:
+                response = await asyncio.to_thread(func, *args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if (wait := self._check(attempt, exc=e, retry=retry)) is None:
+                    raise
+            else:
+                if (wait := self._check(attempt, response, retry=retry)) is None:
+                    return response
+            await asyncio.sleep(wait)
+            attempt += 1
+
+
+    def stats(self) -> dict:
+        """ Counters """
+        return { "requests": self.requests, "retries": self.retried, "failed": self.failed,
+                 "throttled": round(self.throttled, 3) }
+
+
+    def __str__(self):
+        return (f"{self.name}: {self.requests} requests, {self.retried} retries, {self.failed} failed, " +
+                f"{self.throttled:.1f} s throttled")
+
+
+
+# Shared limiters per service name
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str, **kwargs) -> RateLimiter:
+    """
+    Get shared rate limiter for service, created with kwargs on first call
+
+    :param name: service name
+    :type name: str
+    :return: rate limiter
+    :rtype: RateLimiter
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = RateLimiter(name, **kwargs)
+        return _limiters[name]
+
+
+def ratelimit_stats() -> list:
+    """ Stats of all limiters with requests, as list of str """
+    return [ str(limiter) for limiter in _limiters.values() if limiter.requests ]
+
+
+### Test run as a command line script ###
+def main():
+    arg = argparse.ArgumentParser(
+        prog        = NAME,
+        description = "Test rate limiter, request URL N times",
+        epilog      = "Version " + VERSION + " / " + AUTHOR)
+    arg.add_argument("-v", "--verbose", action="store_true", help="verbose messages")
+    arg.add_argument("-d", "--debug", action="store_true", help="more debug messages")
+    arg.add_argument("-n", "--number", type=int, default=5, help="number of requests, default 5")
+    arg.add_argument("-r", "--rate", type=float, default=1.0, help="requests per second, default 1.0")
+    arg.add_argument("-b", "--burst", type=int, default=1, help="burst size, default 1")
+    arg.add_argument("url", help="URL")
+
+    args = arg.parse_args()
+
+    if args.verbose:
+        verbose.set_prog(NAME)
+        verbose.enable()
+    if args.debug:
+        ic.enable()
+
+    limiter = get_limiter("test", rate=args.rate, burst=args.burst)
+    t0 = time.monotonic()
+    for i in range(args.number):
+        r = limiter.call(requests.get, args.url, timeout=20)
+        verbose(f"{time.monotonic() - t0:6.2f} s: HTTP {r.status_code}")
+    print(limiter)
+
+
+
+if __name__ == "__main__":
+    main()
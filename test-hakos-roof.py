@@ -24,9 +24,11 @@
 #       --unlocked, -D / --discord, send error messages via Discord
 # Version 1.3 / 2026-03-17
 #       Use new jsonconfig module, added --startup option
+# Version 1.4 / 2026-10-18
+#       Use shared HTTP client from httpclient
 
 NAME    = "test-hakos-roof"
-VERSION = "1.3 / 2026-03-17"
+VERSION = "1.4 / 2026-10-18"
 AUTHOR  = "Martin Junius"
 
 import sys
@@ -41,9 +43,10 @@ ic.disable()
 from verbose    import verbose, warning, error
 from jsonconfig import JSONConfig, config
 from discordmsg import discord_message
+from httpclient import http_get
 
 CONFIG  = "hakosroof.json"
-TIMEOUT = 20                # seconds timeout for requests.get()
+TIMEOUT = 20                # seconds timeout for http_get()
 
 
 
@@ -77,7 +80,7 @@ def main():
     ic(url)
 
     try:
-        response = requests.get(url, timeout=TIMEOUT)
+        response = http_get(url, timeout=TIMEOUT)
     except requests.exceptions.RequestException as e:
         ic(e)
         if args.discord: